@@ -0,0 +1 @@
+"""Benchmarks of python-openhab, see run.py."""
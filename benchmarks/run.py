@@ -0,0 +1,278 @@
+"""Benchmarks of python-openhab against an in-process fake openHAB server.
+
+Run from the repository root, e.g.:
+
+  python -m benchmarks.run --sizes 1000 10000 100000
+  python -m benchmarks.run --compare benchmarks/results/4.0.0.json
+
+The results are written to ``benchmarks/results/<version>.json`` (or the file given with ``--output``); comparing
+against the results of a previous version lists the benchmarks which got slower.
+"""
+
+import argparse
+import datetime
+import importlib.metadata
+import json
+import pathlib
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import typing
+
+import httpx
+
+import openhab
+import openhab.command_types
+from tests.fake_openhab import BASE_URL, FakeOpenHAB
+
+# ruff: noqa: T201, S603, S607
+
+RESULTS_DIR = pathlib.Path(__file__).resolve().parent / 'results'
+GROUP_SIZE = 50
+
+# item types of the synthetic registry with a typical state each, in the proportion they are generated
+ITEM_TYPES = [
+  ('Switch', 'ON'),
+  ('Switch', 'OFF'),
+  ('Number:Temperature', '21.5 °C'),
+  ('Number', '42'),
+  ('Dimmer', '75'),
+  ('Contact', 'CLOSED'),
+  ('String', 'some text'),
+  ('DateTime', '2024-01-02T03:04:05.678+0100'),
+  ('Color', '120,100,50'),
+  ('Rollershutter', '30'),
+]
+
+PARSER_STATES = {
+  'DecimalType': ['23.5', '42', '-1.25 °C', '1013.2 hPa', 'NULL'],
+  'PercentType': ['0', '55.5', '100', 'UNDEF'],
+  'OnOffType': ['ON', 'OFF', 'NULL'],
+  'DateTimeType': ['2024-01-02T03:04:05.678+0100', '2023-06-30T23:59:59.000+0000'],
+  'ColorType': ['120,100,50', '0,0,0'],
+  'PointType': ['52.5200,13.4050', '48.8566,2.3522,35'],
+}
+
+
+def distinct_timestamp(index: int) -> str:
+  """Return a DateTime state as sent by openHAB, different for every *index*."""
+  timestamp = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone(datetime.timedelta(hours=1))) + datetime.timedelta(seconds=61 * index)
+  return timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3] + timestamp.strftime('%z')
+
+
+def build_registry(size: int, points: int) -> FakeOpenHAB:
+  """Return a fake openHAB server with *size* items in groups of `GROUP_SIZE` and *points* persisted values."""
+  fake = FakeOpenHAB()
+
+  for index in range(size):
+    if index % GROUP_SIZE == 0:
+      fake.add_item(f'group_{index // GROUP_SIZE}', 'Group', groupType='Switch')
+
+    type_, state = ITEM_TYPES[index % len(ITEM_TYPES)]
+    fake.add_item(f'item_{index}', type_, state, groupNames=[f'group_{index // GROUP_SIZE}'], tags=['Benchmark'])
+
+  start = 1700000000000
+  fake.persistence['item_2'] = [{'time': start + i * 60000, 'state': f'{20 + (i % 100) / 10} °C'} for i in range(points)]
+  fake.persistence['item_7'] = [{'time': start + i * 60000, 'state': distinct_timestamp(i)} for i in range(points)]
+
+  return fake
+
+
+def transport(fake: FakeOpenHAB) -> httpx.MockTransport:
+  """Return a transport serving the fake server, with the item list encoded once so it is not part of the measurement."""
+  items = json.dumps([fake.item_json(name) for name in fake.items]).encode('utf-8')
+
+  def handler(request: httpx.Request) -> httpx.Response:
+    if request.method == 'GET' and request.url.path in ('/rest/items', '/rest/items/') and not request.url.params:
+      return httpx.Response(200, content=items, headers={'Content-Type': 'application/json'})
+
+    return fake.handle(request)
+
+  return httpx.MockTransport(handler)
+
+
+def client(fake_transport: httpx.MockTransport, identity_map: bool = True) -> openhab.OpenHAB:
+  oh = openhab.OpenHAB(BASE_URL, identity_map=identity_map)
+  oh.session = httpx.Client(transport=fake_transport)
+  return oh
+
+
+def benchmarks(size: int, fake: FakeOpenHAB) -> dict[str, tuple[typing.Callable[[], typing.Any], int]]:
+  """Return the benchmarks for a registry of *size* items as a dict of name to (function, operations per call)."""
+  fake_transport = transport(fake)
+  items_json = [fake.item_json(name) for name in fake.items]
+  points = len(fake.persistence['item_2'])
+
+  def fetch_all_items() -> None:
+    client(fake_transport).fetch_all_items()
+
+  def fetch_all_items_lazy() -> None:
+    client(fake_transport).fetch_all_items(lazy=True)
+
+  def json_to_item() -> None:
+    oh = client(fake_transport, identity_map=False)
+    for item_json in items_json:
+      oh.json_to_item(item_json)
+
+  bulk_client = client(fake_transport)
+  switches = [item for item in bulk_client.fetch_all_items().values() if item.type_ == 'Switch'][:1000]
+
+  def send_commands() -> None:
+    bulk_client.send_commands({item: 'ON' for item in switches})
+
+  def persistence_paging() -> None:
+    for _ in client(fake_transport).get_item_persistence('item_2', page_length=1000):
+      pass
+
+  def persistence_prefetch() -> None:
+    for _ in client(fake_transport).get_item_persistence('item_2', page_length=1000, prefetch=2):
+      pass
+
+  def persistence_decoded_datetime() -> None:
+    for _ in client(fake_transport).get_item('item_7').persistence(page_length=1000, decoded=True):
+      pass
+
+  result: dict[str, tuple[typing.Callable[[], typing.Any], int]] = {
+    'fetch_all_items': (fetch_all_items, len(fake.items)),
+    'fetch_all_items_lazy': (fetch_all_items_lazy, len(fake.items)),
+    'json_to_item': (json_to_item, len(items_json)),
+    'send_commands': (send_commands, len(switches)),
+    'persistence_paging': (persistence_paging, points),
+    'persistence_prefetch': (persistence_prefetch, points),
+    'persistence_decoded_datetime': (persistence_decoded_datetime, points),
+  }
+
+  for type_name, states in PARSER_STATES.items():
+    parse = getattr(openhab.command_types, type_name).parse
+    values = [states[i % len(states)] for i in range(size)]
+
+    def run_parser(parse: typing.Callable[[str], typing.Any] = parse, values: list[str] = values) -> None:
+      for value in values:
+        parse(value)
+
+    result[f'parse_{type_name}'] = (run_parser, size)
+
+  timestamps = [distinct_timestamp(i) for i in range(size)]
+
+  def parse_datetime_distinct() -> None:
+    for value in timestamps:
+      openhab.command_types.DateTimeType.parse(value)
+
+  result['parse_DateTimeType_distinct'] = (parse_datetime_distinct, size)
+
+  return result
+
+
+def measure(function: typing.Callable[[], typing.Any], repeat: int) -> list[float]:
+  """Return the durations in seconds of *repeat* calls of *function*, after a warm-up call."""
+  function()
+  durations = []
+
+  for _ in range(repeat):
+    start = time.perf_counter()
+    function()
+    durations.append(time.perf_counter() - start)
+
+  return durations
+
+
+def version() -> str:
+  """Return the version of python-openhab being benchmarked."""
+  try:
+    return importlib.metadata.version('python-openhab')
+  except importlib.metadata.PackageNotFoundError:
+    pass
+
+  try:
+    return subprocess.run(['git', 'describe', '--tags', '--always', '--dirty'], capture_output=True, text=True, check=True).stdout.strip()
+  except (OSError, subprocess.CalledProcessError):
+    return 'unknown'
+
+
+def compare(results: dict[str, typing.Any], baseline: dict[str, typing.Any], threshold: float) -> list[str]:
+  """Print the change of every benchmark relative to *baseline* and return the names of the regressions."""
+  previous = {(entry['name'], entry['size']): entry for entry in baseline['benchmarks']}
+  regressions = []
+
+  print(f'\nCompared to {baseline["version"]} ({baseline["date"]}):')
+
+  for entry in results['benchmarks']:
+    old = previous.get((entry['name'], entry['size']))
+    if old is None:
+      continue
+
+    ratio = entry['median'] / old['median']
+    flag = ''
+    if ratio > 1 + threshold:
+      flag = '  REGRESSION'
+      regressions.append(f'{entry["name"]}[{entry["size"]}]')
+
+    print(f'  {entry["name"]:<24} {entry["size"]:>7}  {ratio:6.2f}x{flag}')
+
+  return regressions
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+  """Run the benchmarks."""
+  parser = argparse.ArgumentParser(prog='python -m benchmarks.run', description='Benchmark python-openhab against an in-process fake openHAB server.')
+  parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='numbers of items in the registry')
+  parser.add_argument('--points', type=int, default=10000, help='number of persisted values paged through')
+  parser.add_argument('--repeat', type=int, default=5, help='measured runs per benchmark')
+  parser.add_argument('--filter', default='', help='only run benchmarks whose name contains this string')
+  parser.add_argument('--output', type=pathlib.Path, help='results file, defaults to benchmarks/results/<version>.json')
+  parser.add_argument('--compare', type=pathlib.Path, help='results file of a previous run to compare with')
+  parser.add_argument('--threshold', type=float, default=0.1, help='relative slowdown reported as regression')
+  args = parser.parse_args(argv)
+
+  # read before the results are written, which may replace the baseline file
+  baseline = json.loads(args.compare.read_text()) if args.compare is not None else None
+
+  results: dict[str, typing.Any] = {
+    'version': version(),
+    'date': datetime.datetime.now(tz=datetime.timezone.utc).isoformat(timespec='seconds'),
+    'python': platform.python_version(),
+    'platform': platform.platform(),
+    'benchmarks': [],
+  }
+
+  print(f'python-openhab {results["version"]}, Python {results["python"]}')
+  print(f'  {"benchmark":<24} {"size":>7}  {"median":>10}  {"best":>10}  {"ops/s":>12}')
+
+  for size in args.sizes:
+    fake = build_registry(size, args.points)
+
+    for name, (function, operations) in benchmarks(size, fake).items():
+      if args.filter not in name:
+        continue
+
+      durations = measure(function, args.repeat)
+      entry = {
+        'name': name,
+        'size': size,
+        'operations': operations,
+        'median': statistics.median(durations),
+        'best': min(durations),
+        'ops_per_second': operations / statistics.median(durations),
+      }
+      results['benchmarks'].append(entry)
+
+      print(f'  {name:<24} {size:>7}  {entry["median"] * 1000:8.2f}ms  {entry["best"] * 1000:8.2f}ms  {entry["ops_per_second"]:12.0f}')
+
+  output = args.output or RESULTS_DIR / f'{results["version"]}.json'
+  output.parent.mkdir(parents=True, exist_ok=True)
+  output.write_text(json.dumps(results, indent=2) + '\n')
+  print(f'\nResults written to {output}')
+
+  if baseline is not None:
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+      print(f'\n{len(regressions)} regression(s): {", ".join(regressions)}')
+      return 1
+
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
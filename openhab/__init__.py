@@ -1,5 +1,6 @@
 """Module entry point."""
 
+from .async_client import AsyncOpenHAB
 from .client import OpenHAB
 
-__all__ = ['OpenHAB']
+__all__ = ['AsyncOpenHAB', 'OpenHAB']
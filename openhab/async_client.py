@@ -0,0 +1,582 @@
+"""python library for accessing the openHAB REST API."""
+
+#
+# Georges Toth (c) 2016-present <georges@trypill.org>
+#
+# python-openhab is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python-openhab is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with python-openhab.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import asyncio
+import collections
+import datetime
+import time
+import types
+import typing
+
+import authlib.integrations.httpx_client
+import httpx
+
+import openhab.exceptions
+import openhab.items
+import openhab.metrics
+import openhab.retry
+import openhab.rules
+import openhab.tracing
+
+from .client import BulkResult, LazyItems, OpenHABBase
+
+__author__ = 'Georges Toth <georges@trypill.org>'
+__license__ = 'AGPLv3+'
+
+
+class AsyncOpenHAB(OpenHABBase):
+  """Asynchronous openHAB REST API client.
+
+  This client mirrors :class:`openhab.OpenHAB`, but all methods doing network I/O are coroutines
+  built on top of `httpx.AsyncClient`. This allows multiplexing many concurrent requests on a
+  single event loop, e.g.:
+
+  ```python
+  async with AsyncOpenHAB('http://localhost:8080/rest') as oh:
+    items = await oh.fetch_all_items()
+    await asyncio.gather(*(item.async_command('OFF') for item in lights))
+  ```
+
+  Items returned by this client must be used through their asynchronous methods
+  (`async_command`, `async_update` and `async_refresh`); their synchronous counterparts raise a `TypeError`.
+  """
+
+  is_async = True
+
+  def __init__(
+    self,
+    base_url: str,
+    username: typing.Optional[str] = None,
+    password: typing.Optional[str] = None,
+    http_auth: typing.Optional[httpx.Auth] = None,
+    timeout: typing.Optional[float] = None,
+    oauth2_config: typing.Optional[dict[str, typing.Any]] = None,
+    identity_map: bool = True,
+    limits: typing.Optional[httpx.Limits] = None,
+    http2: bool = False,
+    pool_timeout: typing.Optional[float] = None,
+    retry: typing.Optional[openhab.retry.RetryPolicy] = None,
+    circuit_breaker: typing.Optional[openhab.retry.CircuitBreaker] = None,
+    metrics: typing.Optional[openhab.metrics.Metrics] = None,
+    tracer: typing.Optional[openhab.tracing.Tracer] = None,
+  ) -> None:
+    """Class constructor.
+
+    See :class:`openhab.OpenHAB` for the format of the optional *oauth2_config* dictionary.
+
+    Args:
+      base_url (str): The openHAB REST URL, e.g. http://example.com/rest
+      username (str, optional): A optional username, used in conjunction with a optional
+                      provided password, in case openHAB requires authentication.
+      password (str, optional): A optional password, used in conjunction with a optional
+                      provided username, in case openHAB requires authentication.
+      http_auth (Auth, optional): An alternative to username/password pair, is to
+                            specify a custom http authentication object of type :class:`httpx.Auth`.
+      timeout (float, optional): An optional timeout for REST transactions
+      oauth2_config: Optional OAuth2 configuration dictionary
+      identity_map: If True (the default), every item is represented by a single `Item` instance.
+      limits: Optional connection pool limits, see :class:`openhab.OpenHAB`.
+      http2: Use HTTP/2, see :class:`openhab.OpenHAB`.
+      pool_timeout: Optional timeout in seconds for waiting for a free connection of the pool.
+      retry: Optional policy for repeating requests failing due to transient errors, see :class:`openhab.OpenHAB`.
+      circuit_breaker: Optional circuit breaker failing requests fast while openHAB is unavailable.
+      metrics: Optional `Metrics` recording the latency, size and status of every request.
+      tracer: Optional tracer recording spans of the operations and the requests they send, see :class:`openhab.OpenHAB`.
+
+    Returns:
+      AsyncOpenHAB: openHAB class instance.
+    """
+    super().__init__(
+      base_url, oauth2_config=oauth2_config, identity_map=identity_map, retry=retry, circuit_breaker=circuit_breaker, metrics=metrics, tracer=tracer
+    )
+
+    session_options = self._session_options(timeout, limits, http2, pool_timeout)
+
+    if self.oauth2_config is not None:
+      self.session = authlib.integrations.httpx_client.AsyncOAuth2Client(
+        client_id=self.oauth2_config.client_id,
+        token=self.oauth2_config.token.model_dump(),
+        update_token=self._async_oauth2_token_updater,
+        **session_options,
+      )
+
+      self.session.metadata['token_endpoint'] = f'{self.url_rest}/auth/token'
+
+      if not self.oauth2_config.token_cache.is_file():
+        self._oauth2_token_updater(self.oauth2_config.token.model_dump())
+
+    else:
+      session_options.setdefault('timeout', timeout)
+      self.session = httpx.AsyncClient(**session_options)
+
+      if http_auth is not None:
+        self.session.auth = http_auth
+      elif not (username is None or password is None):
+        self.session.auth = httpx.BasicAuth(username, password)
+
+    self._rules: typing.Optional[openhab.rules.AsyncRules] = None
+
+  async def __aenter__(self) -> 'AsyncOpenHAB':  # noqa: PYI034
+    """Enter the async context manager."""
+    return self
+
+  async def __aexit__(
+    self,
+    exc_type: typing.Optional[type[BaseException]],
+    exc_value: typing.Optional[BaseException],
+    traceback: typing.Optional[types.TracebackType],
+  ) -> None:
+    """Exit the async context manager and close the underlying HTTP session."""
+    await self.aclose()
+
+  async def aclose(self) -> None:
+    """Close the underlying HTTP session."""
+    await self.session.aclose()
+
+  @property
+  def rules(self) -> openhab.rules.AsyncRules:
+    """Get object for managing rules."""
+    if self._rules is None:
+      self._rules = openhab.rules.AsyncRules(self)
+
+    return self._rules
+
+  async def req_get(self, uri_path: str, params: typing.Optional[typing.Union[dict[str, typing.Any], list, tuple]] = None) -> typing.Any:
+    """Helper method for initiating a HTTP GET request.
+
+    Besides doing the actual request, it also checks the return value and returns the resulting decoded
+    JSON data.
+
+    Args:
+      uri_path (str): The path to be used in the GET request.
+      params: Optional query parameters.
+
+    Returns:
+      dict: Returns a dict containing the data returned by the OpenHAB REST server.
+    """
+    r = await self._request('GET', uri_path, params=params)
+    return self._decode(uri_path, r)
+
+  async def req_post(
+    self,
+    uri_path: str,
+    data: typing.Optional[typing.Union[str, bytes]] = None,
+  ) -> None:
+    """Helper method for initiating a HTTP POST request.
+
+    Args:
+      uri_path (str): The path to be used in the POST request.
+      data (str, optional): A optional payload to be submitted as part of the POST request.
+
+    Returns:
+      None: No data is returned.
+    """
+    await self._request('POST', uri_path, content=data, headers={'Content-Type': 'text/plain'})
+
+  async def req_put(
+    self,
+    uri_path: str,
+    data: typing.Optional[typing.Any] = None,
+    json_data: typing.Optional[dict] = None,
+    headers: typing.Optional[dict] = None,
+    params: typing.Optional[dict[str, typing.Any]] = None,
+  ) -> None:
+    """Helper method for initiating a HTTP PUT request.
+
+    Args:
+      uri_path (str): The path to be used in the PUT request.
+      data (dict, optional): A optional dict with data to be submitted as part of the PUT request.
+      json_data: Data to be submitted as json.
+      headers: Specify optional custom headers.
+      params: Optional dict of query parameters.
+
+    Returns:
+      None: No data is returned.
+    """
+    if headers is None:
+      headers = {'Content-Type': 'text/plain'}
+      content = data
+      data = None
+    else:
+      content = None
+
+    await self._request('PUT', uri_path, content=content, data=data, json=json_data, headers=headers, params=params)
+
+  async def _request(self, method: str, uri_path: str, **kwargs: typing.Any) -> httpx.Response:
+    """Send a request, applying the retry policy and circuit breaker, and check its return value."""
+    attempt = 0
+
+    while True:
+      started, trial = self._before_request()
+
+      try:
+        with self._http_span(method, uri_path) as span:
+          r = await self.session.request(method, self.url_rest + uri_path, **kwargs)
+          if span is not None:
+            span.set_attribute('http.status_code', r.status_code)
+      except httpx.TransportError as exc:
+        delay = self._after_request(method, uri_path, attempt, started, exc.request, None)
+        if delay is None:
+          raise
+      except BaseException:
+        self._abort_request(trial)
+        raise
+      else:
+        delay = self._after_request(method, uri_path, attempt, started, r.request, r)
+        if delay is None:
+          self._check_req_return(r)
+          return r
+
+      await asyncio.sleep(delay)
+      attempt += 1
+
+  @typing.overload
+  async def fetch_all_items(
+    self,
+    lazy: typing.Literal[False] = False,
+    *,
+    fields: None = None,
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> dict[str, openhab.items.Item]: ...
+
+  @typing.overload
+  async def fetch_all_items(
+    self,
+    lazy: typing.Literal[True],
+    *,
+    fields: None = None,
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> LazyItems: ...
+
+  @typing.overload
+  async def fetch_all_items(
+    self,
+    lazy: bool = False,
+    *,
+    fields: typing.Sequence[str],
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> dict[str, openhab.items.PartialItem]: ...
+
+  @openhab.tracing.traced('fetch_all_items')
+  async def fetch_all_items(
+    self,
+    lazy: bool = False,
+    *,
+    fields: typing.Optional[typing.Sequence[str]] = None,
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> typing.Mapping[str, typing.Union[openhab.items.Item, openhab.items.PartialItem]]:
+    """Returns all items defined in openHAB.
+
+    See :meth:`openhab.OpenHAB.fetch_all_items` for a description of the arguments.
+    """
+    params = self._items_params(fields=fields, tags=tags, type_=type_, recursive=recursive, metadata=metadata)
+    res = await self.req_get('/items/', params=params)
+
+    if fields is not None:
+      return {i['name']: openhab.items.PartialItem(i) for i in res}
+
+    return self._items_from_json(res, lazy)
+
+  @typing.overload
+  async def get_items(
+    self,
+    fields: None = None,
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> list[openhab.items.Item]: ...
+
+  @typing.overload
+  async def get_items(
+    self,
+    fields: typing.Sequence[str],
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> list[openhab.items.PartialItem]: ...
+
+  @openhab.tracing.traced('get_items')
+  async def get_items(
+    self,
+    fields: typing.Optional[typing.Sequence[str]] = None,
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> typing.Union[list[openhab.items.Item], list[openhab.items.PartialItem]]:
+    """Returns the items matching the given filters, in the order returned by openHAB.
+
+    See :meth:`openhab.OpenHAB.get_items` for a description of the arguments.
+    """
+    params = self._items_params(fields=fields, tags=tags, type_=type_, recursive=recursive, metadata=metadata)
+    res = await self.req_get('/items/', params=params)
+
+    if fields is not None:
+      return [openhab.items.PartialItem(i) for i in res]
+
+    return self._construct('get_items', len(res), lambda: [self.json_to_item(i) for i in res])
+
+  @openhab.tracing.traced('send_commands')
+  async def send_commands(
+    self,
+    commands: typing.Mapping[typing.Union[str, openhab.items.Item], typing.Any],
+    max_concurrency: int = 16,
+  ) -> dict[str, BulkResult]:
+    """Send commands to many items concurrently.
+
+    See :meth:`openhab.OpenHAB.send_commands`.
+
+    Args:
+      commands: Mapping of items, or item names, to the command to send to them.
+      max_concurrency: Maximum number of requests in flight at the same time.
+
+    Returns:
+      dict: The result of each command, keyed by item name.
+    """
+    return await self._bulk(commands, max_concurrency, lambda item, value: item.async_command(value))
+
+  @openhab.tracing.traced('update_states')
+  async def update_states(
+    self,
+    states: typing.Mapping[typing.Union[str, openhab.items.Item], typing.Any],
+    max_concurrency: int = 16,
+  ) -> dict[str, BulkResult]:
+    """Update the states of many items concurrently.
+
+    See :meth:`openhab.OpenHAB.update_states`.
+
+    Args:
+      states: Mapping of items, or item names, to their new state.
+      max_concurrency: Maximum number of requests in flight at the same time.
+
+    Returns:
+      dict: The result of each update, keyed by item name.
+    """
+    return await self._bulk(states, max_concurrency, lambda item, value: item.async_update(value))
+
+  async def _bulk(
+    self,
+    values: typing.Mapping[typing.Union[str, openhab.items.Item], typing.Any],
+    max_concurrency: int,
+    action: typing.Callable[[openhab.items.Item, typing.Any], typing.Awaitable[None]],
+  ) -> dict[str, BulkResult]:
+    if max_concurrency < 1:
+      raise ValueError('max_concurrency must be at least 1')
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run(key: typing.Union[str, openhab.items.Item], value: typing.Any) -> BulkResult:
+      name = key if isinstance(key, str) else key.name
+      result = BulkResult(name=name, value=value)
+
+      async with semaphore:
+        start = time.perf_counter()
+
+        try:
+          if isinstance(key, str):
+            item = self.identity_map.get(key) if self.identity_map is not None else None
+            if item is None:
+              item = await self.get_item(key)
+          else:
+            item = key
+
+          await action(item, value)
+        except (httpx.HTTPError, openhab.exceptions.OpenHABException, ValueError) as exc:
+          result.error = exc
+
+        result.latency = time.perf_counter() - start
+
+      return result
+
+    results = await asyncio.gather(*(run(key, value) for key, value in values.items()))
+
+    return {result.name: result for result in results}
+
+  @openhab.tracing.traced('get_item')
+  async def get_item(self, name: str) -> openhab.items.Item:
+    """Returns an item with its state and type as fetched from openHAB.
+
+    Args:
+      name (str): The name of the item to fetch from openHAB.
+
+    Returns:
+      Item: A corresponding Item class instance with the state of the requested item.
+    """
+    json_data = await self.get_item_raw(name)
+
+    return self._construct('get_item', 1, lambda: self.json_to_item(json_data))
+
+  async def get_item_raw(self, name: str) -> typing.Any:
+    """Private method for fetching a json configuration of an item.
+
+    Args:
+      name (str): The item name to be fetched.
+
+    Returns:
+      dict: A JSON decoded dict.
+    """
+    return await self.req_get(f'/items/{name}')
+
+  async def logout(self) -> bool:
+    """OAuth2 session logout method.
+
+    Returns:
+      True or False depending on if the logout did succeed.
+    """
+    data = self._logout_data(self.session)
+    url_logout = f'{self.url_rest}/auth/logout'
+
+    res = await self.session.post(url_logout, data=data)
+
+    return res.status_code == 200
+
+  async def _async_oauth2_token_updater(self, token: dict[str, typing.Any], refresh_token: typing.Any = None, access_token: typing.Any = None) -> None:
+    self._oauth2_token_updater(token, refresh_token=refresh_token, access_token=access_token)
+
+  @openhab.tracing.traced('create_or_update_item')
+  async def create_or_update_item(
+    self,
+    name: str,
+    _type: typing.Union[str, type[openhab.items.Item]],
+    quantity_type: typing.Optional[str] = None,
+    label: typing.Optional[str] = None,
+    category: typing.Optional[str] = None,
+    tags: typing.Optional[list[str]] = None,
+    group_names: typing.Optional[list[str]] = None,
+    group_type: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    function_name: typing.Optional[str] = None,
+    function_params: typing.Optional[list[str]] = None,
+  ) -> None:
+    """Creates a new item in openHAB if there is no item with name 'name' yet.
+
+    See :meth:`openhab.OpenHAB.create_or_update_item` for a description of the arguments.
+    """
+    paramdict = self._item_definition(
+      name,
+      _type,
+      quantity_type=quantity_type,
+      label=label,
+      category=category,
+      tags=tags,
+      group_names=group_names,
+      group_type=group_type,
+      function_name=function_name,
+      function_params=function_params,
+    )
+
+    self.logger.debug('About to create item with PUT request:\n%s', str(paramdict))
+
+    await self.req_put(f'/items/{name}', json_data=paramdict, headers={'Content-Type': 'application/json'})
+
+  async def get_item_persistence(
+    self,
+    name: str,
+    service_id: typing.Optional[str] = None,
+    start_time: typing.Optional[datetime.datetime] = None,
+    end_time: typing.Optional[datetime.datetime] = None,
+    page: int = 0,
+    page_length: int = 0,
+    boundary: bool = False,
+    prefetch: int = 0,
+  ) -> typing.AsyncIterator[dict[str, typing.Union[str, int]]]:
+    """Method for fetching persistence data for a given item.
+
+    See :meth:`openhab.OpenHAB.get_item_persistence` for a description of the arguments.
+
+    Returns:
+      Async iterator over dict values containing time and state value, e.g.
+        {"time": 1695588900122,
+         "state": "23"
+        }
+    """
+    if prefetch < 0:
+      raise ValueError('prefetch must not be negative')
+
+    params = self._persistence_params(
+      service_id=service_id,
+      start_time=start_time,
+      end_time=end_time,
+      page=page,
+      page_length=page_length,
+      boundary=boundary,
+    )
+
+    if page_length > 0 and prefetch > 0:
+      async for entry in self._get_item_persistence_prefetched(name, params, prefetch):
+        yield entry
+      return
+
+    res = await self.req_get(f'/persistence/items/{name}', params=params)
+
+    for entry in res['data']:
+      yield entry
+
+    while page_length > 0 and int(res['datapoints']) > 0:
+      params['page'] += 1
+      res = await self.req_get(f'/persistence/items/{name}', params=params)
+
+      for entry in res['data']:
+        yield entry
+
+  async def _get_item_persistence_prefetched(
+    self,
+    name: str,
+    params: dict[str, typing.Any],
+    prefetch: int,
+  ) -> typing.AsyncIterator[dict[str, typing.Union[str, int]]]:
+    """Page through persistence data while keeping the next *prefetch* pages in flight."""
+    pending: collections.deque[asyncio.Future] = collections.deque()
+    next_page = params['page']
+
+    def submit() -> None:
+      nonlocal next_page
+      pending.append(asyncio.ensure_future(self.req_get(f'/persistence/items/{name}', params={**params, 'page': next_page})))
+      next_page += 1
+
+    try:
+      for _ in range(prefetch + 1):
+        submit()
+
+      while pending:
+        res = await pending.popleft()
+
+        for entry in res['data']:
+          yield entry
+
+        if int(res['datapoints']) == 0:
+          break
+
+        submit()
+    finally:
+      for task in pending:
+        task.cancel()
@@ -17,23 +17,626 @@
 # along with python-openhab.  If not, see <http://www.gnu.org/licenses/>.
 #
 
+import abc
+import collections
+import collections.abc
+import concurrent.futures
+import contextlib
+import contextvars
+import dataclasses
 import datetime
 import logging
+import time
 import typing
+import weakref
 
 import authlib.integrations.httpx_client
 import httpx
 
+import openhab.exceptions
 import openhab.items
+import openhab.metrics
+import openhab.persistence
+import openhab.persistence_cache
+import openhab.retry
 import openhab.rules
+import openhab.tracing
 
 from .config import Oauth2Config, Oauth2Token
 
 __author__ = 'Georges Toth <georges@trypill.org>'
 __license__ = 'AGPLv3+'
 
+_T = typing.TypeVar('_T')
 
-class OpenHAB:
+
+@dataclasses.dataclass
+class BulkResult:
+  """Outcome of sending a command or state update to a single item as part of a bulk operation."""
+
+  name: str
+  value: typing.Any
+  error: typing.Optional[Exception] = None
+  latency: float = 0.0  # seconds
+
+  @property
+  def ok(self) -> bool:
+    """True if the request succeeded."""
+    return self.error is None
+
+
+class LazyItems(collections.abc.Mapping):
+  """Read-only mapping of item names to items, which builds each `Item` on first access.
+
+  Only the decoded JSON data is kept until an item is accessed for the first time; at that point the
+  corresponding `Item` instance is created (and its state parsed) and the raw data is released.
+  """
+
+  def __init__(self, openhab_conn: 'OpenHABBase', json_data: typing.Iterable[dict[str, typing.Any]]) -> None:
+    """Constructor.
+
+    Args:
+      openhab_conn: openHAB object used for building the items.
+      json_data: The JSON decoded item list as returned by the openHAB server.
+    """
+    self.openhab = openhab_conn
+    self._raw: dict[str, dict[str, typing.Any]] = {}
+    self._items: dict[str, openhab.items.Item] = {}
+
+    for i in json_data:
+      self._raw.setdefault(i['name'], i)
+
+    self._names = tuple(self._raw)
+
+  def __getitem__(self, name: str) -> openhab.items.Item:
+    """Return the item with the given name, building it if not done yet."""
+    item = self._items.get(name)
+
+    if item is None:
+      item = self.openhab.json_to_item(self._raw.pop(name))
+      self._items[name] = item
+
+    return item
+
+  def __iter__(self) -> typing.Iterator[str]:
+    """Iterate over the item names."""
+    return iter(self._names)
+
+  def __len__(self) -> int:
+    """Return the number of items."""
+    return len(self._names)
+
+  def __contains__(self, name: object) -> bool:
+    """Check if an item exists, without building it."""
+    return name in self._items or name in self._raw
+
+  @property
+  def materialized(self) -> int:
+    """The number of items built so far."""
+    return len(self._items)
+
+
+# the connection pool limits httpx uses by default
+DEFAULT_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20, keepalive_expiry=5.0)
+
+
+class OpenHABBase(abc.ABC):
+  """Functionality shared by the synchronous and the asynchronous openHAB REST API client.
+
+  Everything not involving network I/O lives here, i.e. converting JSON data into item
+  instances and building the payloads and parameters for the REST endpoints.
+  """
+
+  session: typing.Any
+  limits: httpx.Limits
+
+  # whether the methods doing network I/O are coroutines, in which case items must be used through their async methods
+  is_async = False
+
+  def __init__(
+    self,
+    base_url: str,
+    oauth2_config: typing.Optional[dict[str, typing.Any]] = None,
+    state_ttl: float = 0,
+    identity_map: bool = True,
+    retry: typing.Optional[openhab.retry.RetryPolicy] = None,
+    circuit_breaker: typing.Optional[openhab.retry.CircuitBreaker] = None,
+    metrics: typing.Optional[openhab.metrics.Metrics] = None,
+    tracer: typing.Optional[openhab.tracing.Tracer] = None,
+  ) -> None:
+    """Class constructor.
+
+    Args:
+      base_url (str): The openHAB REST URL, e.g. http://example.com/rest
+      oauth2_config: Optional OAuth2 configuration dictionary
+      state_ttl: Default number of seconds an item state is served from memory when reading `Item.state`.
+      identity_map: Whether to keep a single `Item` instance per item name (see `json_to_item`).
+      retry: Optional policy for repeating requests failing due to transient errors.
+      circuit_breaker: Optional circuit breaker failing requests fast while openHAB is unavailable.
+      metrics: Optional `Metrics` recording the latency, size and status of every request.
+      tracer: Optional tracer recording spans of the operations and the requests they send.
+    """
+    if state_ttl < 0:
+      raise ValueError('state_ttl must not be negative')
+
+    self.url_rest = base_url
+    self.url_base = base_url.rsplit('/', 1)[0]
+
+    self.state_ttl = state_ttl
+    self.state_cache_hits = 0
+    self.state_cache_misses = 0
+
+    # canonical item instances by name; entries vanish once an item is no longer referenced anywhere else
+    self.identity_map: typing.Optional[weakref.WeakValueDictionary[str, openhab.items.Item]] = weakref.WeakValueDictionary() if identity_map else None
+
+    self.oauth2_config: typing.Optional[Oauth2Config] = None
+
+    if oauth2_config is not None:
+      self.oauth2_config = Oauth2Config(**oauth2_config)
+
+    self.retry = retry
+    self.circuit_breaker = circuit_breaker
+    self.metrics = metrics
+    self.tracer = tracer
+
+    self.logger = logging.getLogger(__name__)
+
+  @abc.abstractmethod
+  def req_get(self, uri_path: str, params: typing.Optional[typing.Union[dict[str, typing.Any], list, tuple]] = None) -> typing.Any:
+    """Helper method for initiating a HTTP GET request."""
+
+  @abc.abstractmethod
+  def req_post(self, uri_path: str, data: typing.Any = None) -> typing.Any:
+    """Helper method for initiating a HTTP POST request."""
+
+  @abc.abstractmethod
+  def req_put(
+    self,
+    uri_path: str,
+    data: typing.Optional[typing.Any] = None,
+    json_data: typing.Optional[dict] = None,
+    headers: typing.Optional[dict] = None,
+    params: typing.Optional[dict[str, typing.Any]] = None,
+  ) -> typing.Any:
+    """Helper method for initiating a HTTP PUT request."""
+
+  @abc.abstractmethod
+  def get_item_raw(self, name: str) -> typing.Any:
+    """Method for fetching a json configuration of an item."""
+
+  @abc.abstractmethod
+  def get_item_persistence(
+    self,
+    name: str,
+    service_id: typing.Optional[str] = None,
+    start_time: typing.Optional[datetime.datetime] = None,
+    end_time: typing.Optional[datetime.datetime] = None,
+    page: int = 0,
+    page_length: int = 0,
+    boundary: bool = False,
+    prefetch: int = 0,
+  ) -> typing.Any:
+    """Method for fetching persistence data for a given item."""
+
+  def _session_options(
+    self,
+    timeout: typing.Optional[float],
+    limits: typing.Optional[httpx.Limits],
+    http2: bool,
+    pool_timeout: typing.Optional[float],
+  ) -> dict[str, typing.Any]:
+    """Build the connection related keyword arguments for creating the httpx session."""
+    self.limits = limits or DEFAULT_LIMITS
+    options: dict[str, typing.Any] = {'limits': self.limits, 'http2': http2}
+
+    if pool_timeout is not None:
+      options['timeout'] = httpx.Timeout(timeout, pool=pool_timeout)
+    elif timeout is not None:
+      options['timeout'] = timeout
+
+    return options
+
+  def pool_stats(self) -> dict[str, typing.Any]:
+    """Return statistics of the HTTP connection pool of the session, e.g. for monitoring.
+
+    Returns:
+      dict: The number of open ``connections``, of ``active`` ones (serving a request), of ``idle`` ones
+            (kept alive for reuse) and of ``http2`` ones, together with the configured ``max_connections``,
+            ``max_keepalive_connections`` and ``keepalive_expiry``. The connection counts are 0 if the
+            session does not use httpx' own transport.
+    """
+    # httpx does not expose the state of its connection pool, so httpcore's pool is inspected directly
+    pool = getattr(getattr(self.session, '_transport', None), '_pool', None)
+    connections = list(getattr(pool, 'connections', []))
+    idle = sum(1 for connection in connections if connection.is_idle())
+
+    return {
+      'connections': len(connections),
+      'active': len(connections) - idle,
+      'idle': idle,
+      'http2': sum(1 for connection in connections if connection.info().startswith('HTTP/2')),
+      'max_connections': self.limits.max_connections,
+      'max_keepalive_connections': self.limits.max_keepalive_connections,
+      'keepalive_expiry': self.limits.keepalive_expiry,
+    }
+
+  def _before_request(self) -> tuple[float, bool]:
+    """Fail fast if the circuit breaker is open.
+
+    Returns:
+      The start time of the request and whether it is the trial request of a half-open circuit breaker.
+    """
+    trial = self.circuit_breaker.before_request() if self.circuit_breaker is not None else False
+
+    return time.perf_counter(), trial
+
+  def _abort_request(self, trial: bool) -> None:
+    """Free the circuit breaker's trial slot if the trial request failed without an outcome, e.g. was cancelled."""
+    if trial and self.circuit_breaker is not None:
+      self.circuit_breaker.release()
+
+  def _after_request(
+    self,
+    method: str,
+    uri_path: str,
+    attempt: int,
+    started: float,
+    request: httpx.Request,
+    response: typing.Optional[httpx.Response],
+  ) -> typing.Optional[float]:
+    """Record the outcome of a request attempt and decide whether to repeat it.
+
+    Args:
+      method: The HTTP method of the request.
+      uri_path: The path of the request.
+      attempt: The number of the attempt, starting at 0.
+      started: The start time of the attempt as returned by `_before_request`.
+      request: The request sent.
+      response: The response, or None if the request failed with a connection error or timeout.
+
+    Returns:
+      The seconds to wait before repeating the request, or None if the outcome is final.
+    """
+    if self.metrics is not None:
+      self.metrics.record_request(
+        method,
+        uri_path,
+        time.perf_counter() - started,
+        response.status_code if response is not None else None,
+        len(request.content),
+        len(response.content) if response is not None else 0,
+      )
+
+    if self.circuit_breaker is not None:
+      self.circuit_breaker.record(response is not None and response.status_code < 500)
+
+    if self.retry is None or not self.retry.should_retry(method, attempt, response):
+      return None
+
+    delay = self.retry.delay(attempt, response)
+    self.logger.warning(
+      'Request %s %s failed (%s), retrying in %.2f seconds', method, uri_path, response.status_code if response is not None else 'connection error', delay
+    )
+
+    return delay
+
+  def _http_span(self, method: str, uri_path: str) -> typing.ContextManager[typing.Optional[openhab.tracing.SpanLike]]:
+    """Return a context manager recording a request as a span, if a tracer is configured."""
+    if self.tracer is None:
+      return contextlib.nullcontext()
+
+    return self.tracer.start_as_current_span(
+      f'HTTP {method}',
+      {'http.method': method, 'http.route': openhab.metrics.endpoint_template(uri_path), 'url.path': uri_path},
+    )
+
+  def _decode(self, uri_path: str, response: httpx.Response) -> typing.Any:
+    """Decode the JSON data of a response to a GET request, recording the time spent if metrics are enabled."""
+    if self.metrics is None:
+      return response.json()
+
+    started = time.perf_counter()
+    data = response.json()
+    self.metrics.record_timing('decode', f'GET {openhab.metrics.endpoint_template(uri_path)}', time.perf_counter() - started)
+
+    return data
+
+  def _construct(self, operation: str, count: int, build: typing.Callable[[], _T]) -> _T:
+    """Build items from JSON data, recording the time spent under *operation* if metrics are enabled."""
+    if self.metrics is None:
+      return build()
+
+    started = time.perf_counter()
+    result = build()
+    self.metrics.record_timing('construct', operation, time.perf_counter() - started, count)
+
+    return result
+
+  @staticmethod
+  def _check_req_return(req: httpx.Response) -> None:
+    """Internal method for checking the return value of a REST HTTP request.
+
+    Args:
+      req (requests.Response): A requests Response object.
+
+    Returns:
+      None: Returns None if no error occurred; else raises an exception.
+
+    Raises:
+      ValueError: Raises a ValueError exception in case of a non-successful
+                  REST request.
+    """
+    if not 200 <= req.status_code < 300:
+      req.raise_for_status()
+
+  def json_to_item(self, json_data: dict) -> openhab.items.Item:
+    """This method takes as argument the RAW (JSON decoded) response for an openHAB item.
+
+    It checks of what type the item is and returns a class instance of the
+    specific item filled with the item's state.
+
+    If the identity map is enabled and an instance of the same type already exists for this item
+    name, that instance is updated in place and returned instead of creating a new one. This also
+    applies to group members, so an item is represented by the same instance everywhere.
+
+    Args:
+      json_data (dict): The JSON decoded data as returned by the openHAB server.
+
+    Returns:
+      Item: A corresponding Item class instance with the state of the item.
+    """
+    item_class = self.item_class_for(json_data)
+
+    if self.identity_map is None:
+      return item_class(self, json_data)
+
+    item = self.identity_map.get(json_data['name'])
+
+    if item is not None and type(item) is item_class:
+      item.init_from_json(json_data)
+      return item
+
+    item = item_class(self, json_data)
+    self.identity_map[item.name] = item
+
+    return item
+
+  @staticmethod
+  def item_class_for(json_data: dict) -> type[openhab.items.Item]:  # noqa: PLR0911
+    """Return the `Item` class matching the type of the RAW (JSON decoded) response for an openHAB item.
+
+    Args:
+      json_data (dict): The JSON decoded data as returned by the openHAB server.
+
+    Returns:
+      The specific Item class for the item's type.
+    """
+    _type = json_data['type']
+
+    if _type == 'Group' and 'groupType' in json_data:
+      _type = json_data['groupType']
+
+    if _type == 'Group' and 'groupType' not in json_data:
+      return openhab.items.GroupItem
+
+    if _type == 'String':
+      return openhab.items.StringItem
+
+    if _type == 'Switch':
+      return openhab.items.SwitchItem
+
+    if _type == 'DateTime':
+      return openhab.items.DateTimeItem
+
+    if _type == 'Contact':
+      return openhab.items.ContactItem
+
+    if _type.startswith('Number'):
+      return openhab.items.NumberItem
+
+    if _type == 'Dimmer':
+      return openhab.items.DimmerItem
+
+    if _type == 'Color':
+      return openhab.items.ColorItem
+
+    if _type == 'Rollershutter':
+      return openhab.items.RollershutterItem
+
+    if _type == 'Player':
+      return openhab.items.PlayerItem
+
+    if _type == 'Location':
+      return openhab.items.LocationItem
+
+    return openhab.items.Item
+
+  @staticmethod
+  def _items_params(
+    fields: typing.Optional[typing.Sequence[str]] = None,
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> dict[str, str]:
+    """Build the query parameters for the ``GET /items`` endpoint.
+
+    See :meth:`OpenHAB.get_items` for a description of the arguments.
+    """
+    params: dict[str, str] = {}
+
+    if fields is not None:
+      # the name is required for keying the results
+      params['fields'] = ','.join(['name', *(field for field in fields if field != 'name')])
+
+    if tags is not None:
+      params['tags'] = ','.join(tags)
+
+    if type_ is not None:
+      if isinstance(type_, type):
+        if not issubclass(type_, openhab.items.Item):
+          raise ValueError(f'type_ parameter must be a valid subclass of type *Item* or a string name of such a class; given value is "{str(type_)}"')
+        params['type'] = type_.TYPENAME
+      else:
+        params['type'] = type_
+
+    if recursive is not None:
+      params['recursive'] = str(recursive).lower()
+
+    if metadata is not None:
+      params['metadata'] = metadata
+
+    return params
+
+  def _items_from_json(self, json_data: list[dict[str, typing.Any]], lazy: bool) -> typing.Mapping[str, openhab.items.Item]:
+    """Convert the JSON decoded item list as returned by the openHAB server into a mapping of item names to items."""
+    if lazy:
+      return LazyItems(self, json_data)
+
+    def build() -> dict[str, openhab.items.Item]:
+      items: dict[str, openhab.items.Item] = {}
+
+      for i in json_data:
+        if i['name'] not in items:
+          items[i['name']] = self.json_to_item(i)
+
+      return items
+
+    return self._construct('fetch_all_items', len(json_data), build)
+
+  def _oauth2_token_updater(self, token: dict[str, typing.Any], refresh_token: typing.Any = None, access_token: typing.Any = None) -> None:
+    if self.oauth2_config is None:
+      raise ValueError('OAuth2 configuration is not set; invalid action!')
+
+    self.oauth2_config.token = Oauth2Token(**token)
+
+    with self.oauth2_config.token_cache.open('w', encoding='utf-8') as fhdl:
+      fhdl.write(self.oauth2_config.token.model_dump_json())
+
+  def _logout_data(self, session: typing.Any) -> dict[str, str]:
+    """Build the form data for an OAuth2 logout request.
+
+    Raises:
+      ValueError: If the given session is not an OAuth2 session.
+    """
+    if self.oauth2_config is None or not isinstance(
+      session,
+      (authlib.integrations.httpx_client.OAuth2Client, authlib.integrations.httpx_client.AsyncOAuth2Client),
+    ):
+      raise ValueError('You are trying to logout from a non-OAuth2 session. This is not supported!')
+
+    return {
+      'refresh_token': self.oauth2_config.token.refresh_token,
+      'id': self.oauth2_config.client_id,
+    }
+
+  @staticmethod
+  def _item_definition(
+    name: str,
+    _type: typing.Union[str, type[openhab.items.Item]],
+    quantity_type: typing.Optional[str] = None,
+    label: typing.Optional[str] = None,
+    category: typing.Optional[str] = None,
+    tags: typing.Optional[list[str]] = None,
+    group_names: typing.Optional[list[str]] = None,
+    group_type: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    function_name: typing.Optional[str] = None,
+    function_params: typing.Optional[list[str]] = None,
+  ) -> dict[str, typing.Union[str, list[str], dict[str, typing.Union[str, list[str]]]]]:
+    """Build and validate the item definition as expected by the ``PUT /items/{name}`` endpoint.
+
+    See :meth:`OpenHAB.create_or_update_item` for a description of the arguments.
+    """
+    paramdict: dict[str, typing.Union[str, list[str], dict[str, typing.Union[str, list[str]]]]] = {}
+
+    if isinstance(_type, type):
+      if issubclass(_type, openhab.items.Item):
+        itemtypename = _type.TYPENAME
+      else:
+        raise ValueError(f'_type parameter must be a valid subclass of type *Item* or a string name of such a class; given value is "{str(_type)}"')
+    else:
+      itemtypename = _type
+
+    if quantity_type is None:
+      paramdict['type'] = itemtypename
+    else:
+      paramdict['type'] = f'{itemtypename}:{quantity_type}'
+
+    paramdict['name'] = name
+
+    if label is not None:
+      paramdict['label'] = label
+
+    if category is not None:
+      paramdict['category'] = category
+
+    if tags is not None:
+      paramdict['tags'] = tags
+
+    if group_names is not None:
+      paramdict['groupNames'] = group_names
+
+    if group_type is not None:
+      if isinstance(group_type, type):
+        if issubclass(group_type, openhab.items.Item):
+          paramdict['groupType'] = group_type.TYPENAME
+        else:
+          raise ValueError(f'group_type parameter must be a valid subclass of type *Item* or a string name of such a class; given value is "{str(group_type)}"')
+      else:
+        paramdict['groupType'] = group_type
+
+    if function_name is not None:
+      if function_name not in ('EQUALITY', 'AND', 'OR', 'NAND', 'NOR', 'AVG', 'SUM', 'MAX', 'MIN', 'COUNT', 'LATEST', 'EARLIEST'):
+        raise ValueError(f'Invalid function name "{function_name}')
+
+      if function_name in ('AND', 'OR', 'NAND', 'NOR') and (not function_params or len(function_params) != 2):
+        raise ValueError(f'Group function "{function_name}" requires two arguments')
+
+      if function_name == 'COUNT' and (not function_params or len(function_params) != 1):
+        raise ValueError(f'Group function "{function_name}" requires one arguments')
+
+      if function_params:
+        paramdict['function'] = {'name': function_name, 'params': function_params}
+      else:
+        paramdict['function'] = {'name': function_name}
+
+    return paramdict
+
+  @staticmethod
+  def _persistence_params(
+    service_id: typing.Optional[str] = None,
+    start_time: typing.Optional[datetime.datetime] = None,
+    end_time: typing.Optional[datetime.datetime] = None,
+    page: int = 0,
+    page_length: int = 0,
+    boundary: bool = False,
+  ) -> dict[str, typing.Any]:
+    """Build the query parameters for the ``GET /persistence/items/{name}`` endpoint.
+
+    See :meth:`OpenHAB.get_item_persistence` for a description of the arguments.
+    """
+    params: dict[str, typing.Any] = {
+      'boundary': str(boundary).lower(),
+      'page': page,
+      'pagelength': page_length,
+    }
+
+    if service_id is not None:
+      params['serviceId'] = service_id
+
+    if start_time is not None:
+      params['starttime'] = start_time.isoformat()
+
+    if end_time is not None:
+      params['endtime'] = end_time.isoformat()
+
+    if start_time is not None and start_time == end_time:
+      raise ValueError('start_time must differ from end_time')
+
+    return params
+
+
+class OpenHAB(OpenHABBase):
   """openHAB REST API client."""
 
   def __init__(
@@ -44,6 +647,17 @@ class OpenHAB:
     http_auth: typing.Optional[httpx.Auth] = None,
     timeout: typing.Optional[float] = None,
     oauth2_config: typing.Optional[dict[str, typing.Any]] = None,
+    state_ttl: float = 0,
+    identity_map: bool = True,
+    persistence_cache: typing.Optional[openhab.persistence_cache.PersistenceCache] = None,
+    persistence_memory_cache: typing.Optional[openhab.persistence_cache.LRUPersistenceCache] = None,
+    limits: typing.Optional[httpx.Limits] = None,
+    http2: bool = False,
+    pool_timeout: typing.Optional[float] = None,
+    retry: typing.Optional[openhab.retry.RetryPolicy] = None,
+    circuit_breaker: typing.Optional[openhab.retry.CircuitBreaker] = None,
+    metrics: typing.Optional[openhab.metrics.Metrics] = None,
+    tracer: typing.Optional[openhab.tracing.Tracer] = None,
   ) -> None:
     """Class constructor.
 
@@ -76,22 +690,64 @@ class OpenHAB:
                             specify a custom http authentication object of type :class:`requests.Auth`.
       timeout (float, optional): An optional timeout for REST transactions
       oauth2_config: Optional OAuth2 configuration dictionary
+      state_ttl: Staleness policy for reading `Item.state`, which can be overridden per item by setting
+                 `Item.state_ttl`. A value of 0 (the default) fetches the state from openHAB on every read,
+                 a positive value serves a state received less than *state_ttl* seconds ago from memory and
+                 `math.inf` never refreshes automatically (use `Item.refresh()`). Hits and misses are counted
+                 in `state_cache_hits` and `state_cache_misses`.
+      identity_map: If True (the default), every item is represented by a single `Item` instance, which is
+                    shared between top-level results and group members and updated in place whenever the
+                    item is fetched again.
+      persistence_cache: Optional local cache for persistence data, e.g. a `SQLitePersistenceCache`. If set,
+                         `get_item_persistence` (and thus `Item.persistence`) only fetches the time ranges not
+                         yet cached and serves the rest locally; see `Persistence.get_cached`.
+      persistence_memory_cache: Optional in-memory cache of persistence query results, e.g. a
+                                `LRUPersistenceCache`, which serves repeated queries of an explicit time range,
+                                or of a range within one, without any request; see
+                                `Persistence.get_memory_cached`. It is consulted before *persistence_cache*.
+      limits: Optional connection pool limits, e.g. ``httpx.Limits(max_connections=50, max_keepalive_connections=50,
+              keepalive_expiry=60)``; sizing the pool for the expected concurrency and keeping connections alive
+              longer avoids reconnecting under load. Defaults to httpx' limits (`DEFAULT_LIMITS`).
+      http2: Use HTTP/2, which multiplexes concurrent requests over a single connection; this requires the h2
+             package (``pip install python-openhab[http2]``) and openHAB being served over https.
+      pool_timeout: Optional timeout in seconds for waiting for a free connection of the pool, which otherwise
+                    defaults to *timeout*.
+      retry: Optional `RetryPolicy` for repeating requests which failed due to connection errors, timeouts or
+             responses like 503, e.g. while openHAB restarts. By default only GET and PUT requests (reading
+             items and updating states) are repeated; POST requests (commands) only if added to the policy.
+      circuit_breaker: Optional `CircuitBreaker` which fails requests fast with `CircuitOpenException` after
+                       repeated failures, instead of every request waiting for its timeout.
+      metrics: Optional `Metrics` recording per endpoint the latency, bytes and status codes of all requests,
+               and the time spent decoding responses and building items.
+      tracer: Optional tracer recording a span for every operation (e.g. `get_item`, `Item.command`) with child
+              spans for the requests it sent, e.g. an OpenTelemetry tracer or a `RecordingTracer`; see
+              `openhab.tracing`.
 
     Returns:
       OpenHAB: openHAB class instance.
     """
-    self.url_rest = base_url
-    self.url_base = base_url.rsplit('/', 1)[0]
-
-    self.oauth2_config: typing.Optional[Oauth2Config] = None
-
-    if oauth2_config is not None:
-      self.oauth2_config = Oauth2Config(**oauth2_config)
-
+    super().__init__(
+      base_url,
+      oauth2_config=oauth2_config,
+      state_ttl=state_ttl,
+      identity_map=identity_map,
+      retry=retry,
+      circuit_breaker=circuit_breaker,
+      metrics=metrics,
+      tracer=tracer,
+    )
+
+    self.persistence_cache = persistence_cache
+    self.persistence_memory_cache = persistence_memory_cache
+
+    session_options = self._session_options(timeout, limits, http2, pool_timeout)
+
+    if self.oauth2_config is not None:
       self.session = authlib.integrations.httpx_client.OAuth2Client(
         client_id=self.oauth2_config.client_id,
         token=self.oauth2_config.token.model_dump(),
         update_token=self._oauth2_token_updater,
+        **session_options,
       )
 
       self.session.metadata['token_endpoint'] = f'{self.url_rest}/auth/token'
@@ -100,16 +756,16 @@ class OpenHAB:
         self._oauth2_token_updater(self.oauth2_config.token.model_dump())
 
     else:
-      self.session = httpx.Client(timeout=timeout)
+      session_options.setdefault('timeout', timeout)
+      self.session = httpx.Client(**session_options)
 
       if http_auth is not None:
         self.session.auth = http_auth
       elif not (username is None or password is None):
         self.session.auth = httpx.BasicAuth(username, password)
 
-    self.logger = logging.getLogger(__name__)
-
     self._rules: typing.Optional[openhab.rules.Rules] = None
+    self._persistence: typing.Optional[openhab.persistence.Persistence] = None
 
   @property
   def rules(self) -> openhab.rules.Rules:
@@ -119,22 +775,13 @@ class OpenHAB:
 
     return self._rules
 
-  @staticmethod
-  def _check_req_return(req: httpx.Response) -> None:
-    """Internal method for checking the return value of a REST HTTP request.
-
-    Args:
-      req (requests.Response): A requests Response object.
-
-    Returns:
-      None: Returns None if no error occurred; else raises an exception.
+  @property
+  def persistence(self) -> openhab.persistence.Persistence:
+    """Get object for accessing persistence data."""
+    if self._persistence is None:
+      self._persistence = openhab.persistence.Persistence(self)
 
-    Raises:
-      ValueError: Raises a ValueError exception in case of a non-successful
-                  REST request.
-    """
-    if not 200 <= req.status_code < 300:
-      req.raise_for_status()
+    return self._persistence
 
   def req_get(self, uri_path: str, params: typing.Optional[typing.Union[dict[str, typing.Any], list, tuple]] = None) -> typing.Any:
     """Helper method for initiating a HTTP GET request.
@@ -144,13 +791,13 @@ class OpenHAB:
 
     Args:
       uri_path (str): The path to be used in the GET request.
+      params: Optional query parameters.
 
     Returns:
       dict: Returns a dict containing the data returned by the OpenHAB REST server.
     """
-    r = self.session.get(f'{self.url_rest}{uri_path}', params=params)
-    self._check_req_return(r)
-    return r.json()
+    r = self._request('GET', uri_path, params=params)
+    return self._decode(uri_path, r)
 
   def req_post(
     self,
@@ -169,18 +816,16 @@ class OpenHAB:
     Returns:
       None: No data is returned.
     """
-    headers = self.session.headers
-    headers['Content-Type'] = 'text/plain'
-
-    r = self.session.post(self.url_rest + uri_path, content=data, headers=headers)
-    self._check_req_return(r)
+    # pass the content type per request; modifying the session headers would leak into concurrent requests
+    self._request('POST', uri_path, content=data, headers={'Content-Type': 'text/plain'})
 
   def req_put(
     self,
     uri_path: str,
-    data: typing.Optional[dict] = None,
+    data: typing.Optional[typing.Any] = None,
     json_data: typing.Optional[dict] = None,
     headers: typing.Optional[dict] = None,
+    params: typing.Optional[dict[str, typing.Any]] = None,
   ) -> None:
     """Helper method for initiating a HTTP PUT request.
 
@@ -192,6 +837,7 @@ class OpenHAB:
       data (dict, optional): A optional dict with data to be submitted as part of the PUT request.
       json_data: Data to be submitted as json.
       headers: Specify optional custom headers.
+      params: Optional dict of query parameters.
 
     Returns:
       None: No data is returned.
@@ -203,89 +849,294 @@ class OpenHAB:
     else:
       content = None
 
-    r = self.session.put(self.url_rest + uri_path, content=content, data=data, json=json_data, headers=headers)
-    self._check_req_return(r)
+    self._request('PUT', uri_path, content=content, data=data, json=json_data, headers=headers, params=params)
+
+  def _request(self, method: str, uri_path: str, **kwargs: typing.Any) -> httpx.Response:
+    """Send a request, applying the retry policy and circuit breaker, and check its return value."""
+    attempt = 0
+
+    while True:
+      started, trial = self._before_request()
+
+      try:
+        with self._http_span(method, uri_path) as span:
+          r = self.session.request(method, self.url_rest + uri_path, **kwargs)
+          if span is not None:
+            span.set_attribute('http.status_code', r.status_code)
+      except httpx.TransportError as exc:
+        delay = self._after_request(method, uri_path, attempt, started, exc.request, None)
+        if delay is None:
+          raise
+      except BaseException:
+        self._abort_request(trial)
+        raise
+      else:
+        delay = self._after_request(method, uri_path, attempt, started, r.request, r)
+        if delay is None:
+          self._check_req_return(r)
+          return r
+
+      time.sleep(delay)
+      attempt += 1
 
   # fetch all items
-  def fetch_all_items(self) -> dict[str, openhab.items.Item]:
+  @typing.overload
+  def fetch_all_items(
+    self,
+    lazy: typing.Literal[False] = False,
+    *,
+    fields: None = None,
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> dict[str, openhab.items.Item]: ...
+
+  @typing.overload
+  def fetch_all_items(
+    self,
+    lazy: typing.Literal[True],
+    *,
+    fields: None = None,
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> LazyItems: ...
+
+  @typing.overload
+  def fetch_all_items(
+    self,
+    lazy: bool = False,
+    *,
+    fields: typing.Sequence[str],
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> dict[str, openhab.items.PartialItem]: ...
+
+  @openhab.tracing.traced('fetch_all_items')
+  def fetch_all_items(
+    self,
+    lazy: bool = False,
+    *,
+    fields: typing.Optional[typing.Sequence[str]] = None,
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> typing.Mapping[str, typing.Union[openhab.items.Item, openhab.items.PartialItem]]:
     """Returns all items defined in openHAB.
 
+    Args:
+      lazy: If True, return a `LazyItems` mapping which only builds an item the first time it is
+            accessed, instead of building all items (and group members) right away.
+      fields: See `get_items`.
+      tags: See `get_items`.
+      type_: See `get_items`.
+      recursive: See `get_items`.
+      metadata: See `get_items`.
+
     Returns:
-      dict: Returns a dict with item names as key and item class instances as value.
+      dict: Returns a dict with item names as key and item class instances as value, or `PartialItem`
+            instances if *fields* is specified.
     """
-    items = {}  # type: dict
-    res = self.req_get('/items/')
+    params = self._items_params(fields=fields, tags=tags, type_=type_, recursive=recursive, metadata=metadata)
+    res = self.req_get('/items/', params=params)
 
-    for i in res:
-      if i['name'] not in items:
-        items[i['name']] = self.json_to_item(i)
+    if fields is not None:
+      return {i['name']: openhab.items.PartialItem(i) for i in res}
 
-    return items
+    return self._items_from_json(res, lazy)
 
-  def get_item(self, name: str) -> openhab.items.Item:
-    """Returns an item with its state and type as fetched from openHAB.
+  @typing.overload
+  def get_items(
+    self,
+    fields: None = None,
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> list[openhab.items.Item]: ...
+
+  @typing.overload
+  def get_items(
+    self,
+    fields: typing.Sequence[str],
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> list[openhab.items.PartialItem]: ...
+
+  @openhab.tracing.traced('get_items')
+  def get_items(
+    self,
+    fields: typing.Optional[typing.Sequence[str]] = None,
+    tags: typing.Optional[typing.Sequence[str]] = None,
+    type_: typing.Optional[typing.Union[str, type[openhab.items.Item]]] = None,
+    recursive: typing.Optional[bool] = None,
+    metadata: typing.Optional[str] = None,
+  ) -> typing.Union[list[openhab.items.Item], list[openhab.items.PartialItem]]:
+    """Returns the items matching the given filters, in the order returned by openHAB.
+
+    Filtering and field selection is done by openHAB, which reduces the amount of data transferred,
+    e.g. `get_items(fields=['state'], type_='Number')` only fetches the name and state of number items.
 
     Args:
-      name (str): The name of the item to fetch from openHAB.
+      fields: Restrict the returned data to these fields (e.g. `['name', 'state']`). The name is always
+              included. If given, lightweight `PartialItem` instances are returned instead of `Item` instances.
+      tags: Only return items having one of these tags.
+      type_: Only return items of this type, e.g. 'Switch' or `SwitchItem`.
+      recursive: Whether to include group members recursively; the openHAB default is used if not specified.
+      metadata: Regular expression selecting the metadata namespaces to include, e.g. 'semantics'.
 
     Returns:
-      Item: A corresponding Item class instance with the state of the requested item.
+      list: A list of `Item` instances, or `PartialItem` instances if *fields* is specified.
     """
-    json_data = self.get_item_raw(name)
+    params = self._items_params(fields=fields, tags=tags, type_=type_, recursive=recursive, metadata=metadata)
+    res = self.req_get('/items/', params=params)
 
-    return self.json_to_item(json_data)
+    if fields is not None:
+      return [openhab.items.PartialItem(i) for i in res]
 
-  def json_to_item(self, json_data: dict) -> openhab.items.Item:  # noqa: PLR0911
-    """This method takes as argument the RAW (JSON decoded) response for an openHAB item.
+    return self._construct('get_items', len(res), lambda: [self.json_to_item(i) for i in res])
 
-    It checks of what type the item is and returns a class instance of the
-    specific item filled with the item's state.
+  @openhab.tracing.traced('send_commands')
+  def send_commands(
+    self,
+    commands: typing.Mapping[typing.Union[str, openhab.items.Item], typing.Any],
+    max_workers: int = 16,
+  ) -> dict[str, BulkResult]:
+    """Send commands to many items concurrently.
+
+    Each command is validated and formatted by the item, exactly as `Item.command` does, and the requests
+    are sent in parallel by up to *max_workers* threads. Applying a scene therefore takes roughly the
+    time of one round trip per *max_workers* items instead of one round trip per item.
 
     Args:
-      json_data (dict): The JSON decoded data as returned by the openHAB server.
+      commands: Mapping of items, or item names, to the command to send to them. Names are resolved
+                through the identity map; unknown names cost an additional request for fetching the item.
+      max_workers: Maximum number of requests in flight at the same time.
 
     Returns:
-      Item: A corresponding Item class instance with the state of the item.
+      dict: The result of each command, keyed by item name. Failures, including invalid values, are
+            reported in the result instead of being raised.
     """
-    _type = json_data['type']
+    return self._bulk(commands, max_workers, lambda item, value: item.command(value))
 
-    if _type == 'Group' and 'groupType' in json_data:
-      _type = json_data['groupType']
+  @openhab.tracing.traced('update_states')
+  def update_states(
+    self,
+    states: typing.Mapping[typing.Union[str, openhab.items.Item], typing.Any],
+    max_workers: int = 16,
+  ) -> dict[str, BulkResult]:
+    """Update the states of many items concurrently.
 
-    if _type == 'Group' and 'groupType' not in json_data:
-      return openhab.items.GroupItem(self, json_data)
+    See `send_commands`; the only difference is that state updates (see `Item.update`) are sent.
 
-    if _type == 'String':
-      return openhab.items.StringItem(self, json_data)
+    Args:
+      states: Mapping of items, or item names, to their new state.
+      max_workers: Maximum number of requests in flight at the same time.
 
-    if _type == 'Switch':
-      return openhab.items.SwitchItem(self, json_data)
+    Returns:
+      dict: The result of each update, keyed by item name.
+    """
+    return self._bulk(states, max_workers, lambda item, value: item.update(value))
 
-    if _type == 'DateTime':
-      return openhab.items.DateTimeItem(self, json_data)
+  def _bulk(
+    self,
+    values: typing.Mapping[typing.Union[str, openhab.items.Item], typing.Any],
+    max_workers: int,
+    action: typing.Callable[[openhab.items.Item, typing.Any], None],
+  ) -> dict[str, BulkResult]:
+    if max_workers < 1:
+      raise ValueError('max_workers must be at least 1')
+
+    def run(key: typing.Union[str, openhab.items.Item], value: typing.Any) -> BulkResult:
+      name = key if isinstance(key, str) else key.name
+      result = BulkResult(name=name, value=value)
+      start = time.perf_counter()
+
+      try:
+        if isinstance(key, str):
+          item = self.identity_map.get(key) if self.identity_map is not None else None
+          if item is None:
+            item = self.get_item(key)
+        else:
+          item = key
 
-    if _type == 'Contact':
-      return openhab.items.ContactItem(self, json_data)
+        action(item, value)
+      except (httpx.HTTPError, openhab.exceptions.OpenHABException, ValueError) as exc:
+        result.error = exc
 
-    if _type.startswith('Number'):
-      return openhab.items.NumberItem(self, json_data)
+      result.latency = time.perf_counter() - start
+      return result
 
-    if _type == 'Dimmer':
-      return openhab.items.DimmerItem(self, json_data)
+    if not values:
+      return {}
 
-    if _type == 'Color':
-      return openhab.items.ColorItem(self, json_data)
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(values)), thread_name_prefix='openhab-bulk') as executor:
+      # run in a copy of the current context, so that the requests are recorded as children of the current span
+      futures = [executor.submit(contextvars.copy_context().run, run, key, value) for key, value in values.items()]
 
-    if _type == 'Rollershutter':
-      return openhab.items.RollershutterItem(self, json_data)
+    return {result.name: result for result in (future.result() for future in futures)}
 
-    if _type == 'Player':
-      return openhab.items.PlayerItem(self, json_data)
+  @openhab.tracing.traced('get_persistence_many')
+  def get_persistence_many(
+    self,
+    names: typing.Sequence[str],
+    start_time: typing.Optional[datetime.datetime] = None,
+    end_time: typing.Optional[datetime.datetime] = None,
+    service_id: typing.Optional[str] = None,
+    align: typing.Optional[str] = None,
+    page_length: int = 0,
+    max_workers: int = 8,
+  ) -> openhab.persistence.PersistenceMatrix:
+    """Fetch persistence data of several numeric items concurrently and align it to a common time axis.
 
-    if _type == 'Location':
-      return openhab.items.LocationItem(self, json_data)
+    The rows of the result are the union of the timestamps of all items. This requires numpy to be
+    installed (``pip install python-openhab[numpy]``).
+
+    Args:
+      names: The names of the items; only number, dimmer and rollershutter items are supported.
+      start_time: Start time of the data to return. Will default to 1 day before end_time.
+      end_time: End time of the data to return. Will default to current time.
+      service_id: ID of the persistence service. If not provided the default service will be used.
+      align: How to fill the rows where an item has no data point of its own; one of None (leave NaN),
+             'ffill', 'nearest' or 'drop' (see `openhab.persistence.align`).
+      page_length: The length of each page. Defaults to 0 which disabled paging.
+      max_workers: Maximum number of items fetched at the same time.
+
+    Returns:
+      PersistenceMatrix: The aligned data with one column per item, in the order of *names*.
+    """
+    if max_workers < 1:
+      raise ValueError('max_workers must be at least 1')
+
+    def fetch(name: str) -> openhab.persistence.PersistenceColumns:
+      return self.persistence.get_columns(name, service_id=service_id, start_time=start_time, end_time=end_time, page_length=page_length)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=min(max_workers, len(names) or 1), thread_name_prefix='openhab-persistence') as executor:
+      futures = [executor.submit(contextvars.copy_context().run, fetch, name) for name in names]
+      columns = [future.result() for future in futures]
+
+    return openhab.persistence.align(columns, align)
+
+  @openhab.tracing.traced('get_item')
+  def get_item(self, name: str) -> openhab.items.Item:
+    """Returns an item with its state and type as fetched from openHAB.
+
+    Args:
+      name (str): The name of the item to fetch from openHAB.
+
+    Returns:
+      Item: A corresponding Item class instance with the state of the requested item.
+    """
+    json_data = self.get_item_raw(name)
 
-    return openhab.items.Item(self, json_data)
+    return self._construct('get_item', 1, lambda: self.json_to_item(json_data))
 
   def get_item_raw(self, name: str) -> typing.Any:
     """Private method for fetching a json configuration of an item.
@@ -304,28 +1155,14 @@ class OpenHAB:
     Returns:
       True or False depending on if the logout did succeed.
     """
-    if self.oauth2_config is None or not isinstance(self.session, authlib.integrations.httpx_client.OAuth2Client):
-      raise ValueError('You are trying to logout from a non-OAuth2 session. This is not supported!')
-
-    data = {
-      'refresh_token': self.oauth2_config.token.refresh_token,
-      'id': self.oauth2_config.client_id,
-    }
+    data = self._logout_data(self.session)
     url_logout = f'{self.url_rest}/auth/logout'
 
     res = self.session.post(url_logout, data=data)
 
     return res.status_code == 200
 
-  def _oauth2_token_updater(self, token: dict[str, typing.Any], refresh_token: typing.Any = None, access_token: typing.Any = None) -> None:
-    if self.oauth2_config is None:
-      raise ValueError('OAuth2 configuration is not set; invalid action!')
-
-    self.oauth2_config.token = Oauth2Token(**token)
-
-    with self.oauth2_config.token_cache.open('w', encoding='utf-8') as fhdl:
-      fhdl.write(self.oauth2_config.token.model_dump_json())
-
+  @openhab.tracing.traced('create_or_update_item')
   def create_or_update_item(
     self,
     name: str,
@@ -359,63 +1196,24 @@ class OpenHAB:
                      Can be one of ['EQUALITY', 'AND', 'OR', 'NAND', 'NOR', 'AVG', 'SUM', 'MAX', 'MIN', 'COUNT', 'LATEST', 'EARLIEST']
       function_params: Optional list of function params (no documentation found), depending on function name.
     """
-    paramdict: dict[str, typing.Union[str, list[str], dict[str, typing.Union[str, list[str]]]]] = {}
-
-    if isinstance(_type, type):
-      if issubclass(_type, openhab.items.Item):
-        itemtypename = _type.TYPENAME
-      else:
-        raise ValueError(f'_type parameter must be a valid subclass of type *Item* or a string name of such a class; given value is "{str(_type)}"')
-    else:
-      itemtypename = _type
-
-    if quantity_type is None:
-      paramdict['type'] = itemtypename
-    else:
-      paramdict['type'] = f'{itemtypename}:{quantity_type}'
-
-    paramdict['name'] = name
-
-    if label is not None:
-      paramdict['label'] = label
-
-    if category is not None:
-      paramdict['category'] = category
-
-    if tags is not None:
-      paramdict['tags'] = tags
-
-    if group_names is not None:
-      paramdict['groupNames'] = group_names
-
-    if group_type is not None:
-      if isinstance(group_type, type):
-        if issubclass(group_type, openhab.items.Item):
-          paramdict['groupType'] = group_type.TYPENAME
-        else:
-          raise ValueError(f'group_type parameter must be a valid subclass of type *Item* or a string name of such a class; given value is "{str(group_type)}"')
-      else:
-        paramdict['groupType'] = group_type
-
-    if function_name is not None:
-      if function_name not in ('EQUALITY', 'AND', 'OR', 'NAND', 'NOR', 'AVG', 'SUM', 'MAX', 'MIN', 'COUNT', 'LATEST', 'EARLIEST'):
-        raise ValueError(f'Invalid function name "{function_name}')
-
-      if function_name in ('AND', 'OR', 'NAND', 'NOR') and (not function_params or len(function_params) != 2):
-        raise ValueError(f'Group function "{function_name}" requires two arguments')
-
-      if function_name == 'COUNT' and (not function_params or len(function_params) != 1):
-        raise ValueError(f'Group function "{function_name}" requires one arguments')
-
-      if function_params:
-        paramdict['function'] = {'name': function_name, 'params': function_params}
-      else:
-        paramdict['function'] = {'name': function_name}
+    paramdict = self._item_definition(
+      name,
+      _type,
+      quantity_type=quantity_type,
+      label=label,
+      category=category,
+      tags=tags,
+      group_names=group_names,
+      group_type=group_type,
+      function_name=function_name,
+      function_params=function_params,
+    )
 
     self.logger.debug('About to create item with PUT request:\n%s', str(paramdict))
 
     self.req_put(f'/items/{name}', json_data=paramdict, headers={'Content-Type': 'application/json'})
 
+  @openhab.tracing.traced('get_item_persistence')
   def get_item_persistence(
     self,
     name: str,
@@ -425,6 +1223,8 @@ class OpenHAB:
     page: int = 0,
     page_length: int = 0,
     boundary: bool = False,
+    prefetch: int = 0,
+    cached: bool = True,
   ) -> typing.Iterator[dict[str, typing.Union[str, int]]]:
     """Method for fetching persistence data for a given item.
 
@@ -436,6 +1236,13 @@ class OpenHAB:
       page: Page number of data to return. Defaults to 0 if not provided.
       page_length: The length of each page. Defaults to 0 which disabled paging.
       boundary: Gets one value before and after the requested period.
+      prefetch: Number of pages to request ahead in background threads while the current page is being
+                consumed; only used when paging is enabled. The order of the data is preserved. As the
+                number of pages is not known in advance, up to *prefetch* requests past the last page are
+                wasted.
+      cached: If a `persistence_memory_cache` and/or `persistence_cache` is configured, serve the data from the
+              caches and only fetch what is missing from openHAB. Requests for a specific page always bypass
+              the caches, requests with boundary values bypass the `persistence_cache`.
 
     Returns:
       Iterator over dict values containing time and state value, e.g.
@@ -443,23 +1250,29 @@ class OpenHAB:
          "state": "23"
         }
     """
-    params: dict[str, typing.Any] = {
-      'boundary': str(boundary).lower(),
-      'page': page,
-      'pagelength': page_length,
-    }
-
-    if service_id is not None:
-      params['serviceId'] = service_id
-
-    if start_time is not None:
-      params['starttime'] = start_time.isoformat()
-
-    if end_time is not None:
-      params['endtime'] = end_time.isoformat()
-
-    if start_time == end_time:
-      raise ValueError('start_time must differ from end_time')
+    if prefetch < 0:
+      raise ValueError('prefetch must not be negative')
+
+    if cached and self.persistence_memory_cache is not None and page == 0 and start_time is not None and end_time is not None:
+      yield from self.persistence.get_memory_cached(name, service_id, start_time, end_time, page_length=page_length, boundary=boundary, prefetch=prefetch)
+      return
+
+    if cached and self.persistence_cache is not None and page == 0 and not boundary:
+      yield from self.persistence.get_cached(name, service_id, start_time, end_time, page_length=page_length, prefetch=prefetch)
+      return
+
+    params = self._persistence_params(
+      service_id=service_id,
+      start_time=start_time,
+      end_time=end_time,
+      page=page,
+      page_length=page_length,
+      boundary=boundary,
+    )
+
+    if page_length > 0 and prefetch > 0:
+      yield from self._get_item_persistence_prefetched(name, params, prefetch)
+      return
 
     res = self.req_get(f'/persistence/items/{name}', params=params)
 
@@ -469,3 +1282,30 @@ class OpenHAB:
       params['page'] += 1
       res = self.req_get(f'/persistence/items/{name}', params=params)
       yield from res['data']
+
+  def _get_item_persistence_prefetched(self, name: str, params: dict[str, typing.Any], prefetch: int) -> typing.Iterator[dict[str, typing.Union[str, int]]]:
+    """Page through persistence data while keeping the next *prefetch* pages in flight."""
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=prefetch, thread_name_prefix='openhab-prefetch')
+    pending: collections.deque[concurrent.futures.Future] = collections.deque()
+    next_page = params['page']
+
+    def submit() -> None:
+      nonlocal next_page
+      pending.append(executor.submit(contextvars.copy_context().run, self.req_get, f'/persistence/items/{name}', params={**params, 'page': next_page}))
+      next_page += 1
+
+    try:
+      for _ in range(prefetch + 1):
+        submit()
+
+      while pending:
+        res = pending.popleft().result()
+
+        yield from res['data']
+
+        if int(res['datapoints']) == 0:
+          break
+
+        submit()
+    finally:
+      executor.shutdown(wait=False, cancel_futures=True)
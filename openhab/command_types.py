@@ -21,15 +21,113 @@
 
 import abc
 import datetime
+import functools
 import re
+import sys
 import typing
 
 import dateutil.parser
+import dateutil.tz
 
 __author__ = 'Georges Toth <georges@trypill.org>'
 __license__ = 'AGPLv3+'
 
 
+# a number, optionally followed by a unit of measure, e.g. "21.5 °C"
+NUMBER_PATTERN = re.compile(r'(-?[0-9.]+(?:[eE]-?[0-9]+)?)\s?(.*)?$')
+
+
+def split_number(value: str) -> typing.Optional[tuple[str, str]]:
+  """Split a state made of a plain decimal number and an optional unit, e.g. "21.5 °C", without a regular expression.
+
+  Only the common form of an optional minus sign, ASCII digits with at most one decimal point and an optional unit
+  separated by a single space is handled; for these the result is the same as that of matching `NUMBER_PATTERN`.
+  Units are interned, as the same few units are repeated over all items and persisted values.
+
+  Args:
+    value: The state.
+
+  Returns:
+    The number and the unit of measure (an empty string if there is none), or None if the state is not of this form.
+  """
+  number, _, unit = value.partition(' ')
+  digits = (number[1:] if number[:1] == '-' else number).replace('.', '', 1)
+
+  # isdigit() alone would accept non-ASCII digits like "²"
+  if not digits.isdigit() or not digits.isascii() or '\n' in unit:
+    return None
+
+  return number, sys.intern(unit) if unit else ''
+
+
+# the ISO 8601 format of the DateTime states sent by openHAB, e.g. "2024-01-02T03:04:05.678+0100"
+_DATETIME_PATTERN = re.compile(
+  r'([0-9]{4})-([0-9]{2})-([0-9]{2})T([0-9]{2}):([0-9]{2})(?::([0-9]{2})(?:\.([0-9]{1,9}))?)?(Z|[+-](?:[01][0-9]|2[0-3]):?[0-5][0-9])?'
+)
+
+
+@functools.lru_cache(maxsize=64)
+def _timezone(offset: str) -> datetime.tzinfo:
+  """Return the time zone of a UTC offset like "+0100", "-05:30" or "Z", using the same classes as dateutil."""
+  if offset == 'Z':
+    return dateutil.tz.UTC
+
+  seconds = (int(offset[1:3]) * 60 + int(offset[-2:])) * 60
+  if not seconds:
+    return dateutil.tz.UTC
+
+  return dateutil.tz.tzoffset(None, -seconds if offset[0] == '-' else seconds)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_iso_datetime(value: str) -> typing.Optional[datetime.datetime]:
+  """Parse a timestamp in the ISO 8601 format sent by openHAB, or return None if it is in a different format."""
+  m = _DATETIME_PATTERN.fullmatch(value)
+  if m is None:
+    return None
+
+  year, month, day, hour, minute, second, fraction, offset = m.groups()
+
+  try:
+    # like dateutil, fractions beyond microseconds (openHAB may send nanoseconds) are truncated
+    return datetime.datetime(
+      int(year),
+      int(month),
+      int(day),
+      int(hour),
+      int(minute),
+      int(second or 0),
+      int(fraction.ljust(6, '0')[:6]) if fraction else 0,
+      tzinfo=_timezone(offset) if offset is not None else None,
+    )
+  except ValueError:
+    return None
+
+
+def parse_datetime(value: str) -> datetime.datetime:
+  """Parse a DateTime state, e.g. "2024-01-02T03:04:05.678+0100".
+
+  Timestamps in the ISO 8601 format sent by openHAB are parsed directly, and the results of the most recent
+  4096 distinct timestamps are cached, which matters for registries and persisted series where the same
+  timestamps recur. Other formats are parsed with `dateutil.parser.parse`. The result is the same as that of
+  `dateutil.parser.parse`, except that a UTC offset of zero is always represented by `dateutil.tz.UTC`.
+
+  Args:
+    value: The state.
+
+  Returns:
+    The parsed datetime; timezone aware if the state contains a UTC offset.
+
+  Raises:
+    ValueError: If the state cannot be parsed.
+  """
+  result = _parse_iso_datetime(value)
+  if result is None:
+    return dateutil.parser.parse(value)
+
+  return result
+
+
 class CommandType(metaclass=abc.ABCMeta):
   """Base command type class."""
 
@@ -288,7 +386,11 @@ class DecimalType(CommandType):
     if value in DecimalType.UNDEFINED_STATES:
       return None
 
-    m = re.match(r'(-?[0-9.]+(?:[eE]-?[0-9]+)?)\s?(.*)?$', value)
+    plain = split_number(value)
+    if plain is not None:
+      return float(plain[0]) if '.' in value else int(plain[0]), plain[1]
+
+    m = NUMBER_PATTERN.match(value)
     if m:
       value_value = m.group(1)
       value_unit_of_measure = m.group(2)
@@ -412,7 +514,7 @@ class DateTimeType(CommandType):
     """Parse a given value."""
     if value in DateTimeType.UNDEFINED_STATES:
       return None
-    return dateutil.parser.parse(value)
+    return parse_datetime(value)
 
   @classmethod
   def validate(cls, value: datetime.datetime) -> None:
@@ -0,0 +1,257 @@
+"""python library for accessing the openHAB REST API."""
+
+#
+# Georges Toth (c) 2016-present <georges@trypill.org>
+#
+# python-openhab is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python-openhab is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with python-openhab.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import collections.abc
+import json
+import logging
+import threading
+import typing
+
+import httpx
+
+import openhab.items
+
+__author__ = 'Georges Toth <georges@trypill.org>'
+__license__ = 'AGPLv3+'
+
+ITEM_EVENT_TOPICS = (
+  'openhab/items/*/state',
+  'openhab/items/*/stateupdated',
+  'openhab/items/*/statechanged',
+  'openhab/items/*/added',
+  'openhab/items/*/removed',
+  'openhab/items/*/updated',
+)
+
+STATE_EVENT_TYPES = ('ItemStateEvent', 'ItemStateUpdatedEvent', 'ItemStateChangedEvent', 'GroupItemStateChangedEvent', 'GroupStateUpdatedEvent')
+
+
+def iter_sse_events(lines: typing.Iterable[str]) -> typing.Iterator[dict[str, typing.Any]]:
+  """Parse a Server-Sent Events stream as sent by openHAB's `/events` endpoint.
+
+  Args:
+    lines: The lines of the event stream, without line terminators.
+
+  Returns:
+    Iterator over the JSON decoded `data` of each event. Events not carrying JSON data
+    (e.g. keep-alive messages) are skipped.
+  """
+  data: list[str] = []
+
+  for line in lines:
+    if line.startswith('data:'):
+      data.append(line[5:].lstrip(' '))
+      continue
+
+    if line or not data:
+      # other fields (event, id, retry) and comments are of no interest
+      continue
+
+    try:
+      event = json.loads('\n'.join(data))
+    except json.JSONDecodeError:
+      event = None
+
+    data = []
+
+    if isinstance(event, dict):
+      yield event
+
+
+class ItemRegistry(collections.abc.Mapping):
+  """A local mirror of the openHAB item registry, kept current through the openHAB event stream.
+
+  The registry subscribes to openHAB's `/events` Server-Sent Events endpoint and applies item state,
+  added, updated and removed events to an in-memory dict of `Item` instances. Reading items and their
+  states from the registry does not cause any request to openHAB.
+
+  The full registry is fetched on connect and again after each reconnect, so that no change is lost
+  while the event stream was down. With the client's identity map the registry's items are the same
+  instances `OpenHAB.get_item` returns, so their staleness policy is left untouched; use `get_state`
+  for reading the mirrored state without a request.
+
+  ```python
+  registry = ItemRegistry(openhab)
+  registry.start()
+
+  print(registry.get_state('Dining_Temperature'))
+  ```
+  """
+
+  def __init__(
+    self,
+    openhab_conn: 'openhab.client.OpenHAB',
+    topics: typing.Sequence[str] = ITEM_EVENT_TOPICS,
+    reconnect_delay: float = 5.0,
+  ) -> None:
+    """Constructor.
+
+    Args:
+      openhab_conn (openhab.OpenHAB): openHAB object.
+      topics: The event topics to subscribe to.
+      reconnect_delay: Seconds to wait before reconnecting after the event stream was interrupted.
+    """
+    self.openhab = openhab_conn
+    self.topics = topics
+    self.reconnect_delay = reconnect_delay
+    self.logger = logging.getLogger(__name__)
+
+    self._items: dict[str, openhab.items.Item] = {}
+    self._stop_event = threading.Event()
+    self._thread: typing.Optional[threading.Thread] = None
+    self._response: typing.Optional[httpx.Response] = None
+
+  def __getitem__(self, name: str) -> openhab.items.Item:
+    """Return the item with the given name."""
+    return self._items[name]
+
+  def __iter__(self) -> typing.Iterator[str]:
+    """Iterate over the item names."""
+    return iter(self._items)
+
+  def __len__(self) -> int:
+    """Return the number of items."""
+    return len(self._items)
+
+  def get_state(self, name: str) -> typing.Any:
+    """Return the locally mirrored state of an item.
+
+    Args:
+      name: The item name.
+
+    Returns:
+      The item state, parsed the same way as `Item.state`.
+    """
+    return self._items[name].cached_state
+
+  def resync(self) -> None:
+    """Replace the local registry with the full item list as fetched from openHAB."""
+    self._items = self.openhab.fetch_all_items()
+
+  def handle_event(self, event: dict[str, typing.Any]) -> None:
+    """Apply a single decoded openHAB event to the local registry.
+
+    Events which cannot be applied, e.g. as their payload is malformed or the state cannot be parsed by the
+    item, are logged and skipped, so that they do not stop the event subscriber.
+
+    Args:
+      event: The decoded event, e.g. {"topic": "openhab/items/Foo/state", "type": "ItemStateEvent", "payload": "..."}.
+    """
+    try:
+      self._apply_event(event)
+    except Exception:
+      self.logger.exception('Skipping openHAB event which cannot be applied: %r', event)
+
+  def _apply_event(self, event: dict[str, typing.Any]) -> None:
+    topic = event.get('topic', '')
+    event_type = event.get('type', '')
+    parts = topic.split('/')
+
+    if len(parts) < 4 or parts[0] != 'openhab' or parts[1] != 'items':
+      return
+
+    name = parts[2]
+    payload: typing.Any = json.loads(event['payload']) if event.get('payload') else None
+
+    if event_type in STATE_EVENT_TYPES:
+      item = self._items.get(name)
+
+      if item is not None and payload is not None:
+        item.apply_raw_state(payload['value'])
+
+    elif event_type == 'ItemAddedEvent':
+      item = self.openhab.json_to_item({'state': 'NULL', **payload})
+      self._items[item.name] = item
+
+    elif event_type == 'ItemUpdatedEvent':
+      # the payload consists of the new and the old item definition
+      old_item = self._items.get(name)
+      state = old_item.raw_state if old_item is not None else 'NULL'
+      item = self.openhab.json_to_item({'state': state, **payload[0]})
+      self._items[item.name] = item
+
+    elif event_type == 'ItemRemovedEvent':
+      self._items.pop(name, None)
+
+  def run(self) -> None:
+    """Connect to the event stream and keep the registry current until `stop` is called.
+
+    This method blocks; use `start` for running it in a background thread.
+    """
+    while not self._stop_event.is_set():
+      try:
+        self._listen()
+      except (httpx.HTTPError, httpx.StreamError, json.JSONDecodeError, KeyError) as exc:
+        if self._stop_event.is_set():
+          break
+
+        self.logger.warning('Event stream interrupted: %s', exc)
+      except Exception:
+        # e.g. the resync failed on an unexpected response; keep reconnecting rather than serving stale states
+        if self._stop_event.is_set():
+          break
+
+        self.logger.exception('Event subscriber failed, reconnecting')
+
+      self._stop_event.wait(self.reconnect_delay)
+
+  def start(self) -> None:
+    """Run the event subscriber in a background thread."""
+    if self._thread is not None and self._thread.is_alive():
+      return
+
+    self._stop_event.clear()
+    self._thread = threading.Thread(target=self.run, name='openhab-events', daemon=True)
+    self._thread.start()
+
+  def stop(self, timeout: typing.Optional[float] = None) -> None:
+    """Stop the event subscriber.
+
+    Args:
+      timeout: Maximum seconds to wait for the background thread to terminate.
+    """
+    self._stop_event.set()
+
+    if self._response is not None:
+      self._response.close()
+
+    if self._thread is not None and self._thread is not threading.current_thread():
+      self._thread.join(timeout)
+
+  def _listen(self) -> None:
+    """Connect to the event stream, resync the registry and process events until the stream ends."""
+    url = f'{self.openhab.url_rest}/events'
+    params = {'topics': ','.join(self.topics)}
+    timeout = httpx.Timeout(self.openhab.session.timeout.connect, read=None)
+
+    with self.openhab.session.stream('GET', url, params=params, timeout=timeout) as response:
+      self._response = response
+      try:
+        response.raise_for_status()
+
+        # the stream is open at this point, so events happening during the resync are buffered and applied afterwards
+        self.resync()
+
+        for event in iter_sse_events(response.iter_lines()):
+          self.handle_event(event)
+
+          if self._stop_event.is_set():
+            break
+      finally:
+        self._response = None
@@ -7,3 +7,7 @@ class OpenHABException(Exception):
 
 class InvalidReturnException(OpenHABException):
   """The openHAB server returned an invalid or unparsable result."""
+
+
+class CircuitOpenException(OpenHABException):
+  """The request was not sent as the circuit breaker is open, i.e. openHAB is considered to be unavailable."""
@@ -0,0 +1,301 @@
+"""python library for accessing the openHAB REST API."""
+
+#
+# Georges Toth (c) 2016-present <georges@trypill.org>
+#
+# python-openhab is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python-openhab is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with python-openhab.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import argparse
+import csv
+import dataclasses
+import datetime
+import gzip
+import io
+import json
+import logging
+import os
+import pathlib
+import sys
+import time
+import typing
+
+import openhab.client
+import openhab.persistence
+
+__author__ = 'Georges Toth <georges@trypill.org>'
+__license__ = 'AGPLv3+'
+
+FORMATS = ('csv', 'jsonl')
+
+
+@dataclasses.dataclass
+class ExportReport:
+  """Progress of an export by `export_persistence`.
+
+  Attributes:
+    rows: Number of data points written, including those written before resuming.
+    bytes: Size of the output file in bytes, as of the last checkpoint.
+    last_time: Timestamp of the last data point written, in milliseconds since the epoch.
+    elapsed: Seconds since the export was started or resumed.
+    resumed: True if the export continued a previous, interrupted export.
+    resumed_rows: Number of data points which had been written before resuming.
+  """
+
+  rows: int = 0
+  bytes: int = 0
+  last_time: typing.Optional[int] = None
+  elapsed: float = 0.0
+  resumed: bool = False
+  resumed_rows: int = 0
+
+  @property
+  def rows_per_second(self) -> float:
+    """Throughput of the export since it was started or resumed."""
+    return (self.rows - self.resumed_rows) / self.elapsed if self.elapsed else 0.0
+
+
+class _Sink:
+  """Output file written in segments, which allows truncating it to the end of the last completed segment.
+
+  Gzip compressed output ends a gzip member with every segment; a concatenation of gzip members is a valid
+  gzip file.
+  """
+
+  def __init__(self, path: pathlib.Path, file_format: str, compress: bool, offset: typing.Optional[int]) -> None:
+    self._raw: typing.BinaryIO
+
+    if offset is None:
+      self._raw = path.open('wb')
+    else:
+      self._raw = path.open('r+b')
+      self._raw.truncate(offset)
+      self._raw.seek(offset)
+
+    self._format = file_format
+    self._compress = compress
+    self._gzip: typing.Optional[gzip.GzipFile] = None
+    self._text: typing.Optional[io.TextIOWrapper] = None
+    self._csv: typing.Any = None
+
+    if offset is None and file_format == 'csv':
+      self.write({'time': 'time', 'state': 'state'})
+
+  def write(self, entry: dict[str, typing.Union[str, int]]) -> None:
+    if self._text is None:
+      if self._compress:
+        self._gzip = gzip.GzipFile(fileobj=self._raw, mode='wb')
+      self._text = io.TextIOWrapper(self._gzip or self._raw, encoding='utf-8', newline='')
+      self._csv = csv.writer(self._text)
+
+    if self._format == 'csv':
+      self._csv.writerow((entry['time'], entry['state']))
+    else:
+      self._text.write(json.dumps({'time': entry['time'], 'state': entry['state']}, ensure_ascii=False) + '\n')
+
+  def end_segment(self) -> int:
+    """Write out everything written so far and return the size of the file."""
+    if self._text is not None:
+      self._text.flush()
+      self._text.detach()
+      self._text = None
+
+    if self._gzip is not None:
+      self._gzip.close()
+      self._gzip = None
+
+    self._raw.flush()
+    os.fsync(self._raw.fileno())
+
+    return self._raw.tell()
+
+  def close(self) -> int:
+    size = self.end_segment()
+    self._raw.close()
+    return size
+
+
+def export_persistence(
+  openhab_conn: openhab.client.OpenHAB,
+  name: str,
+  path: typing.Union[str, os.PathLike],
+  start_time: datetime.datetime,
+  end_time: datetime.datetime,
+  service_id: typing.Optional[str] = None,
+  file_format: typing.Optional[str] = None,
+  compress: typing.Optional[bool] = None,
+  page_length: int = 10000,
+  checkpoint_every: int = 100000,
+  checkpoint: typing.Optional[typing.Union[str, os.PathLike]] = None,
+  progress: typing.Optional[typing.Callable[[ExportReport], None]] = None,
+) -> ExportReport:
+  """Stream the persistence data of an item to a CSV or JSON lines file.
+
+  The data is fetched page by page with `OpenHAB.get_item_persistence` (the next page being prefetched while
+  the current one is written) and written straight to the file, so memory use does not depend on the size of
+  the export. CSV files contain a header and the columns ``time`` (milliseconds since the epoch) and ``state``;
+  JSON lines files contain one ``{"time": ..., "state": ...}`` object per line.
+
+  Every *checkpoint_every* data points the file is flushed to disk and the progress is recorded in the
+  checkpoint file. If an export of the same item, start time and format is started again while the checkpoint
+  file exists, it continues after the last checkpoint, up to the (possibly later) new *end_time*. The
+  checkpoint file is removed once the export is complete.
+
+  Args:
+    openhab_conn: openHAB object.
+    name: The item name persistence data should be exported for.
+    path: The output file.
+    start_time: Start time of the data to export.
+    end_time: End time of the data to export.
+    service_id: ID of the persistence service. If not provided the default service will be used.
+    file_format: Either 'csv' or 'jsonl'; by default derived from the file name, e.g. "temperature.jsonl.gz".
+    compress: Whether to gzip the output; by default True if the file name ends with ".gz".
+    page_length: Number of data points fetched per request.
+    checkpoint_every: Number of data points written between two checkpoints.
+    checkpoint: The checkpoint file; defaults to the output file name with ".checkpoint" appended.
+    progress: Optional function called with the current `ExportReport` after every checkpoint.
+
+  Returns:
+    ExportReport: The number of data points and bytes written and the throughput.
+  """
+  # naive datetimes are taken to be in local time, so that they can be compared with the times of the data points
+  start_time = start_time.astimezone()
+  end_time = end_time.astimezone()
+
+  path = pathlib.Path(path)
+  suffixes = [suffix.lstrip('.') for suffix in path.suffixes]
+
+  if compress is None:
+    compress = suffixes[-1:] == ['gz']
+
+  if file_format is None:
+    candidates = [suffix for suffix in suffixes if suffix in FORMATS]
+    file_format = candidates[-1] if candidates else 'csv'
+
+  if file_format not in FORMATS:
+    raise ValueError(f'file_format must be one of {FORMATS}')
+
+  if page_length < 1 or checkpoint_every < 1:
+    raise ValueError('page_length and checkpoint_every must be at least 1')
+
+  checkpoint_path = pathlib.Path(checkpoint) if checkpoint is not None else path.with_name(f'{path.name}.checkpoint')
+  job = {
+    'name': name,
+    'service_id': service_id,
+    'start_time': start_time.isoformat(),
+    'format': file_format,
+    'compress': compress,
+  }
+
+  report = ExportReport()
+  offset = None
+
+  if checkpoint_path.is_file() and path.is_file():
+    state = json.loads(checkpoint_path.read_text())
+
+    if state['job'] == job:
+      report = ExportReport(rows=state['rows'], bytes=state['bytes'], last_time=state['last_time'], resumed=True, resumed_rows=state['rows'])
+      offset = state['bytes']
+    else:
+      logging.getLogger(__name__).warning('Ignoring checkpoint %s of a different export', checkpoint_path)
+
+  def save_checkpoint() -> None:
+    tmp_path = checkpoint_path.with_name(f'{checkpoint_path.name}.tmp')
+    tmp_path.write_text(json.dumps({'job': job, 'rows': report.rows, 'bytes': report.bytes, 'last_time': report.last_time}))
+    tmp_path.replace(checkpoint_path)
+
+  fetch_start = start_time if report.last_time is None else openhab.persistence.from_millis(report.last_time + 1)
+  started = time.perf_counter()
+  sink = _Sink(path, file_format, compress, offset)
+  since_checkpoint = 0
+
+  try:
+    if fetch_start < end_time:
+      data = openhab_conn.get_item_persistence(
+        name,
+        service_id=service_id,
+        start_time=fetch_start,
+        end_time=end_time,
+        page_length=page_length,
+        prefetch=1,
+        cached=False,
+      )
+
+      for entry in data:
+        sink.write(entry)
+        report.rows += 1
+        report.last_time = int(entry['time'])
+        since_checkpoint += 1
+
+        if since_checkpoint >= checkpoint_every:
+          report.bytes = sink.end_segment()
+          report.elapsed = time.perf_counter() - started
+          save_checkpoint()
+          since_checkpoint = 0
+
+          if progress is not None:
+            progress(report)
+  finally:
+    report.bytes = sink.close()
+    report.elapsed = time.perf_counter() - started
+
+  checkpoint_path.unlink(missing_ok=True)
+
+  if progress is not None:
+    progress(report)
+
+  return report
+
+
+def main(argv: typing.Optional[typing.Sequence[str]] = None) -> int:
+  """Command line interface for `export_persistence`."""
+  parser = argparse.ArgumentParser(prog='openhab-export', description='Export openHAB persistence data of an item to a CSV or JSON lines file.')
+  parser.add_argument('base_url', help='openHAB REST URL, e.g. http://localhost:8080/rest')
+  parser.add_argument('item', help='item name')
+  parser.add_argument('output', help='output file, e.g. temperature.csv, temperature.jsonl.gz')
+  parser.add_argument('--start', required=True, type=datetime.datetime.fromisoformat, help='start time (ISO 8601)')
+  parser.add_argument('--end', type=datetime.datetime.fromisoformat, help='end time (ISO 8601), defaults to now')
+  parser.add_argument('--service-id', help='persistence service, defaults to the default service')
+  parser.add_argument('--format', choices=FORMATS, help='output format, derived from the file name by default')
+  parser.add_argument('--page-length', type=int, default=10000, help='data points fetched per request')
+  parser.add_argument('--checkpoint-every', type=int, default=100000, help='data points written between checkpoints')
+  parser.add_argument('--username', help='username for basic authentication')
+  parser.add_argument('--password', default=os.environ.get('OPENHAB_PASSWORD'), help='password for basic authentication, or $OPENHAB_PASSWORD')
+  parser.add_argument('--timeout', type=float, help='timeout of each request in seconds')
+  args = parser.parse_args(argv)
+
+  oh = openhab.client.OpenHAB(args.base_url, username=args.username, password=args.password, timeout=args.timeout)
+
+  def print_progress(report: ExportReport) -> None:
+    print(f'\r{report.rows} data points, {report.bytes / 1e6:.1f} MB, {report.rows_per_second:.0f} points/s', end='', file=sys.stderr)  # noqa: T201
+
+  export_persistence(
+    oh,
+    args.item,
+    args.output,
+    start_time=args.start,
+    end_time=args.end or datetime.datetime.now(tz=args.start.tzinfo),
+    service_id=args.service_id,
+    file_format=args.format,
+    page_length=args.page_length,
+    checkpoint_every=args.checkpoint_every,
+    progress=print_progress,
+  )
+
+  print(file=sys.stderr)  # noqa: T201
+  return 0
+
+
+if __name__ == '__main__':
+  sys.exit(main())
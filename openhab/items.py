@@ -18,14 +18,14 @@
 #
 
 import datetime
+import functools
 import logging
-import re
+import time
 import typing
 
-import dateutil.parser
-
 import openhab.command_types
 import openhab.exceptions
+import openhab.tracing
 
 __author__ = 'Georges Toth <georges@trypill.org>'
 __license__ = 'AGPLv3+'
@@ -42,11 +42,12 @@ class Item:
 
   TYPENAME = 'unknown'
 
-  def __init__(self, openhab_conn: 'openhab.client.OpenHAB', json_data: dict) -> None:
+  def __init__(self, openhab_conn: 'openhab.client.OpenHABBase', json_data: dict) -> None:
     """Constructor.
 
     Args:
-      openhab_conn (openhab.OpenHAB): openHAB object.
+      openhab_conn (openhab.OpenHAB): openHAB object; either a synchronous :class:`openhab.OpenHAB` or an
+                                      asynchronous :class:`openhab.AsyncOpenHAB` client.
       json_data (dic): A dict converted from the JSON data returned by the openHAB
                        server.
     """
@@ -66,6 +67,8 @@ class Item:
     self._members = {}  # type: typing.Dict[str, typing.Any] #  group members (key = item name), for none-group items it's empty
     self.function_name: typing.Optional[str] = None
     self.function_params: typing.Optional[typing.Sequence[str]] = None
+    self.state_ttl: typing.Optional[float] = None  # seconds a fetched state is considered fresh; None = use the client's setting
+    self._state_fetched_at: typing.Optional[float] = None  # monotonic time the state was last received from openHAB
 
     self.logger = logging.getLogger(__name__)
 
@@ -90,9 +93,9 @@ class Item:
         if 'params' in json_data['function']:
           self.function_params = json_data['function']['params']
 
-      # init members
-      for i in json_data['members']:
-        self.members[i['name']] = self.openhab.json_to_item(i)
+      # init members; events announcing a new or updated group do not carry any members
+      if 'members' in json_data:
+        self._members = {i['name']: self.openhab.json_to_item(i) for i in json_data['members']}
 
     else:
       self.type_ = json_data.get('type', None)
@@ -115,29 +118,92 @@ class Item:
     if 'groupNames' in json_data:
       self.groupNames = json_data['groupNames']
 
-    self._raw_state = json_data['state']
+    self.apply_raw_state(json_data['state'])
+
+  def apply_raw_state(self, raw_state: str) -> None:
+    """Set the local state of this item from a raw state string, without contacting openHAB.
+
+    Args:
+      raw_state (str): The state as returned by the openHAB REST API or event bus, e.g. "21.5 °C".
+    """
+    self._raw_state = raw_state
+    self._state_fetched_at = time.monotonic()
 
     if self.is_undefined(self._raw_state):
       self._state = None
     else:
       self._state, self._unitOfMeasure = self._parse_rest(self._raw_state)
 
+  def parse_state(self, raw_state: str) -> tuple[typing.Any, str]:
+    """Parse a raw state string the way this item parses its own state, without modifying the item.
+
+    Args:
+      raw_state (str): A state as returned by the openHAB REST API, e.g. "21.5 °C" or a persisted value.
+
+    Returns:
+      The parsed value (None for UNDEF/NULL) and the unit of measure, or an empty string if there is none.
+    """
+    if self.is_undefined(raw_state):
+      return None, ''
+
+    return self._parse_rest(raw_state)
+
   @property
   def state(self) -> typing.Any:
     """The state property represents the current state of the item.
 
-    The state is automatically refreshed from openHAB on reading it.
+    The state is automatically refreshed from openHAB on reading it, unless it was received less than
+    `state_ttl` seconds ago (see `OpenHAB` for the possible values); by default the state is refreshed
+    on every read.
     Updating the value via this property send an update to the event bus.
     """
-    json_data = self.openhab.get_item_raw(self.name)
-    self.init_from_json(json_data)
+    self._require_sync_client('await item.async_refresh()')
 
-    return self._state
+    ttl = self.state_ttl if self.state_ttl is not None else self.openhab.state_ttl
+
+    if self._state_fetched_at is not None and time.monotonic() - self._state_fetched_at < ttl:
+      self.openhab.state_cache_hits += 1
+      return self._state
+
+    self.openhab.state_cache_misses += 1
+
+    return self.refresh()
 
   @state.setter
   def state(self, value: typing.Any) -> None:
     self.update(value)
 
+  @property
+  def cached_state(self) -> typing.Any:
+    """The locally known state of the item, as last fetched, received or set; no request is sent to openHAB."""
+    return self._state
+
+  @property
+  def raw_state(self) -> typing.Optional[str]:
+    """The locally known raw state of the item as returned by openHAB, e.g. "NULL" or "21.5 °C"."""
+    return self._raw_state
+
+  @openhab.tracing.traced('refresh')
+  def refresh(self) -> typing.Any:
+    """Refresh the item from openHAB and return its current state, regardless of `state_ttl`."""
+    self._require_sync_client('await item.async_refresh()')
+
+    json_data = self.openhab.get_item_raw(self.name)
+    self.init_from_json(json_data)
+
+    return self._state
+
+  @openhab.tracing.traced('async_refresh')
+  async def async_refresh(self) -> typing.Any:
+    """Refresh the item from openHAB using an asynchronous client and return its current state.
+
+    This is the asynchronous counterpart of reading the `state` property.
+    """
+    json_data = await self.openhab.get_item_raw(self.name)
+    self.init_from_json(json_data)
+
+    return self._state
+
   @property
   def unit_of_measure(self) -> str:
     """Return the unit of measure. Returns an empty string if there is none defined."""
@@ -207,6 +273,11 @@ class Item:
       state = f'{self._state} {self._unitOfMeasure}'
     return f'<{self.type_} - {self.name} : {state}>'
 
+  def _require_sync_client(self, alternative: str) -> None:
+    """Raise a TypeError if the item belongs to an asynchronous client, on which *alternative* must be used instead."""
+    if self.openhab.is_async:
+      raise TypeError(f'Item "{self.name}" belongs to an asynchronous client, use `{alternative}` instead')
+
   def _update(self, value: typing.Any) -> None:
     """Updates the state of an item, input validation is expected to be already done.
 
@@ -214,9 +285,35 @@ class Item:
       value (object): The value to update the item with. The type of the value depends
                       on the item type and is checked accordingly.
     """
+    self._require_sync_client('await item.async_update(...)')
+
     # noinspection PyTypeChecker
     self.openhab.req_put(f'/items/{self.name}/state', data=value)
 
+  def format_value(self, value: typing.Any) -> typing.Union[str, bytes]:
+    """Validate a value and format it the way it is sent to openHAB, without modifying the item.
+
+    Args:
+      value (object): The value to format. The type of the value depends on the item type and is checked accordingly.
+
+    Returns:
+      str or bytes: The value as sent to openHAB.
+    """
+    self._validate_value(value)
+
+    return self._rest_format(value)
+
+  def _prepare_value(self, value: typing.Any) -> typing.Union[str, bytes]:
+    """Validate and format a value before sending it to openHAB, and remember it as the new local state."""
+    v = self.format_value(value)
+
+    self._state = value
+    # openHAB may still convert or reject the value, so it must not be served from the cache
+    self._state_fetched_at = None
+
+    return v
+
+  @openhab.tracing.traced('update')
   def update(self, value: typing.Any) -> None:
     """Updates the state of an item.
 
@@ -224,14 +321,25 @@ class Item:
       value (object): The value to update the item with. The type of the value depends
                       on the item type and is checked accordingly.
     """
-    self._validate_value(value)
-
-    v = self._rest_format(value)
+    self._require_sync_client('await item.async_update(...)')
 
-    self._state = value
+    v = self._prepare_value(value)
 
     self._update(v)
 
+  @openhab.tracing.traced('async_update')
+  async def async_update(self, value: typing.Any) -> None:
+    """Updates the state of an item using an asynchronous client.
+
+    Args:
+      value (object): The value to update the item with. The type of the value depends
+                      on the item type and is checked accordingly.
+    """
+    v = self._prepare_value(value)
+
+    await self.openhab.req_put(f'/items/{self.name}/state', data=v)
+
+  @openhab.tracing.traced('command')
   def command(self, value: typing.Any) -> None:
     """Sends the given value as command to the event bus.
 
@@ -239,22 +347,37 @@ class Item:
       value (object): The value to send as command to the event bus. The type of the
                       value depends on the item type and is checked accordingly.
     """
-    self._validate_value(value)
-
-    v = self._rest_format(value)
+    self._require_sync_client('await item.async_command(...)')
 
-    self._state = value
+    v = self._prepare_value(value)
 
     self.openhab.req_post(f'/items/{self.name}', data=v)
 
+  @openhab.tracing.traced('async_command')
+  async def async_command(self, value: typing.Any) -> None:
+    """Sends the given value as command to the event bus using an asynchronous client.
+
+    Args:
+      value (object): The value to send as command to the event bus. The type of the
+                      value depends on the item type and is checked accordingly.
+    """
+    v = self._prepare_value(value)
+
+    await self.openhab.req_post(f'/items/{self.name}', data=v)
+
   def update_state_null(self) -> None:
     """Update the state of the item to *NULL*."""
+    self._require_sync_client("await item.async_update('NULL')")
+    self._state_fetched_at = None
     self._update('NULL')
 
   def update_state_undef(self) -> None:
     """Update the state of the item to *UNDEF*."""
+    self._require_sync_client("await item.async_update('UNDEF')")
+    self._state_fetched_at = None
     self._update('UNDEF')
 
+  @openhab.tracing.traced('is_state_null')
   def is_state_null(self) -> bool:
     """If the item state is None, use this method for checking if the remote value is NULL."""
     if self.state is None:
@@ -268,6 +391,7 @@ class Item:
 
     return False
 
+  @openhab.tracing.traced('is_state_undef')
   def is_state_undef(self) -> bool:
     """If the item state is None, use this method for checking if the remote value is UNDEF."""
     if self.state is None:
@@ -289,7 +413,9 @@ class Item:
     page: int = 0,
     page_length: int = 0,
     boundary: bool = False,
-  ) -> typing.Iterator[dict[str, typing.Union[str, int]]]:
+    prefetch: int = 0,
+    decoded: bool = False,
+  ) -> typing.Iterator[dict[str, typing.Any]]:
     """Method for fetching persistence data for a given item.
 
     Args:
@@ -299,14 +425,23 @@ class Item:
       page: Page number of data to return. Defaults to 0 if not provided.
       page_length: The length of each page. Defaults to 0 which disabled paging.
       boundary: Gets one value before and after the requested period.
+      prefetch: Number of pages to request ahead while the current page is being consumed.
+      decoded: If True, the time is returned as timezone aware datetime and the state is parsed like the
+               state of this item (see `decode_state`). Each distinct state is only parsed once.
 
     Returns:
       Iterator over dict values containing time and state value, e.g.
         {"time": 1695588900122,
          "state": "23"
         }
+      or if *decoded* is True, e.g.
+        {"time": datetime.datetime(2023, 9, 24, 20, 55, 0, 122000, tzinfo=datetime.timezone.utc),
+         "state": (23.0, '°C')
+        }
     """
-    yield from self.openhab.get_item_persistence(
+    self._require_sync_client('async for entry in client.get_item_persistence(item.name, ...)')
+
+    data = self.openhab.get_item_persistence(
       name=self.name,
       service_id=service_id,
       start_time=start_time,
@@ -314,8 +449,51 @@ class Item:
       page=page,
       page_length=page_length,
       boundary=boundary,
+      prefetch=prefetch,
     )
 
+    if not decoded:
+      yield from data
+      return
+
+    decode = functools.lru_cache(maxsize=1024)(self.decode_state)
+    utc = datetime.timezone.utc
+
+    for entry in data:
+      yield {'time': datetime.datetime.fromtimestamp(int(entry['time']) / 1000, tz=utc), 'state': decode(str(entry['state']))}
+
+  def decode_state(self, raw_state: str) -> typing.Any:
+    """Decode a persisted state of this item.
+
+    Args:
+      raw_state (str): A state as returned by the persistence REST API.
+
+    Returns:
+      The parsed value as `parse_state` returns it, or None for UNDEF/NULL.
+    """
+    return self.parse_state(raw_state)[0]
+
+
+class PartialItem(dict):
+  """Lightweight representation of an item as returned by an items query restricted to a subset of fields.
+
+  No state parsing or member construction takes place; the raw values are accessible both as dict
+  entries and as attributes, e.g. `partial_item.state` or `partial_item['state']`.
+  """
+
+  __slots__ = ()
+
+  def __getattr__(self, name: str) -> typing.Any:
+    """Return a field of the item."""
+    try:
+      return self[name]
+    except KeyError:
+      raise AttributeError(name) from None
+
+  def __repr__(self) -> str:
+    """String representation."""
+    return f'PartialItem({dict.__repr__(self)})'
+
 
 class GroupItem(Item):
   """String item type."""
@@ -392,7 +570,7 @@ class DateTimeItem(Item):
       datetime.datetime: The datetime.datetime object as converted from the string
                          parameter.
     """
-    return dateutil.parser.parse(value), ''
+    return openhab.command_types.parse_datetime(value), ''
 
   def _rest_format(self, value: datetime.datetime) -> str:  # type: ignore[override]
     """Format a value before submitting to openHAB.
@@ -457,9 +635,11 @@ class SwitchItem(Item):
 
   def toggle(self) -> None:
     """Toggle the state of the switch to OFF to ON and vice versa."""
-    if self.state == openhab.command_types.OnOffType.ON:
+    state = self.state
+
+    if state == openhab.command_types.OnOffType.ON:
       self.off()
-    elif self.state == openhab.command_types.OnOffType.OFF:
+    elif state == openhab.command_types.OnOffType.OFF:
       self.on()
 
 
@@ -470,6 +650,22 @@ class NumberItem(Item):
   types = [openhab.command_types.DecimalType]
   state_types = types
 
+  def decode_state(self, raw_state: str) -> typing.Optional[tuple[float, str]]:
+    """Decode a persisted state of this item.
+
+    Args:
+      raw_state (str): A state as returned by the persistence REST API, e.g. "21.5 °C".
+
+    Returns:
+      The value and unit of measure (an empty string if there is none), e.g. (21.5, '°C'), or None for UNDEF/NULL.
+    """
+    value, unit_of_measure = self.parse_state(raw_state)
+
+    if value is None:
+      return None
+
+    return value, unit_of_measure
+
   def _parse_rest(self, value: str) -> tuple[typing.Union[float, None], str]:  # type: ignore[override]
     """Parse a REST result into a native object.
 
@@ -482,9 +678,13 @@ class NumberItem(Item):
     """
     if value in ('UNDEF', 'NULL'):
       return None, ''
-    # m = re.match(r'''^(-?[0-9.]+)''', value)
+
+    plain = openhab.command_types.split_number(value)
+    if plain is not None:
+      return float(plain[0]), plain[1]
+
     try:
-      m = re.match(r'(-?[0-9.]+(?:[eE]-?[0-9]+)?)\s?(.*)?$', value)
+      m = openhab.command_types.NUMBER_PATTERN.match(value)
 
       if m:
         value = m.group(1)
@@ -529,6 +729,13 @@ class ContactItem(Item):
     """
     raise ValueError(f'This item ({self.__class__}) only supports updates, not commands!')
 
+  async def async_command(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+    """This overrides the `Item` async_command method.
+
+    Note: Commands are not accepted for items of type contact.
+    """
+    raise ValueError(f'This item ({self.__class__}) only supports updates, not commands!')
+
   def open(self) -> None:
     """Set the state of the contact item to OPEN."""
     self.state = openhab.command_types.OpenCloseType.OPEN
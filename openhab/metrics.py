@@ -0,0 +1,226 @@
+"""python library for accessing the openHAB REST API."""
+
+#
+# Georges Toth (c) 2016-present <georges@trypill.org>
+#
+# python-openhab is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python-openhab is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with python-openhab.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import collections
+import dataclasses
+import logging
+import math
+import re
+import threading
+import typing
+
+__author__ = 'Georges Toth <georges@trypill.org>'
+__license__ = 'AGPLv3+'
+
+# REST paths containing names, mapped to the endpoint templates they are reported under
+_ENDPOINT_TEMPLATES = [
+  (re.compile(r'^/items/[^/]+/metadata/[^/]+$'), '/items/{name}/metadata/{namespace}'),
+  (re.compile(r'^/items/[^/]+/members/[^/]+$'), '/items/{name}/members/{member}'),
+  (re.compile(r'^/items/[^/]+/(state|tags|members)$'), r'/items/{name}/\1'),
+  (re.compile(r'^/items/[^/]+$'), '/items/{name}'),
+  (re.compile(r'^/persistence/items/[^/]+$'), '/persistence/items/{name}'),
+  (re.compile(r'^/rules/[^/]+/([a-z]+)$'), r'/rules/{uid}/\1'),
+  (re.compile(r'^/rules/[^/]+$'), '/rules/{uid}'),
+]
+
+PERCENTILES = (50, 95, 99)
+
+
+def endpoint_template(uri_path: str) -> str:
+  """Return the endpoint template of a REST path, e.g. "/items/{name}/state" for "/items/light_kitchen/state"."""
+  path = uri_path.split('?', 1)[0]
+
+  for pattern, template in _ENDPOINT_TEMPLATES:
+    if pattern.match(path):
+      return pattern.sub(template, path)
+
+  return path
+
+
+@dataclasses.dataclass
+class Sample:
+  """A single measurement passed to the hooks of `Metrics`.
+
+  Attributes:
+    kind: 'request' for an HTTP request, 'decode' for decoding a JSON response, 'construct' for building items
+          from JSON data with `json_to_item`.
+    name: The endpoint, e.g. "GET /items/{name}", or for 'construct' the operation, e.g. "fetch_all_items".
+    duration: Duration in seconds.
+    status: HTTP status code of the response, or None if the request failed without a response.
+    request_bytes: Size of the request body.
+    response_bytes: Size of the response body.
+    count: Number of items built ('construct' only).
+  """
+
+  kind: str
+  name: str
+  duration: float
+  status: typing.Optional[int] = None
+  request_bytes: int = 0
+  response_bytes: int = 0
+  count: int = 0
+
+
+class _Series:
+  """Count, sum and a window of the most recent durations of one kind of measurement."""
+
+  def __init__(self, window: int) -> None:
+    self.count = 0
+    self.total = 0.0
+    self.recent: collections.deque[float] = collections.deque(maxlen=window)
+
+  def add(self, duration: float) -> None:
+    self.count += 1
+    self.total += duration
+    self.recent.append(duration)
+
+  def snapshot(self) -> dict[str, float]:
+    result = {'count': self.count, 'total': self.total, 'mean': self.total / self.count if self.count else 0.0}
+    ordered = sorted(self.recent)
+
+    for percentile in PERCENTILES:
+      # nearest-rank percentile of the recent durations
+      result[f'p{percentile}'] = ordered[max(0, math.ceil(percentile / 100 * len(ordered)) - 1)] if ordered else 0.0
+
+    result['max'] = ordered[-1] if ordered else 0.0
+
+    return result
+
+
+class Metrics:
+  """Per-endpoint instrumentation of the requests sent by a client.
+
+  For every endpoint template (e.g. "GET /items/{name}") the latency, the request and response bytes and the
+  response status codes are recorded; in addition the time spent decoding JSON responses and building items
+  from them is recorded separately, which tells whether e.g. a slow `fetch_all_items` is caused by the network,
+  JSON decoding or item construction.
+
+  ```python
+  metrics = Metrics()
+  oh = openhab.OpenHAB(base_url, metrics=metrics)
+  oh.fetch_all_items()
+
+  metrics.snapshot()['requests']['GET /items/']['latency']['p95']
+  metrics.add_hook(lambda sample: statsd.timing(f'openhab.{sample.kind}.{sample.name}', sample.duration))
+  ```
+
+  Percentiles are computed over the *window* most recent samples of each endpoint; counts and sums cover all
+  samples since the last `reset`.
+  """
+
+  def __init__(self, window: int = 1000, hooks: typing.Iterable[typing.Callable[[Sample], None]] = ()) -> None:
+    """Constructor.
+
+    Args:
+      window: Number of recent samples per endpoint the percentiles are computed from.
+      hooks: Functions called with every `Sample`, e.g. for exporting the samples to a monitoring system.
+    """
+    self.window = window
+    self.hooks = list(hooks)
+
+    self._lock = threading.Lock()
+    self._requests: dict[str, dict[str, typing.Any]] = {}
+    self._timings: dict[str, dict[str, _Series]] = {'decode': {}, 'construct': {}}
+    self._logger = logging.getLogger(__name__)
+
+  def add_hook(self, hook: typing.Callable[[Sample], None]) -> None:
+    """Add a function called with every `Sample`."""
+    self.hooks.append(hook)
+
+  def record_request(
+    self,
+    method: str,
+    uri_path: str,
+    duration: float,
+    status: typing.Optional[int],
+    request_bytes: int = 0,
+    response_bytes: int = 0,
+  ) -> None:
+    """Record an HTTP request.
+
+    Args:
+      method: The HTTP method.
+      uri_path: The REST path, which is reported under its endpoint template.
+      duration: Seconds from sending the request until the response was read.
+      status: The response status code, or None if the request failed without a response.
+      request_bytes: Size of the request body.
+      response_bytes: Size of the response body.
+    """
+    name = f'{method} {endpoint_template(uri_path)}'
+
+    with self._lock:
+      endpoint = self._requests.get(name)
+      if endpoint is None:
+        endpoint = self._requests[name] = {'latency': _Series(self.window), 'request_bytes': 0, 'response_bytes': 0, 'status': collections.Counter()}
+
+      endpoint['latency'].add(duration)
+      endpoint['request_bytes'] += request_bytes
+      endpoint['response_bytes'] += response_bytes
+      endpoint['status'][status if status is not None else 'error'] += 1
+
+    self._emit(Sample('request', name, duration, status, request_bytes, response_bytes))
+
+  def record_timing(self, kind: str, name: str, duration: float, count: int = 0) -> None:
+    """Record the time spent decoding a response ('decode') or building items ('construct')."""
+    with self._lock:
+      series = self._timings[kind].get(name)
+      if series is None:
+        series = self._timings[kind][name] = _Series(self.window)
+
+      series.add(duration)
+
+    self._emit(Sample(kind, name, duration, count=count))
+
+  def snapshot(self) -> dict[str, typing.Any]:
+    """Return the recorded metrics.
+
+    Returns:
+      A dict with the keys 'requests', mapping endpoint templates to their 'latency' statistics (count, total,
+      mean, p50, p95, p99 and max in seconds), 'request_bytes', 'response_bytes' and 'status' (a dict of status
+      code to count, with failed requests counted under 'error'); and 'decode' and 'construct', mapping
+      endpoints or operations to their duration statistics.
+    """
+    with self._lock:
+      return {
+        'requests': {
+          name: {
+            'latency': endpoint['latency'].snapshot(),
+            'request_bytes': endpoint['request_bytes'],
+            'response_bytes': endpoint['response_bytes'],
+            'status': dict(endpoint['status']),
+          }
+          for name, endpoint in self._requests.items()
+        },
+        **{kind: {name: series.snapshot() for name, series in timings.items()} for kind, timings in self._timings.items()},
+      }
+
+  def reset(self) -> None:
+    """Discard all recorded metrics."""
+    with self._lock:
+      self._requests.clear()
+      for timings in self._timings.values():
+        timings.clear()
+
+  def _emit(self, sample: Sample) -> None:
+    for hook in self.hooks:
+      try:
+        hook(sample)
+      except Exception:
+        # a failing monitoring hook must not break requests
+        self._logger.exception('Metrics hook %r failed', hook)
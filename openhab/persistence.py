@@ -0,0 +1,627 @@
+"""python library for accessing the openHAB REST API."""
+
+#
+# Georges Toth (c) 2016-present <georges@trypill.org>
+#
+# python-openhab is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python-openhab is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with python-openhab.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import collections
+import concurrent.futures
+import contextvars
+import dataclasses
+import datetime
+import logging
+import time
+import typing
+
+import httpx
+
+import openhab.exceptions
+import openhab.items
+import openhab.persistence_cache
+import openhab.tracing
+
+if typing.TYPE_CHECKING:
+  import numpy as np
+
+__author__ = 'Georges Toth <georges@trypill.org>'
+__license__ = 'AGPLv3+'
+
+
+def to_millis(value: datetime.datetime) -> int:
+  """Convert a datetime into milliseconds since the epoch, as used for persistence timestamps."""
+  return int(value.timestamp() * 1000)
+
+
+def from_millis(value: int) -> datetime.datetime:
+  """Convert milliseconds since the epoch into a timezone aware datetime."""
+  return datetime.datetime.fromtimestamp(value / 1000, tz=datetime.timezone.utc)
+
+
+def format_time(value: typing.Union[datetime.datetime, int]) -> str:
+  """Format a datetime, or milliseconds since the epoch, as expected by the persistence REST API for writing.
+
+  Naive datetimes are taken to be in local time.
+  """
+  if isinstance(value, datetime.datetime):
+    value = value.astimezone()
+  else:
+    value = from_millis(value)
+
+  return f'{value:%Y-%m-%dT%H:%M:%S}.{value.microsecond // 1000:03d}{value:%z}'
+
+
+def import_numpy() -> typing.Any:
+  """Import numpy, which is an optional dependency only needed for columnar results."""
+  try:
+    import numpy as np  # noqa: PLC0415
+  except ImportError as exc:
+    raise ImportError('Columnar persistence results require numpy; install python-openhab[numpy].') from exc
+
+  return np
+
+
+@dataclasses.dataclass
+class PersistenceColumns:
+  """Persistence data of a single item in columnar form.
+
+  Attributes:
+    name: The item name.
+    time: int64 array of the timestamps in milliseconds since the epoch.
+    values: Array of the decoded values; float64 for number, dimmer and rollershutter items, float64 of
+            shape (n, 3) for color and location items, datetime64[ms] for datetime items and object for
+            all other item types.
+    mask: bool array which is True where the persisted state was UNDEF or NULL. The corresponding entries
+          in `values` are NaN, NaT or None.
+    unit: The unit of measure of the values, or an empty string if there is none.
+  """
+
+  name: str
+  time: 'np.ndarray'
+  values: 'np.ndarray'
+  mask: 'np.ndarray'
+  unit: str = ''
+
+  def __len__(self) -> int:
+    """Return the number of data points."""
+    return len(self.time)
+
+
+def to_columns(item: openhab.items.Item, data: typing.Iterable[dict[str, typing.Union[str, int]]]) -> PersistenceColumns:
+  """Convert persistence data into columnar form, decoding the states with the parser of the given item.
+
+  Args:
+    item: The item the persistence data belongs to.
+    data: Persistence data as returned by `OpenHAB.get_item_persistence`.
+
+  Returns:
+    The persistence data as `PersistenceColumns`.
+  """
+  np = import_numpy()
+
+  times: list[int] = []
+  values: list[typing.Any] = []
+  mask: list[bool] = []
+  unit = ''
+
+  for entry in data:
+    value, unit_of_measure = item.parse_state(str(entry['state']))
+    times.append(int(entry['time']))
+    values.append(value)
+    mask.append(value is None)
+
+    if unit_of_measure and not unit:
+      unit = unit_of_measure
+
+  if isinstance(item, (openhab.items.ColorItem, openhab.items.LocationItem)):
+    nan = (float('nan'),) * 3
+    array = np.array([nan if value is None else value for value in values], dtype=np.float64).reshape(-1, 3)
+  elif isinstance(item, (openhab.items.NumberItem, openhab.items.DimmerItem, openhab.items.RollershutterItem)):
+    array = np.array([float('nan') if value is None else value for value in values], dtype=np.float64)
+  elif isinstance(item, openhab.items.DateTimeItem):
+    array = np.array(['NaT' if value is None else int(value.timestamp() * 1000) for value in values], dtype='datetime64[ms]')
+  else:
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+
+  return PersistenceColumns(
+    name=item.name,
+    time=np.array(times, dtype=np.int64),
+    values=array,
+    mask=np.array(mask, dtype=bool),
+    unit=unit,
+  )
+
+
+@dataclasses.dataclass
+class PersistenceMatrix:
+  """Persistence data of several items aligned to a common time axis.
+
+  Attributes:
+    time: int64 array of the timestamps in milliseconds since the epoch, one per row.
+    values: float64 array of shape (len(time), len(columns)); NaN where an item has no value.
+    columns: The item names, one per column.
+    units: The unit of measure of each column, or an empty string if there is none.
+  """
+
+  time: 'np.ndarray'
+  values: 'np.ndarray'
+  columns: list[str]
+  units: list[str]
+
+  def column(self, name: str) -> 'np.ndarray':
+    """Return the values of a single item."""
+    return self.values[:, self.columns.index(name)]
+
+
+ALIGN_METHODS = (None, 'ffill', 'nearest', 'drop')
+
+
+def align(columns: typing.Sequence[PersistenceColumns], how: typing.Optional[str] = None) -> PersistenceMatrix:
+  """Align the persistence data of several numeric items to the union of their timestamps.
+
+  Args:
+    columns: The persistence data of each item, e.g. as returned by `Persistence.get_columns`.
+    how: How to fill the rows where an item has no data point of its own:
+         None leaves them NaN, 'ffill' uses the last preceding value, 'nearest' the value closest in time
+         and 'drop' removes all rows where not every item has a data point.
+
+  Returns:
+    The aligned data as `PersistenceMatrix`.
+  """
+  np = import_numpy()
+
+  if how not in ALIGN_METHODS:
+    raise ValueError(f'how must be one of {ALIGN_METHODS}')
+
+  for column in columns:
+    if column.values.dtype != np.float64 or column.values.ndim != 1:
+      raise ValueError(f'Item "{column.name}" is not numeric and cannot be aligned')
+
+  grid = np.unique(np.concatenate([column.time for column in columns])) if columns else np.empty(0, dtype=np.int64)
+  values = np.full((len(grid), len(columns)), np.nan)
+  present = np.ones(len(grid), dtype=bool)
+
+  for index, column in enumerate(columns):
+    if not len(column):
+      present[:] = False
+      continue
+
+    right = np.searchsorted(column.time, grid)
+    clipped = np.minimum(right, len(column) - 1)
+    exact = column.time[clipped] == grid
+
+    if how == 'ffill':
+      position = np.searchsorted(column.time, grid, side='right') - 1
+      values[:, index] = np.where(position >= 0, column.values[np.maximum(position, 0)], np.nan)
+    elif how == 'nearest':
+      left = np.maximum(right - 1, 0)
+      use_left = np.abs(grid - column.time[left]) <= np.abs(column.time[clipped] - grid)
+      values[:, index] = column.values[np.where(use_left, left, clipped)]
+    else:
+      values[:, index] = np.where(exact, column.values[clipped], np.nan)
+
+    present &= exact
+
+  if how == 'drop':
+    grid = grid[present]
+    values = values[present]
+
+  return PersistenceMatrix(time=grid, values=values, columns=[column.name for column in columns], units=[column.unit for column in columns])
+
+
+@dataclasses.dataclass
+class BackfillReport:
+  """Result of writing data points with `Persistence.write`.
+
+  Attributes:
+    written: Number of data points written successfully.
+    failed: The timestamp, value and last error of each data point which could not be written.
+    retries: Number of requests which were repeated after an error.
+    elapsed: Duration of the whole import in seconds.
+  """
+
+  written: int = 0
+  failed: list[tuple[typing.Any, typing.Any, Exception]] = dataclasses.field(default_factory=list)
+  retries: int = 0
+  elapsed: float = 0.0
+
+  @property
+  def points_per_second(self) -> float:
+    """Throughput of the import."""
+    return self.written / self.elapsed if self.elapsed else 0.0
+
+
+class Persistence:
+  """Higher level access to openHAB persistence data."""
+
+  def __init__(self, openhab_conn: 'openhab.client.OpenHAB') -> None:
+    """Constructor.
+
+    Args:
+      openhab_conn (openhab.OpenHAB): openHAB object.
+    """
+    self.openhab = openhab_conn
+    self.logger = logging.getLogger(__name__)
+
+  @openhab.tracing.traced('persistence.get_sharded')
+  def get_sharded(
+    self,
+    name: str,
+    start_time: datetime.datetime,
+    end_time: datetime.datetime,
+    shards: int = 4,
+    service_id: typing.Optional[str] = None,
+    boundary: bool = False,
+    page_length: int = 0,
+    max_workers: typing.Optional[int] = None,
+  ) -> typing.Iterator[dict[str, typing.Union[str, int]]]:
+    """Fetch persistence data for a long time range by splitting it into windows fetched in parallel.
+
+    The range from *start_time* to *end_time* is split into *shards* windows of equal length, each of
+    which is fetched through `OpenHAB.get_item_persistence` in its own thread. The results are streamed
+    in time order as soon as all preceding windows are complete.
+
+    Args:
+      name: The item name persistence data should be fetched for.
+      start_time: Start time of the data to return.
+      end_time: End time of the data to return.
+      shards: Number of time windows to split the range into.
+      service_id: ID of the persistence service. If not provided the default service will be used.
+      boundary: Gets one value before and after the requested period. Only the outermost windows request
+                boundary values, and points on the inner window boundaries are returned only once.
+      page_length: Optional page length used within each window.
+      max_workers: Maximum number of windows fetched at the same time; defaults to *shards*.
+
+    Returns:
+      Iterator over dict values containing time and state value, as `OpenHAB.get_item_persistence`.
+    """
+    if shards < 1:
+      raise ValueError('shards must be at least 1')
+
+    if end_time <= start_time:
+      raise ValueError('end_time must be after start_time')
+
+    start_ms = to_millis(start_time)
+    end_ms = to_millis(end_time)
+    windows = self._split(start_ms, end_ms, shards)
+
+    def fetch(index: int) -> list[dict[str, typing.Union[str, int]]]:
+      lower, upper = windows[index]
+      first = index == 0
+      last = index == len(windows) - 1
+
+      # the inner window edges are whole milliseconds, so that the windows queried and the windows the points
+      # are assigned to below are the same
+      data = self.openhab.get_item_persistence(
+        name,
+        service_id=service_id,
+        start_time=start_time if first else from_millis(lower),
+        end_time=end_time if last else from_millis(upper),
+        page_length=page_length,
+        boundary=boundary and (first or last),
+      )
+
+      # every window owns [lower, upper[, except the last one which also owns end_time; boundary values outside
+      # the requested range are only kept from the outermost windows
+
+      return [
+        entry
+        for entry in data
+        if (lower <= int(entry['time']) < upper)
+        or (last and int(entry['time']) == end_ms)
+        or (first and int(entry['time']) < start_ms)
+        or (last and int(entry['time']) > end_ms)
+      ]
+
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers or len(windows), thread_name_prefix='openhab-shard')
+
+    try:
+      futures = [executor.submit(contextvars.copy_context().run, fetch, index) for index in range(len(windows))]
+      last_entry: typing.Optional[dict[str, typing.Union[str, int]]] = None
+
+      for future in futures:
+        for entry in future.result():
+          if last_entry is not None and entry['time'] == last_entry['time'] and entry['state'] == last_entry['state']:
+            continue
+
+          last_entry = entry
+          yield entry
+    finally:
+      # do not wait for the remaining windows if the iteration is abandoned
+      executor.shutdown(wait=False, cancel_futures=True)
+
+  @staticmethod
+  def _split(start: int, end: int, shards: int) -> list[tuple[int, int]]:
+    """Split a time range in milliseconds since the epoch into at most *shards* windows of (almost) equal length."""
+    shards = max(1, min(shards, end - start))
+
+    edges = [start + (end - start) * index // shards for index in range(shards + 1)]
+
+    return list(zip(edges, edges[1:]))
+
+  def get_columns(
+    self,
+    item: typing.Union[str, openhab.items.Item],
+    service_id: typing.Optional[str] = None,
+    start_time: typing.Optional[datetime.datetime] = None,
+    end_time: typing.Optional[datetime.datetime] = None,
+    page_length: int = 0,
+    boundary: bool = False,
+    prefetch: int = 0,
+  ) -> PersistenceColumns:
+    """Fetch persistence data of an item as columnar NumPy arrays instead of one dict per data point.
+
+    This requires numpy to be installed (``pip install python-openhab[numpy]``).
+
+    Args:
+      item: The item, or the name of the item, persistence data should be fetched for. If a name is given
+            the item is fetched first, as its type determines how the states are decoded.
+      service_id: ID of the persistence service. If not provided the default service will be used.
+      start_time: Start time of the data to return. Will default to 1 day before end_time.
+      end_time: End time of the data to return. Will default to current time.
+      page_length: The length of each page. Defaults to 0 which disabled paging.
+      boundary: Gets one value before and after the requested period.
+      prefetch: Number of pages to request ahead while the current page is being consumed.
+
+    Returns:
+      The persistence data as `PersistenceColumns`.
+    """
+    if isinstance(item, str):
+      item = self.openhab.get_item(item)
+
+    data = self.openhab.get_item_persistence(
+      item.name,
+      service_id=service_id,
+      start_time=start_time,
+      end_time=end_time,
+      page_length=page_length,
+      boundary=boundary,
+      prefetch=prefetch,
+    )
+
+    return to_columns(item, data)
+
+  def get_cached(
+    self,
+    name: str,
+    service_id: typing.Optional[str] = None,
+    start_time: typing.Optional[datetime.datetime] = None,
+    end_time: typing.Optional[datetime.datetime] = None,
+    page_length: int = 0,
+    prefetch: int = 0,
+    cache: typing.Optional[openhab.persistence_cache.PersistenceCache] = None,
+  ) -> typing.Iterator[dict[str, typing.Union[str, int]]]:
+    """Fetch persistence data through a local cache, requesting only the time ranges not cached yet.
+
+    Typically only the tail since the previous call is fetched from openHAB. Time ranges reaching into the
+    future are only marked as cached up to the current time, so that data persisted later is fetched on the
+    next call.
+
+    Args:
+      name: The item name persistence data should be fetched for.
+      service_id: ID of the persistence service. If not provided the default service will be used.
+      start_time: Start time of the data to return. Will default to 1 day before end_time.
+      end_time: End time of the data to return. Will default to current time.
+      page_length: The length of each page used for fetching missing ranges. Defaults to 0 which disabled paging.
+      prefetch: Number of pages to request ahead while fetching missing ranges.
+      cache: The cache to use; defaults to the `persistence_cache` of the openHAB object.
+
+    Returns:
+      Iterator over dict values containing time and state value, as `OpenHAB.get_item_persistence`.
+    """
+    cache = cache or self.openhab.persistence_cache
+    if cache is None:
+      raise ValueError('No persistence cache configured')
+
+    # naive datetimes are taken to be in local time, as by `to_millis`, so that they can be compared with now
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    end_time = end_time.astimezone() if end_time is not None else now
+    start_time = start_time.astimezone() if start_time is not None else end_time - datetime.timedelta(days=1)
+
+    if end_time <= start_time:
+      raise ValueError('end_time must be after start_time')
+
+    key = service_id or ''
+    start = to_millis(start_time)
+    end = to_millis(end_time)
+
+    for gap_start, gap_end in cache.missing(key, name, start, end):
+      data = list(
+        self.openhab.get_item_persistence(
+          name,
+          service_id=service_id,
+          start_time=from_millis(gap_start),
+          end_time=from_millis(gap_end),
+          page_length=page_length,
+          prefetch=prefetch,
+          cached=False,
+        )
+      )
+      self.logger.debug('Fetched %d data points of "%s" between %d and %d', len(data), name, gap_start, gap_end)
+
+      cache.store(key, name, gap_start, min(gap_end, to_millis(now)), data)
+
+    yield from cache.query(key, name, start, end)
+
+  def get_memory_cached(
+    self,
+    name: str,
+    service_id: typing.Optional[str],
+    start_time: datetime.datetime,
+    end_time: datetime.datetime,
+    page_length: int = 0,
+    boundary: bool = False,
+    prefetch: int = 0,
+    cache: typing.Optional[openhab.persistence_cache.LRUPersistenceCache] = None,
+  ) -> typing.Iterator[dict[str, typing.Union[str, int]]]:
+    """Fetch persistence data through an in-memory cache of query results.
+
+    On a miss the data is fetched (through the `persistence_cache` of the openHAB object, if configured and
+    possible) and streamed while it is being collected for the cache; results exceeding the memory budget of
+    the cache and results of ranges ending in the future are not cached.
+
+    Args:
+      name: The item name persistence data should be fetched for.
+      service_id: ID of the persistence service. If not provided the default service will be used.
+      start_time: Start time of the data to return.
+      end_time: End time of the data to return.
+      page_length: The length of each page used on a miss. Defaults to 0 which disabled paging.
+      boundary: Gets one value before and after the requested period.
+      prefetch: Number of pages to request ahead on a miss.
+      cache: The cache to use; defaults to the `persistence_memory_cache` of the openHAB object.
+
+    Returns:
+      Iterator over dict values containing time and state value, as `OpenHAB.get_item_persistence`.
+    """
+    cache = cache or self.openhab.persistence_memory_cache
+    if cache is None:
+      raise ValueError('No persistence memory cache configured')
+
+    key = service_id or ''
+    start = to_millis(start_time)
+    end = to_millis(end_time)
+
+    result = cache.get(key, name, start, end, boundary)
+    if result is not None:
+      yield from result
+      return
+
+    if self.openhab.persistence_cache is not None and not boundary:
+      data = self.get_cached(name, service_id, start_time, end_time, page_length=page_length, prefetch=prefetch)
+    else:
+      data = self.openhab.get_item_persistence(
+        name,
+        service_id=service_id,
+        start_time=start_time,
+        end_time=end_time,
+        page_length=page_length,
+        boundary=boundary,
+        prefetch=prefetch,
+        cached=False,
+      )
+
+    # data persisted later may still be added to a range reaching into the future, so only past ranges are cached
+    collected: typing.Optional[list[dict[str, typing.Union[str, int]]]] = [] if end <= to_millis(datetime.datetime.now(tz=datetime.timezone.utc)) else None
+    size = 0
+
+    for entry in data:
+      if collected is not None:
+        collected.append(entry)
+        size += cache.estimate_size(entry)
+
+        if size > cache.max_bytes:
+          # too large for the cache anyway, stop collecting
+          collected = None
+
+      yield entry
+
+    if collected is not None:
+      cache.put(key, name, start, end, boundary, collected, size=size)
+
+  @openhab.tracing.traced('persistence.write')
+  def write(
+    self,
+    item: typing.Union[str, openhab.items.Item],
+    points: typing.Iterable[tuple[typing.Union[datetime.datetime, int], typing.Any]],
+    service_id: typing.Optional[str] = None,
+    max_workers: int = 8,
+    retries: int = 2,
+    retry_delay: float = 0.5,
+  ) -> BackfillReport:
+    """Write historical data points into a persistence service, e.g. for migrating or backfilling sensor history.
+
+    Each data point is validated and formatted by the item, as `Item.update` does, and written with a
+    ``PUT /persistence/items/{name}`` request. Up to *max_workers* requests are in flight at the same time,
+    sharing the connection pool of the openHAB session; *points* is consumed lazily, so arbitrarily long
+    iterables can be imported.
+
+    Args:
+      item: The item, or the name of the item, to write data points for.
+      points: Iterable of (timestamp, value) pairs; the timestamp is either a datetime or milliseconds since
+              the epoch, e.g. ``zip(columns.time, columns.values)``.
+      service_id: ID of the persistence service. If not provided the default service will be used.
+      max_workers: Maximum number of requests in flight at the same time.
+      retries: Number of times a failed request is repeated, waiting *retry_delay* seconds, doubled on each
+               attempt, in between. Invalid values and requests rejected with a 4xx status are not retried.
+      retry_delay: Seconds to wait before the first retry.
+
+    Returns:
+      BackfillReport: The number of written points, the points which failed and the throughput.
+    """
+    if max_workers < 1:
+      raise ValueError('max_workers must be at least 1')
+
+    if isinstance(item, str):
+      item = self.openhab.get_item(item)
+
+    report = BackfillReport()
+    url = f'/persistence/items/{item.name}'
+
+    def write_point(timestamp: typing.Union[datetime.datetime, int], value: typing.Any) -> tuple[typing.Optional[Exception], int]:
+      if type(value).__module__ == 'numpy':
+        value = value.item()
+
+      try:
+        state = item.format_value(value)
+        params = {'time': format_time(timestamp if isinstance(timestamp, datetime.datetime) else int(timestamp))}
+      except ValueError as exc:
+        return exc, 0
+
+      params['state'] = state.decode('utf-8') if isinstance(state, bytes) else state
+      if service_id is not None:
+        params['serviceId'] = service_id
+
+      attempt = 0
+
+      while True:
+        try:
+          self.openhab.req_put(url, params=params)
+        except (httpx.HTTPError, openhab.exceptions.OpenHABException) as exc:
+          if attempt == retries or (isinstance(exc, httpx.HTTPStatusError) and exc.response.is_client_error):
+            return exc, attempt
+
+          time.sleep(retry_delay * 2**attempt)
+          attempt += 1
+        else:
+          return None, attempt
+
+    def collect(future: concurrent.futures.Future, timestamp: typing.Any, value: typing.Any) -> None:
+      error, attempts = future.result()
+      report.retries += attempts
+
+      if error is None:
+        report.written += 1
+      else:
+        self.logger.debug('Writing %s=%s of "%s" failed: %s', timestamp, value, item.name, error)
+        report.failed.append((timestamp, value, error))
+
+    start = time.perf_counter()
+    pending: collections.deque[tuple[concurrent.futures.Future, typing.Any, typing.Any]] = collections.deque()
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='openhab-backfill') as executor:
+      for timestamp, value in points:
+        if len(pending) >= 2 * max_workers:
+          collect(*pending.popleft())
+
+        pending.append((executor.submit(contextvars.copy_context().run, write_point, timestamp, value), timestamp, value))
+
+      while pending:
+        collect(*pending.popleft())
+
+    report.elapsed = time.perf_counter() - start
+    self.logger.info('Wrote %d data points of "%s" (%d failed) at %.0f points/s', report.written, item.name, len(report.failed), report.points_per_second)
+
+    return report
@@ -0,0 +1,292 @@
+"""python library for accessing the openHAB REST API."""
+
+#
+# Georges Toth (c) 2016-present <georges@trypill.org>
+#
+# python-openhab is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python-openhab is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with python-openhab.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import abc
+import bisect
+import collections
+import os
+import sqlite3
+import sys
+import threading
+import typing
+
+__author__ = 'Georges Toth <georges@trypill.org>'
+__license__ = 'AGPLv3+'
+
+
+class PersistenceCache(abc.ABC):
+  """Base class of local caches for persistence data.
+
+  A cache stores the data points of an item, keyed by persistence service and item name, together with the
+  time ranges for which it holds all data points. All times are milliseconds since the epoch and all ranges
+  are inclusive. The default persistence service is represented by an empty *service_id*.
+  """
+
+  @abc.abstractmethod
+  def missing(self, service_id: str, name: str, start: int, end: int) -> list[tuple[int, int]]:
+    """Return the sub-ranges of [start, end] not covered by the cache, in ascending order."""
+
+  @abc.abstractmethod
+  def store(self, service_id: str, name: str, start: int, end: int, data: typing.Iterable[dict[str, typing.Union[str, int]]]) -> None:
+    """Store all data points of the range [start, end] and mark the range as covered.
+
+    If *end* is before *start* only the data points are stored, without marking any range as covered.
+    """
+
+  @abc.abstractmethod
+  def query(self, service_id: str, name: str, start: int, end: int) -> list[dict[str, typing.Union[str, int]]]:
+    """Return the cached data points within [start, end], ordered by time."""
+
+  @abc.abstractmethod
+  def clear(self, service_id: typing.Optional[str] = None, name: typing.Optional[str] = None) -> None:
+    """Remove cached data, optionally restricted to a persistence service and/or item."""
+
+  @staticmethod
+  def gaps(covered: typing.Iterable[tuple[int, int]], start: int, end: int) -> list[tuple[int, int]]:
+    """Return the sub-ranges of [start, end] not within the given covered ranges, which must be sorted by start."""
+    result = []
+    cursor = start
+
+    for covered_start, covered_end in covered:
+      if covered_end < cursor:
+        continue
+
+      if covered_start > end:
+        break
+
+      if covered_start > cursor:
+        result.append((cursor, covered_start))
+
+      cursor = max(cursor, covered_end)
+
+      if cursor >= end:
+        break
+
+    if cursor < end:
+      result.append((cursor, end))
+
+    return result
+
+
+class SQLitePersistenceCache(PersistenceCache):
+  """Persistence cache stored in a SQLite database.
+
+  ```python
+  oh = openhab.OpenHAB(base_url, persistence_cache=SQLitePersistenceCache('persistence.db'))
+
+  # the first call fetches the whole day from openHAB, later calls only fetch data newer than the last call
+  data = list(oh.get_item('Dining_Temperature').persistence(start_time=midnight))
+  ```
+  """
+
+  def __init__(self, path: typing.Union[str, os.PathLike] = ':memory:') -> None:
+    """Constructor.
+
+    Args:
+      path: Path of the SQLite database file, which is created if it does not exist yet.
+    """
+    self._lock = threading.Lock()
+    self._db = sqlite3.connect(path, check_same_thread=False)
+
+    with self._db:
+      self._db.execute(
+        'CREATE TABLE IF NOT EXISTS points (service_id TEXT, name TEXT, time INTEGER, state TEXT, PRIMARY KEY (service_id, name, time)) WITHOUT ROWID'
+      )
+      self._db.execute('CREATE TABLE IF NOT EXISTS ranges (service_id TEXT, name TEXT, start INTEGER, end INTEGER)')
+      self._db.execute('CREATE INDEX IF NOT EXISTS ranges_key ON ranges (service_id, name, start)')
+
+  def missing(self, service_id: str, name: str, start: int, end: int) -> list[tuple[int, int]]:
+    """Return the sub-ranges of [start, end] not covered by the cache, in ascending order."""
+    with self._lock:
+      covered = self._db.execute(
+        'SELECT start, end FROM ranges WHERE service_id = ? AND name = ? AND start <= ? AND end >= ? ORDER BY start',
+        (service_id, name, end, start),
+      ).fetchall()
+
+    return self.gaps(covered, start, end)
+
+  def store(self, service_id: str, name: str, start: int, end: int, data: typing.Iterable[dict[str, typing.Union[str, int]]]) -> None:
+    """Store all data points of the range [start, end] and mark the range as covered."""
+    rows = [(service_id, name, int(entry['time']), str(entry['state'])) for entry in data]
+
+    with self._lock, self._db:
+      self._db.executemany('INSERT OR REPLACE INTO points VALUES (?, ?, ?, ?)', rows)
+
+      if end < start:
+        return
+
+      # merge the new range with all ranges it overlaps or touches
+      start, end = self._db.execute(
+        'SELECT MIN(COALESCE(MIN(start), :start), :start), MAX(COALESCE(MAX(end), :end), :end) FROM ranges '
+        'WHERE service_id = :service_id AND name = :name AND start <= :end + 1 AND end >= :start - 1',
+        {'service_id': service_id, 'name': name, 'start': start, 'end': end},
+      ).fetchone()
+      self._db.execute('DELETE FROM ranges WHERE service_id = ? AND name = ? AND start >= ? AND end <= ?', (service_id, name, start, end))
+      self._db.execute('INSERT INTO ranges VALUES (?, ?, ?, ?)', (service_id, name, start, end))
+
+  def query(self, service_id: str, name: str, start: int, end: int) -> list[dict[str, typing.Union[str, int]]]:
+    """Return the cached data points within [start, end], ordered by time."""
+    with self._lock:
+      rows = self._db.execute(
+        'SELECT time, state FROM points WHERE service_id = ? AND name = ? AND time BETWEEN ? AND ? ORDER BY time',
+        (service_id, name, start, end),
+      ).fetchall()
+
+    return [{'time': time, 'state': state} for time, state in rows]
+
+  def clear(self, service_id: typing.Optional[str] = None, name: typing.Optional[str] = None) -> None:
+    """Remove cached data, optionally restricted to a persistence service and/or item."""
+    condition = ' AND '.join(f'{column} = ?' for column, value in (('service_id', service_id), ('name', name)) if value is not None) or '1'
+    params = [value for value in (service_id, name) if value is not None]
+
+    with self._lock, self._db:
+      self._db.execute(f'DELETE FROM points WHERE {condition}', params)  # noqa: S608
+      self._db.execute(f'DELETE FROM ranges WHERE {condition}', params)  # noqa: S608
+
+  def close(self) -> None:
+    """Close the database."""
+    self._db.close()
+
+
+class LRUPersistenceCache:
+  """In-memory cache of persistence query results with a memory budget and least-recently-used eviction.
+
+  Results are keyed by persistence service, item name, time range and boundary flag. A query is served from
+  any cached result of a range containing the requested one, e.g. zooming into a chart does not cause a new
+  request. Unlike `PersistenceCache`, ranges are never merged or completed.
+
+  ```python
+  oh = openhab.OpenHAB(base_url, persistence_memory_cache=LRUPersistenceCache(max_bytes=64 * 2**20))
+  ```
+  """
+
+  def __init__(self, max_bytes: int = 64 * 2**20) -> None:
+    """Constructor.
+
+    Args:
+      max_bytes: Approximate upper limit of the memory used by the cached data points.
+    """
+    self.max_bytes = max_bytes
+    self.size = 0
+    self.hits = 0
+    self.misses = 0
+    self.evictions = 0
+
+    self._lock = threading.Lock()
+    self._entries: collections.OrderedDict[tuple[str, str, int, int, bool], tuple[list[int], list[dict[str, typing.Union[str, int]]]]] = (
+      collections.OrderedDict()
+    )
+    self._sizes: dict[tuple[str, str, int, int, bool], int] = {}
+
+  @staticmethod
+  def estimate_size(entry: dict[str, typing.Union[str, int]]) -> int:
+    """Return the approximate memory used by a single data point."""
+    return sys.getsizeof(entry) + sys.getsizeof(entry['time']) + sys.getsizeof(entry['state'])
+
+  def get(self, service_id: str, name: str, start: int, end: int, boundary: bool) -> typing.Optional[list[dict[str, typing.Union[str, int]]]]:
+    """Return the data points of [start, end] from a cached result of a containing range, or None on a miss."""
+    with self._lock:
+      for key, (times, data) in reversed(self._entries.items()):
+        if key[:2] != (service_id, name) or key[2] > start or key[3] < end:
+          continue
+
+        result = self._slice(times, data, key[2], key[3], key[4], start, end, boundary)
+        if result is None:
+          continue
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result
+
+      self.misses += 1
+      return None
+
+  def put(
+    self, service_id: str, name: str, start: int, end: int, boundary: bool, data: list[dict[str, typing.Union[str, int]]], size: typing.Optional[int] = None
+  ) -> None:
+    """Cache the result of a query, evicting the least recently used results if the memory budget is exceeded.
+
+    Args:
+      service_id: ID of the persistence service, or an empty string for the default service.
+      name: The item name.
+      start: Start of the queried range in milliseconds since the epoch.
+      end: End of the queried range in milliseconds since the epoch.
+      boundary: Whether the result contains the boundary values before and after the range.
+      data: The data points ordered by time.
+      size: The size of the data as computed by `estimate_size`, if already known.
+    """
+    if size is None:
+      size = sum(self.estimate_size(entry) for entry in data)
+
+    if size > self.max_bytes:
+      return
+
+    key = (service_id, name, start, end, boundary)
+
+    with self._lock:
+      if key in self._entries:
+        self.size -= self._sizes[key]
+
+      self._entries[key] = ([int(entry['time']) for entry in data], data)
+      self._entries.move_to_end(key)
+      self._sizes[key] = size
+      self.size += size
+
+      while self.size > self.max_bytes:
+        evicted, _ = self._entries.popitem(last=False)
+        self.size -= self._sizes.pop(evicted)
+        self.evictions += 1
+
+  def clear(self) -> None:
+    """Remove all cached results."""
+    with self._lock:
+      self._entries.clear()
+      self._sizes.clear()
+      self.size = 0
+
+  @staticmethod
+  def _slice(
+    times: list[int],
+    data: list[dict[str, typing.Union[str, int]]],
+    cached_start: int,
+    cached_end: int,
+    cached_boundary: bool,
+    start: int,
+    end: int,
+    boundary: bool,
+  ) -> typing.Optional[list[dict[str, typing.Union[str, int]]]]:
+    """Extract the result of a query for [start, end] from the result of a containing range, if possible."""
+    first = bisect.bisect_left(times, start)
+    last = bisect.bisect_right(times, end)
+
+    if boundary:
+      # the boundary values are known if they are within the cached range, or if the cached result has
+      # boundary values itself (which are then the boundary values of this query as well)
+      has_before = first > 0 and (cached_boundary or times[first - 1] >= cached_start)
+      has_after = last < len(times) and (cached_boundary or times[last] <= cached_end)
+
+      if not cached_boundary and not (has_before and has_after):
+        return None
+
+      if has_before:
+        first -= 1
+      if has_after:
+        last += 1
+
+    return data[first:last]
@@ -0,0 +1,161 @@
+"""python library for accessing the openHAB REST API."""
+
+#
+# Georges Toth (c) 2016-present <georges@trypill.org>
+#
+# python-openhab is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python-openhab is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with python-openhab.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import dataclasses
+import random
+import threading
+import time
+import typing
+
+import httpx
+
+import openhab.exceptions
+
+__author__ = 'Georges Toth <georges@trypill.org>'
+__license__ = 'AGPLv3+'
+
+
+@dataclasses.dataclass
+class RetryPolicy:
+  """Policy for repeating requests which failed due to a transient error, e.g. while openHAB restarts.
+
+  Requests are repeated after connection errors, timeouts and responses with one of the *statuses*, waiting
+  an exponentially growing delay with "full jitter" (a random delay between 0 and the exponential delay)
+  in between, so that many clients do not retry in lockstep.
+
+  Attributes:
+    max_attempts: Maximum number of attempts of a request, including the first one.
+    backoff: Delay in seconds before the first retry; doubled for every further retry.
+    max_backoff: Upper limit of the delay in seconds.
+    methods: The HTTP methods which are retried. Only the idempotent GET and PUT are retried by default;
+             add POST for retrying commands, which may then be executed twice.
+    statuses: The response status codes which are retried.
+  """
+
+  max_attempts: int = 3
+  backoff: float = 0.5
+  max_backoff: float = 10.0
+  methods: frozenset[str] = frozenset({'GET', 'PUT'})
+  statuses: frozenset[int] = frozenset({429, 502, 503, 504})
+
+  def should_retry(self, method: str, attempt: int, response: typing.Optional[httpx.Response] = None) -> bool:
+    """Return whether a request should be repeated.
+
+    Args:
+      method: The HTTP method of the request.
+      attempt: The number of the failed attempt, starting at 0.
+      response: The response, or None if the request failed with a connection error or timeout.
+    """
+    if method.upper() not in self.methods or attempt + 1 >= self.max_attempts:
+      return False
+
+    return response is None or response.status_code in self.statuses
+
+  def delay(self, attempt: int, response: typing.Optional[httpx.Response] = None) -> float:
+    """Return the seconds to wait before repeating a request; a Retry-After header of *response* is honoured."""
+    delay = random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))  # noqa: S311
+
+    retry_after = response.headers.get('Retry-After', '') if response is not None else ''
+    if retry_after.isdigit():
+      delay = max(delay, min(self.max_backoff, float(retry_after)))
+
+    return delay
+
+
+class CircuitBreaker:
+  """Circuit breaker failing requests fast while openHAB is unavailable.
+
+  After *failure_threshold* consecutive failures (connection errors, timeouts and 5xx responses) the breaker
+  opens and requests raise `CircuitOpenException` without being sent. After *reset_timeout* seconds a single
+  trial request is let through (half-open state); the breaker closes again if it succeeds and reopens
+  otherwise. Callers can check `state` to shed load instead of queueing up requests.
+  """
+
+  CLOSED = 'closed'
+  OPEN = 'open'
+  HALF_OPEN = 'half_open'
+
+  def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0) -> None:
+    """Constructor.
+
+    Args:
+      failure_threshold: Number of consecutive failures opening the breaker.
+      reset_timeout: Seconds the breaker stays open before a trial request is let through.
+    """
+    self.failure_threshold = failure_threshold
+    self.reset_timeout = reset_timeout
+    self.failures = 0
+    self.opened_at: typing.Optional[float] = None
+
+    self._lock = threading.Lock()
+    self._trial_running = False
+
+  @property
+  def state(self) -> str:
+    """The state of the breaker, one of `CLOSED`, `OPEN` or `HALF_OPEN`."""
+    if self.opened_at is None:
+      return self.CLOSED
+
+    if time.monotonic() - self.opened_at < self.reset_timeout:
+      return self.OPEN
+
+    return self.HALF_OPEN
+
+  def before_request(self) -> bool:
+    """Check whether a request may be sent; raises `CircuitOpenException` if not.
+
+    Returns:
+      True if the request is the trial request of the half-open state, whose outcome must be passed to `record`,
+      or if it ends without an outcome (e.g. as it was cancelled), to `release`.
+    """
+    with self._lock:
+      state = self.state
+
+      if state == self.CLOSED:
+        return False
+
+      if state == self.HALF_OPEN and not self._trial_running:
+        self._trial_running = True
+        return True
+
+    raise openhab.exceptions.CircuitOpenException(f'openHAB is unavailable after {self.failures} consecutive failures')
+
+  def record(self, success: bool) -> None:
+    """Record the outcome of a request."""
+    with self._lock:
+      self._trial_running = False
+
+      if success:
+        self.failures = 0
+        self.opened_at = None
+        return
+
+      self.failures += 1
+
+      if self.opened_at is not None or self.failures >= self.failure_threshold:
+        self.opened_at = time.monotonic()
+
+  def release(self) -> None:
+    """Let another trial request through after the trial request ended without an outcome."""
+    with self._lock:
+      self._trial_running = False
+
+  def reset(self) -> None:
+    """Close the breaker."""
+    self.record(True)
@@ -22,7 +22,10 @@
 import logging
 import typing
 
+from .tracing import traced
+
 if typing.TYPE_CHECKING:
+  import openhab.async_client
   import openhab.client
 
 __author__ = 'Georges Toth <georges@trypill.org>'
@@ -41,6 +44,25 @@ class Rules:
     self.openhab = openhab_conn
     self.logger = logging.getLogger(__name__)
 
+  @traced('get_rules')
   def get(self) -> list[dict[str, typing.Any]]:
     """Get all rules."""
     return self.openhab.req_get('/rules')
+
+
+class AsyncRules:
+  """Base rule class for the asynchronous client."""
+
+  def __init__(self, openhab_conn: 'openhab.async_client.AsyncOpenHAB') -> None:
+    """Constructor.
+
+    Args:
+      openhab_conn (openhab.AsyncOpenHAB): openHAB object.
+    """
+    self.openhab = openhab_conn
+    self.logger = logging.getLogger(__name__)
+
+  @traced('get_rules')
+  async def get(self) -> list[dict[str, typing.Any]]:
+    """Get all rules."""
+    return await self.openhab.req_get('/rules')
@@ -0,0 +1,273 @@
+"""python library for accessing the openHAB REST API."""
+
+#
+# Georges Toth (c) 2016-present <georges@trypill.org>
+#
+# python-openhab is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python-openhab is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with python-openhab.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import dataclasses
+import datetime
+import itertools
+import typing
+
+import openhab.persistence
+
+if typing.TYPE_CHECKING:
+  import numpy as np
+
+__author__ = 'Georges Toth <georges@trypill.org>'
+__license__ = 'AGPLv3+'
+
+
+@dataclasses.dataclass
+class Bucket:
+  """Aggregated values of all data points within one time bucket.
+
+  Attributes:
+    time: Start of the bucket in milliseconds since the epoch.
+    min: Smallest value.
+    max: Largest value.
+    avg: Arithmetic mean of the values.
+    last: The value of the last data point.
+    count: Number of data points.
+  """
+
+  time: int
+  min: float
+  max: float
+  avg: float
+  last: float
+  count: int
+
+
+def parse_number(state: str) -> typing.Optional[float]:
+  """Parse a persisted numeric state, e.g. "21.5 °C", ignoring the unit; returns None for UNDEF/NULL."""
+  if state in {'UNDEF', 'NULL'}:
+    return None
+
+  return float(state.split(' ', 1)[0])
+
+
+def aggregate(
+  data: typing.Iterable[dict[str, typing.Union[str, int]]],
+  step: datetime.timedelta,
+  parse: typing.Callable[[str], typing.Optional[float]] = parse_number,
+  origin: int = 0,
+  chunk_size: int = 10000,
+) -> typing.Iterator[Bucket]:
+  """Aggregate persistence data into fixed time buckets while streaming it.
+
+  The data is consumed in chunks of *chunk_size* data points, so memory use does not depend on the length
+  of the data; the bucket statistics of each chunk are computed with numpy. The data must be ordered by time,
+  as returned by `OpenHAB.get_item_persistence`. Buckets without data points are not returned, and UNDEF or
+  NULL states are skipped.
+
+  Args:
+    data: Persistence data, e.g. as returned by `OpenHAB.get_item_persistence`.
+    step: The length of the buckets.
+    parse: Function converting a persisted state into a number, or None for states to skip.
+    origin: Start of the first bucket in milliseconds since the epoch; buckets are aligned to it.
+    chunk_size: Number of data points processed at once.
+
+  Returns:
+    Iterator over the `Bucket` of each time bucket containing data, ordered by time.
+  """
+  np = openhab.persistence.import_numpy()
+
+  step_ms = int(step.total_seconds() * 1000)
+  if step_ms < 1:
+    raise ValueError('step must be at least one millisecond')
+
+  iterator = iter(data)
+  pending: typing.Optional[Bucket] = None
+  pending_sum = 0.0
+
+  while chunk := list(itertools.islice(iterator, chunk_size)):
+    values = np.array([parse(str(entry['state'])) for entry in chunk], dtype=np.float64)
+    times = np.array([int(entry['time']) for entry in chunk], dtype=np.int64)
+
+    defined = ~np.isnan(values)
+    values = values[defined]
+    times = times[defined]
+
+    if not len(values):
+      continue
+
+    index = (times - origin) // step_ms
+    starts = np.concatenate(([0], np.flatnonzero(np.diff(index)) + 1))
+    ends = np.concatenate((starts[1:], [len(values)]))
+
+    mins = np.minimum.reduceat(values, starts)
+    maxs = np.maximum.reduceat(values, starts)
+    sums = np.add.reduceat(values, starts)
+    lasts = values[ends - 1]
+    counts = ends - starts
+
+    for position in range(len(starts)):
+      bucket_time = int(index[starts[position]]) * step_ms + origin
+
+      if pending is not None and pending.time == bucket_time:
+        # the bucket continues the last bucket of the previous chunk
+        pending.min = min(pending.min, float(mins[position]))
+        pending.max = max(pending.max, float(maxs[position]))
+        pending.last = float(lasts[position])
+        pending.count += int(counts[position])
+        pending_sum += float(sums[position])
+        continue
+
+      if pending is not None:
+        pending.avg = pending_sum / pending.count
+        yield pending
+
+      pending = Bucket(
+        time=bucket_time,
+        min=float(mins[position]),
+        max=float(maxs[position]),
+        avg=0.0,
+        last=float(lasts[position]),
+        count=int(counts[position]),
+      )
+      pending_sum = float(sums[position])
+
+  if pending is not None:
+    pending.avg = pending_sum / pending.count
+    yield pending
+
+
+def lttb(time: 'np.ndarray', values: 'np.ndarray', threshold: int) -> tuple['np.ndarray', 'np.ndarray']:
+  """Downsample a time series for plotting with the Largest-Triangle-Three-Buckets algorithm.
+
+  LTTB keeps the first and last data point and selects one point per bucket in between, such that the
+  visual shape of the series is preserved far better than by averaging.
+
+  Args:
+    time: Timestamps, e.g. `PersistenceColumns.time`.
+    values: Numeric values of the same length; NaN values (e.g. UNDEF states) are ignored.
+    threshold: Number of data points to return.
+
+  Returns:
+    The timestamps and values of the selected data points.
+  """
+  np = openhab.persistence.import_numpy()
+
+  defined = ~np.isnan(values)
+  time = np.asarray(time)[defined]
+  values = np.asarray(values, dtype=np.float64)[defined]
+
+  if threshold >= len(values) or threshold < 3:
+    return time, values
+
+  x = time.astype(np.float64)
+  edges = np.linspace(1, len(values) - 1, threshold - 1).astype(np.int64)
+  selected = np.empty(threshold, dtype=np.int64)
+  selected[0] = 0
+  selected[-1] = len(values) - 1
+
+  for bucket in range(threshold - 2):
+    start, end = edges[bucket], edges[bucket + 1]
+    next_end = edges[bucket + 2] if bucket + 2 < len(edges) else len(values)
+
+    # the third point of the triangle is the average of the next bucket
+    avg_x = x[end:next_end].mean()
+    avg_y = values[end:next_end].mean()
+
+    previous = selected[bucket]
+    areas = np.abs((x[previous] - avg_x) * (values[start:end] - values[previous]) - (x[previous] - x[start:end]) * (avg_y - values[previous]))
+    selected[bucket + 1] = start + int(np.argmax(areas))
+
+  return time[selected], values[selected]
+
+
+RESAMPLE_METHODS = ('hold', 'linear')
+
+
+def resample(
+  data: typing.Iterable[dict[str, typing.Union[str, int]]],
+  step: datetime.timedelta,
+  start_time: datetime.datetime,
+  end_time: datetime.datetime,
+  method: str = 'hold',
+  max_gap: typing.Optional[datetime.timedelta] = None,
+  parse: typing.Callable[[str], typing.Optional[float]] = parse_number,
+) -> tuple['np.ndarray', 'np.ndarray']:
+  """Resample irregular persistence data onto a regular time grid.
+
+  Fetching the data with ``boundary=True`` provides the value before *start_time*, so the grid is filled
+  from its very first point on without a second query:
+
+  ```python
+  data = oh.get_item_persistence('Dining_Temperature', start_time=start, end_time=end, boundary=True)
+  time, values = resample(data, datetime.timedelta(minutes=5), start, end, method='linear')
+  ```
+
+  Args:
+    data: Persistence data ordered by time, e.g. as returned by `OpenHAB.get_item_persistence`.
+    step: The distance of the grid points.
+    start_time: The first grid point.
+    end_time: The end of the grid; the last grid point is at or before it.
+    method: 'hold' repeats the last known value (as openHAB items behave), 'linear' interpolates linearly
+            between the surrounding data points.
+    max_gap: If given, grid points are left NaN where the last known data point is older than *max_gap*
+             ('hold'), or the surrounding data points are further than *max_gap* apart ('linear').
+    parse: Function converting a persisted state into a number, or None for UNDEF/NULL states.
+
+  Returns:
+    The grid timestamps in milliseconds since the epoch (int64) and the values at these timestamps (float64);
+    NaN where no value is known, including after UNDEF/NULL states.
+  """
+  np = openhab.persistence.import_numpy()
+
+  if method not in RESAMPLE_METHODS:
+    raise ValueError(f'method must be one of {RESAMPLE_METHODS}')
+
+  step_ms = int(step.total_seconds() * 1000)
+  if step_ms < 1:
+    raise ValueError('step must be at least one millisecond')
+
+  times_list = []
+  values_list = []
+  for entry in data:
+    times_list.append(int(entry['time']))
+    values_list.append(parse(str(entry['state'])))
+
+  times = np.array(times_list, dtype=np.int64)
+  values = np.array(values_list, dtype=np.float64)
+
+  start = openhab.persistence.to_millis(start_time)
+  grid = np.arange(start, openhab.persistence.to_millis(end_time) + 1, step_ms, dtype=np.int64)
+
+  if not len(times):
+    return grid, np.full(len(grid), np.nan)
+
+  following = np.searchsorted(times, grid, side='right')
+  previous = following - 1
+  has_previous = previous >= 0
+  previous_time = times[np.maximum(previous, 0)]
+
+  if method == 'hold':
+    result = np.where(has_previous, values[np.maximum(previous, 0)], np.nan)
+
+    if max_gap is not None:
+      result[has_previous & (grid - previous_time > max_gap.total_seconds() * 1000)] = np.nan
+  else:
+    result = np.interp(grid, times, values, left=np.nan, right=np.nan)
+
+    if max_gap is not None:
+      has_following = following < len(times)
+      following_time = times[np.minimum(following, len(times) - 1)]
+      too_far = following_time - previous_time > max_gap.total_seconds() * 1000
+      result[has_previous & has_following & (previous_time != grid) & too_far] = np.nan
+
+  return grid, result
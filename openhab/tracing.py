@@ -0,0 +1,231 @@
+"""python library for accessing the openHAB REST API."""
+
+#
+# Georges Toth (c) 2016-present <georges@trypill.org>
+#
+# python-openhab is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# python-openhab is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with python-openhab.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import contextlib
+import contextvars
+import dataclasses
+import functools
+import inspect
+import threading
+import time
+import typing
+
+__author__ = 'Georges Toth <georges@trypill.org>'
+__license__ = 'AGPLv3+'
+
+_F = typing.TypeVar('_F', bound=typing.Callable[..., typing.Any])
+
+
+class SpanLike(typing.Protocol):
+  """The part of a span used by this library."""
+
+  def set_attribute(self, key: str, value: typing.Any) -> None:
+    """Set an attribute of the span."""
+
+
+class Tracer(typing.Protocol):
+  """Interface of the tracers accepted by `OpenHAB` and `AsyncOpenHAB`.
+
+  It is a subset of the OpenTelemetry tracer API, so an OpenTelemetry tracer can be passed as is, e.g.
+  ``OpenHAB(base_url, tracer=opentelemetry.trace.get_tracer('openhab'))``. The span started must become the
+  current span (the parent of spans started within it) until the context manager exits, as tracked per
+  thread and asyncio task with `contextvars`.
+  """
+
+  def start_as_current_span(self, name: str, attributes: typing.Optional[dict[str, typing.Any]] = None) -> typing.ContextManager[SpanLike]:
+    """Start a span and make it the current span until the returned context manager exits."""
+
+
+@dataclasses.dataclass
+class Span:
+  """A span recorded by `RecordingTracer`.
+
+  Attributes:
+    name: The operation, e.g. "get_item", or "HTTP GET" for a request sent to openHAB.
+    attributes: Attributes of the span, e.g. the item name or the HTTP status code.
+    start: Start time as returned by `time.perf_counter`.
+    end: End time as returned by `time.perf_counter`, or None while the span is running.
+    error: The exception the operation failed with, if any.
+    children: The spans started within this span.
+  """
+
+  name: str
+  attributes: dict[str, typing.Any] = dataclasses.field(default_factory=dict)
+  start: float = 0.0
+  end: typing.Optional[float] = None
+  error: typing.Optional[BaseException] = None
+  children: list['Span'] = dataclasses.field(default_factory=list)
+
+  def set_attribute(self, key: str, value: typing.Any) -> None:
+    """Set an attribute of the span."""
+    self.attributes[key] = value
+
+  @property
+  def duration(self) -> float:
+    """Duration of the span in seconds."""
+    return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+  def walk(self) -> typing.Iterator['Span']:
+    """Iterate over this span and all its descendants, depth first."""
+    yield self
+
+    for child in self.children:
+      yield from child.walk()
+
+  @property
+  def http_requests(self) -> list['Span']:
+    """All HTTP request spans within this span."""
+    return [span for span in self.walk() if 'http.method' in span.attributes]
+
+
+class RecordingTracer:
+  """Tracer keeping all spans in memory, e.g. for asserting the number of requests an operation makes.
+
+  ```python
+  tracer = RecordingTracer()
+  oh = openhab.OpenHAB(base_url, tracer=tracer)
+
+  oh.get_item('light_kitchen').is_state_null()
+  assert len(tracer.find('is_state_null')[0].http_requests) <= 1
+  ```
+  """
+
+  def __init__(self) -> None:
+    """Constructor."""
+    self.spans: list[Span] = []
+
+    self._current: contextvars.ContextVar[typing.Optional[Span]] = contextvars.ContextVar(f'openhab_span_{id(self)}', default=None)
+    self._lock = threading.Lock()
+
+  @contextlib.contextmanager
+  def start_as_current_span(self, name: str, attributes: typing.Optional[dict[str, typing.Any]] = None) -> typing.Iterator[Span]:
+    """Start a span and make it the current span until the context manager exits."""
+    span = Span(name, dict(attributes or {}), start=time.perf_counter())
+    parent = self._current.get()
+
+    with self._lock:
+      (parent.children if parent is not None else self.spans).append(span)
+
+    token = self._current.set(span)
+    try:
+      yield span
+    except BaseException as exc:
+      span.error = exc
+      raise
+    finally:
+      span.end = time.perf_counter()
+      self._current.reset(token)
+
+  def find(self, name: str) -> list[Span]:
+    """Return all recorded spans with the given name, including nested ones, in the order they were started."""
+    with self._lock:
+      roots = list(self.spans)
+
+    return [span for root in roots for span in root.walk() if span.name == name]
+
+  def clear(self) -> None:
+    """Discard all recorded spans."""
+    with self._lock:
+      self.spans.clear()
+
+
+def traced(name: str) -> typing.Callable[[_F], _F]:
+  """Decorator recording a method of a client, item or helper object as a span, if a tracer is configured.
+
+  The tracer is taken from the client (``self.tracer``, or ``self.openhab.tracer`` for items and helper
+  objects). The span of a generator covers its whole iteration, but is only the current span while the
+  generator runs, not while the caller processes the yielded values.
+
+  Args:
+    name: The name of the span.
+  """
+
+  def attributes(obj: typing.Any, args: tuple, kwargs: dict[str, typing.Any]) -> dict[str, typing.Any]:
+    item = getattr(obj, 'name', None)
+    if item is None:
+      item = kwargs.get('name', args[0] if args and isinstance(args[0], str) else None)
+
+    return {'openhab.item': item} if isinstance(item, str) else {}
+
+  def decorator(func: _F) -> _F:
+    def tracer_of(obj: typing.Any) -> typing.Optional[Tracer]:
+      return getattr(getattr(obj, 'openhab', obj), 'tracer', None)
+
+    if inspect.isgeneratorfunction(func):
+
+      @functools.wraps(func)
+      def generator_wrapper(self: typing.Any, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        tracer = tracer_of(self)
+        if tracer is None:
+          return (yield from func(self, *args, **kwargs))
+
+        # run every step of the generator in a context of its own, in which the span is the current span
+        context = contextvars.copy_context()
+        span_manager = context.run(tracer.start_as_current_span, name, attributes(self, args, kwargs))
+        context.run(span_manager.__enter__)
+        generator = func(self, *args, **kwargs)
+
+        try:
+          while True:
+            try:
+              value = context.run(next, generator)
+            except StopIteration as stop:
+              result = stop.value
+              break
+            yield value
+        except GeneratorExit:
+          # the caller stopped iterating early, which is not an error
+          context.run(generator.close)
+          context.run(span_manager.__exit__, None, None, None)
+          raise
+        except BaseException as exc:
+          context.run(generator.close)
+          context.run(span_manager.__exit__, type(exc), exc, exc.__traceback__)
+          raise
+
+        context.run(span_manager.__exit__, None, None, None)
+        return result
+
+      return typing.cast('_F', generator_wrapper)
+
+    if inspect.iscoroutinefunction(func):
+
+      @functools.wraps(func)
+      async def coroutine_wrapper(self: typing.Any, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+        tracer = tracer_of(self)
+        if tracer is None:
+          return await func(self, *args, **kwargs)
+
+        with tracer.start_as_current_span(name, attributes(self, args, kwargs)):
+          return await func(self, *args, **kwargs)
+
+      return typing.cast('_F', coroutine_wrapper)
+
+    @functools.wraps(func)
+    def wrapper(self: typing.Any, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+      tracer = tracer_of(self)
+      if tracer is None:
+        return func(self, *args, **kwargs)
+
+      with tracer.start_as_current_span(name, attributes(self, args, kwargs)):
+        return func(self, *args, **kwargs)
+
+    return typing.cast('_F', wrapper)
+
+  return decorator
@@ -36,8 +36,9 @@ print(' - Send command to group')
 lights_group.on()
 
 print(' - Update all lights to OFF')
-for v in lights_group.members.values():
-  v.update('OFF')
+results = openhab.update_states(dict.fromkeys(lights_group.members.values(), 'OFF'))
+for name, result in results.items():
+  print(name, 'OK' if result.ok else result.error, f'{result.latency * 1000:.1f}ms')
 
 print(' - Print all lights:')
 for v in lights_group.members.values():
@@ -1,9 +1,11 @@
 import os
 import pathlib
 
+import httpx
 import pytest
 
 import openhab.oauth2_helper
+from tests.fake_openhab import BASE_URL, FakeOpenHAB
 
 # ruff: noqa: S106
 
@@ -33,3 +35,26 @@ def oh_oauth2() -> 'openhab.OpenHAB':
   }
 
   return openhab.OpenHAB(url_rest, oauth2_config=oauth2_config)
+
+
+@pytest.fixture
+def fake_openhab() -> FakeOpenHAB:
+  """In-process fake openHAB server."""
+  fake = FakeOpenHAB()
+  fake.add_item('Lights', 'Group', groupType='Switch')
+  fake.add_item('light_kitchen', 'Switch', 'ON', groupNames=['Lights'])
+  fake.add_item('light_living', 'Switch', 'OFF', groupNames=['Lights'])
+  fake.add_item('temperature', 'Number:Temperature', '21.5 °C', tags=['Temperature'])
+  fake.add_item('dimmer', 'Dimmer', '40')
+  fake.add_item('the_datetime', 'DateTime', '2024-01-02T03:04:05.678+0100')
+  fake.add_item('the_contact', 'Contact', 'CLOSED')
+  fake.persistence['temperature'] = [{'time': 1700000000000 + i * 60000, 'state': f'{20 + i / 10} °C'} for i in range(25)]
+  return fake
+
+
+@pytest.fixture
+def oh_fake(fake_openhab: FakeOpenHAB) -> 'openhab.OpenHAB':
+  """Setup a connection to the in-process fake openHAB server."""
+  oh = openhab.OpenHAB(BASE_URL)
+  oh.session = httpx.Client(transport=fake_openhab.transport())
+  return oh
@@ -0,0 +1,168 @@
+"""In-process fake openHAB REST API to be used with `httpx.MockTransport`."""
+
+import copy
+import datetime
+import json
+import re
+import typing
+
+import httpx
+
+BASE_URL = 'http://openhab.test/rest'
+
+
+class FakeOpenHAB:
+  """Minimal in-memory implementation of the openHAB REST endpoints used by python-openhab."""
+
+  def __init__(self) -> None:
+    self.items: dict[str, dict[str, typing.Any]] = {}
+    self.persistence: dict[str, list[dict[str, typing.Any]]] = {}
+    self.rules: list[dict[str, typing.Any]] = []
+    self.events: list[dict[str, typing.Any]] = []
+    self.on_events_connect: typing.Optional[typing.Callable[[], None]] = None
+    self.requests: list[httpx.Request] = []
+
+  def add_item(self, name: str, type_: str, state: str = 'NULL', **extra: typing.Any) -> dict[str, typing.Any]:
+    item = {'name': name, 'type': type_, 'state': state, 'label': '', 'tags': [], 'groupNames': [], 'editable': True}
+    item.update(extra)
+
+    if type_ == 'Group':
+      item.setdefault('members', [])
+
+    self.items[name] = item
+
+    for group_name in item['groupNames']:
+      self.items[group_name]['members'].append(item)
+
+    return item
+
+  def item_json(self, name: str) -> dict[str, typing.Any]:
+    item = copy.deepcopy(self.items[name])
+
+    if 'members' in item:
+      item['members'] = [self.item_json(member['name']) for member in item['members']]
+
+    return item
+
+  def transport(self) -> httpx.MockTransport:
+    return httpx.MockTransport(self.handle)
+
+  def handle(self, request: httpx.Request) -> httpx.Response:
+    self.requests.append(request)
+    path = request.url.path.removeprefix('/rest')
+
+    if path in ('/items', '/items/') and request.method == 'GET':
+      return self._get_items(request.url.params)
+
+    if path == '/rules':
+      return httpx.Response(200, json=self.rules)
+
+    if path == '/events':
+      return self._get_events()
+
+    m = re.fullmatch(r'/items/([^/]+)/state', path)
+    if m and request.method == 'PUT':
+      return self._set_state(m.group(1), request.content.decode('utf-8'))
+
+    m = re.fullmatch(r'/items/([^/]+)', path)
+    if m:
+      name = m.group(1)
+
+      if request.method == 'GET':
+        if name not in self.items:
+          return httpx.Response(404)
+        return httpx.Response(200, json=self.item_json(name))
+
+      if request.method == 'POST':
+        return self._set_state(name, request.content.decode('utf-8'))
+
+      if request.method == 'PUT':
+        definition = json.loads(request.content)
+        self.add_item(state='NULL', **{('type_' if k == 'type' else k): v for k, v in definition.items()})
+        return httpx.Response(200, json=definition)
+
+    m = re.fullmatch(r'/persistence/items/([^/]+)', path)
+    if m and request.method == 'GET':
+      return self._get_persistence(m.group(1), request.url.params)
+
+    if m and request.method == 'PUT':
+      return self._put_persistence(m.group(1), request.url.params)
+
+    return httpx.Response(404)
+
+  def _get_items(self, params: httpx.QueryParams) -> httpx.Response:
+    items = [self.item_json(name) for name in self.items]
+
+    if 'type' in params:
+      items = [i for i in items if i.get('groupType', i['type']).split(':')[0] == params['type']]
+
+    if 'tags' in params:
+      tags = set(params['tags'].split(','))
+      items = [i for i in items if tags.intersection(i['tags'])]
+
+    if 'fields' in params:
+      fields = params['fields'].split(',')
+      items = [{k: v for k, v in i.items() if k in fields} for i in items]
+
+    return httpx.Response(200, json=items)
+
+  def _set_state(self, name: str, state: str) -> httpx.Response:
+    if name not in self.items:
+      return httpx.Response(404)
+
+    self.items[name]['state'] = state
+    return httpx.Response(200)
+
+  def _get_persistence(self, name: str, params: httpx.QueryParams) -> httpx.Response:
+    data = self.persistence.get(name, [])
+
+    if 'starttime' in params or 'endtime' in params:
+      # compared in microseconds, as openHAB does not round the query times to the resolution of the data
+      start = self._micros(params['starttime']) if 'starttime' in params else None
+      end = self._micros(params['endtime']) if 'endtime' in params else None
+      within = [p for p in data if (start is None or p['time'] * 1000 >= start) and (end is None or p['time'] * 1000 <= end)]
+
+      if params.get('boundary') == 'true':
+        before = [p for p in data if start is not None and p['time'] * 1000 < start][-1:]
+        after = [p for p in data if end is not None and p['time'] * 1000 > end][:1]
+        within = before + within + after
+
+      data = within
+
+    page_length = int(params.get('pagelength', 0))
+
+    if page_length > 0:
+      page = int(params.get('page', 0))
+      data = data[page * page_length : (page + 1) * page_length]
+
+    return httpx.Response(200, json={'name': name, 'datapoints': str(len(data)), 'data': data})
+
+  def _put_persistence(self, name: str, params: httpx.QueryParams) -> httpx.Response:
+    if name not in self.items:
+      return httpx.Response(404)
+
+    time = int(datetime.datetime.strptime(params['time'], '%Y-%m-%dT%H:%M:%S.%f%z').timestamp() * 1000)
+    data = [p for p in self.persistence.get(name, []) if p['time'] != time]
+    data.append({'time': time, 'state': params['state']})
+    self.persistence[name] = sorted(data, key=lambda p: p['time'])
+
+    return httpx.Response(200)
+
+  @staticmethod
+  def _micros(value: str) -> int:
+    return (datetime.datetime.fromisoformat(value).astimezone() - datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)) // datetime.timedelta(microseconds=1)
+
+  def _get_events(self) -> httpx.Response:
+    if self.on_events_connect is not None:
+      self.on_events_connect()
+
+    body = 'event: alive\ndata: {"type":"ALIVE","interval":10}\n\n'
+    for event in self.events:
+      body += f'event: message\ndata: {json.dumps(event)}\n\n'
+    self.events = []
+
+    return httpx.Response(200, text=body, headers={'Content-Type': 'text/event-stream'})
+
+  @staticmethod
+  def item_event(name: str, event_type: str, payload: typing.Any, topic_suffix: str) -> dict[str, typing.Any]:
+    return {'topic': f'openhab/items/{name}/{topic_suffix}', 'type': event_type, 'payload': json.dumps(payload)}
@@ -0,0 +1,107 @@
+import asyncio
+
+import httpx
+import pytest
+
+import openhab
+import openhab.items
+from tests.fake_openhab import BASE_URL, FakeOpenHAB
+
+# ruff: noqa: S101, ANN201, T201
+
+
+def _async_oh(fake_openhab: FakeOpenHAB) -> openhab.AsyncOpenHAB:
+  oh = openhab.AsyncOpenHAB(BASE_URL)
+  oh.session = httpx.AsyncClient(transport=fake_openhab.transport())
+  return oh
+
+
+def test_fetch_all_items(fake_openhab: FakeOpenHAB):
+  async def run():
+    async with _async_oh(fake_openhab) as oh:
+      return await oh.fetch_all_items()
+
+  items = asyncio.run(run())
+
+  assert set(items) == set(fake_openhab.items)
+  assert items['Lights'].group
+  assert set(items['Lights'].members) == {'light_kitchen', 'light_living'}
+  assert items['temperature'].unit_of_measure == '°C'
+
+
+def test_get_item_and_commands(fake_openhab: FakeOpenHAB):
+  async def run():
+    async with _async_oh(fake_openhab) as oh:
+      lights = [await oh.get_item(name) for name in ('light_kitchen', 'light_living')]
+      await asyncio.gather(*(light.async_command('OFF') for light in lights))
+
+      dimmer = await oh.get_item('dimmer')
+      await dimmer.async_update(75)
+      return await dimmer.async_refresh()
+
+  assert asyncio.run(run()) == 75.0
+  assert fake_openhab.items['light_kitchen']['state'] == 'OFF'
+  assert fake_openhab.items['light_living']['state'] == 'OFF'
+
+
+def test_contact_command_rejected(fake_openhab: FakeOpenHAB):
+  async def run():
+    async with _async_oh(fake_openhab) as oh:
+      contact = await oh.get_item('the_contact')
+      await contact.async_command('OPEN')
+
+  with pytest.raises(ValueError, match='only supports updates'):
+    asyncio.run(run())
+
+
+def test_create_or_update_item(fake_openhab: FakeOpenHAB):
+  async def run():
+    async with _async_oh(fake_openhab) as oh:
+      await oh.create_or_update_item('new_number', openhab.items.NumberItem, quantity_type='Temperature', label='New')
+      return await oh.get_item('new_number')
+
+  item = asyncio.run(run())
+
+  assert isinstance(item, openhab.items.NumberItem)
+  assert item.quantityType == 'Temperature'
+
+
+def test_get_item_persistence(fake_openhab: FakeOpenHAB):
+  async def run():
+    async with _async_oh(fake_openhab) as oh:
+      return [entry async for entry in oh.get_item_persistence('temperature', page_length=10)]
+
+  assert asyncio.run(run()) == fake_openhab.persistence['temperature']
+
+
+def test_rules(fake_openhab: FakeOpenHAB):
+  fake_openhab.rules = [{'uid': 'rule1'}]
+
+  async def run():
+    async with _async_oh(fake_openhab) as oh:
+      return await oh.rules.get()
+
+  assert asyncio.run(run()) == [{'uid': 'rule1'}]
+
+
+def test_sync_methods_rejected(fake_openhab: FakeOpenHAB):
+  async def run():
+    async with _async_oh(fake_openhab) as oh:
+      switch = await oh.get_item('light_kitchen')
+
+      with pytest.raises(TypeError, match='async_command'):
+        switch.on()
+      with pytest.raises(TypeError, match='async_refresh'):
+        _ = switch.state
+      with pytest.raises(TypeError, match='async_update'):
+        switch.update_state_null()
+      with pytest.raises(TypeError, match='get_item_persistence'):
+        list(switch.persistence())
+
+      # the suggested alternatives work, and the local state was not changed by the rejected calls
+      assert switch.cached_state == 'ON'
+      await switch.async_update('NULL')
+      return await switch.async_refresh()
+
+  assert asyncio.run(run()) is None
+  assert fake_openhab.items['light_kitchen']['state'] == 'NULL'
@@ -0,0 +1,24 @@
+import json
+import pathlib
+
+from benchmarks import run
+
+# ruff: noqa: S101, ANN201
+
+
+def test_benchmarks_run(tmp_path: pathlib.Path):
+  output = tmp_path / 'results.json'
+
+  assert run.main(['--sizes', '20', '--points', '50', '--repeat', '1', '--output', str(output)]) == 0
+
+  results = json.loads(output.read_text())
+  assert {entry['name'] for entry in results['benchmarks']} >= {'fetch_all_items', 'json_to_item', 'send_commands', 'persistence_paging', 'parse_DecimalType'}
+
+  # compared with the earlier run, a much slower baseline shows no regressions and a much faster one does
+  arguments = ['--sizes', '20', '--points', '50', '--repeat', '1', '--filter', 'fetch_all_items', '--output', str(tmp_path / 'new.json')]
+
+  for factor, expected in ((100, 0), (0.01, 1)):
+    baseline = tmp_path / f'baseline_{factor}.json'
+    baseline.write_text(json.dumps({**results, 'benchmarks': [{**entry, 'median': entry['median'] * factor} for entry in results['benchmarks']]}))
+
+    assert run.main([*arguments, '--compare', str(baseline)]) == expected
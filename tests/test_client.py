@@ -0,0 +1,125 @@
+import asyncio
+import concurrent.futures
+import http.server
+import threading
+import time
+
+import httpx
+import pytest
+
+import openhab
+from tests.fake_openhab import BASE_URL, FakeOpenHAB
+
+# ruff: noqa: S101, ANN201, T201
+
+
+def test_send_commands(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  items = oh_fake.fetch_all_items()
+
+  results = oh_fake.send_commands({items['light_kitchen']: 'OFF', 'light_living': 'ON', 'dimmer': 'invalid', 'the_contact': 'OPEN', 'missing': 'ON'})
+
+  assert fake_openhab.items['light_kitchen']['state'] == 'OFF'
+  assert fake_openhab.items['light_living']['state'] == 'ON'
+  assert results['light_kitchen'].ok
+  assert results['light_living'].ok
+  assert results['light_living'].latency > 0
+  assert isinstance(results['dimmer'].error, ValueError)
+  assert isinstance(results['the_contact'].error, ValueError)
+  assert isinstance(results['missing'].error, httpx.HTTPStatusError)
+
+  # names known to the identity map do not cost an additional request
+  assert not any(r.method == 'GET' and r.url.path == '/rest/items/light_living' for r in fake_openhab.requests)
+
+
+def test_update_states_parallel(fake_openhab: FakeOpenHAB):
+  names = [f'light_{i}' for i in range(20)]
+  for name in names:
+    fake_openhab.add_item(name, 'Switch', 'OFF')
+
+  in_flight = []
+  lock = threading.Lock()
+  max_in_flight = [0]
+
+  def slow_handler(request: httpx.Request) -> httpx.Response:
+    with lock:
+      in_flight.append(request)
+      max_in_flight[0] = max(max_in_flight[0], len(in_flight))
+    time.sleep(0.02)
+    with lock:
+      in_flight.remove(request)
+    return fake_openhab.handle(request)
+
+  oh = openhab.OpenHAB(BASE_URL)
+  oh.session = httpx.Client(transport=httpx.MockTransport(slow_handler))
+  items = oh.fetch_all_items()
+
+  results = oh.update_states({items[name]: 'ON' for name in names}, max_workers=5)
+
+  assert all(result.ok for result in results.values())
+  assert all(fake_openhab.items[name]['state'] == 'ON' for name in names)
+  assert max_in_flight[0] == 5
+
+
+def test_async_send_commands(fake_openhab: FakeOpenHAB):
+  async def run():
+    async with openhab.AsyncOpenHAB(BASE_URL) as oh:
+      oh.session = httpx.AsyncClient(transport=fake_openhab.transport())
+      await oh.fetch_all_items()
+      return await oh.send_commands({'light_kitchen': 'OFF', 'dimmer': 101})
+
+  results = asyncio.run(run())
+
+  assert results['light_kitchen'].ok
+  assert not results['dimmer'].ok
+  assert fake_openhab.items['light_kitchen']['state'] == 'OFF'
+
+
+def _serve(fake_openhab: FakeOpenHAB) -> http.server.ThreadingHTTPServer:
+  class Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):  # noqa: N802
+      response = fake_openhab.handle(httpx.Request('GET', f'http://openhab.test{self.path}'))
+      self.send_response(response.status_code)
+      self.send_header('Content-Type', 'application/json')
+      self.send_header('Content-Length', str(len(response.content)))
+      self.end_headers()
+      self.wfile.write(response.content)
+
+    def log_message(self, *args):
+      pass
+
+  server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+  threading.Thread(target=server.serve_forever, daemon=True).start()
+  return server
+
+
+def test_pool_stats(fake_openhab: FakeOpenHAB):
+  server = _serve(fake_openhab)
+  limits = httpx.Limits(max_connections=4, max_keepalive_connections=2, keepalive_expiry=30)
+
+  try:
+    oh = openhab.OpenHAB(f'http://127.0.0.1:{server.server_address[1]}/rest', limits=limits, pool_timeout=1)
+    assert oh.session.timeout.pool == 1
+    assert oh.pool_stats()['connections'] == 0
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+      states = list(executor.map(lambda _: oh.get_item('dimmer').state, range(16)))
+    assert states == [40.0] * 16
+
+    stats = oh.pool_stats()
+    assert 1 <= stats['connections'] <= 2
+    assert stats['idle'] == stats['connections']
+    assert stats['active'] == 0
+    assert stats['http2'] == 0
+    assert (stats['max_connections'], stats['max_keepalive_connections'], stats['keepalive_expiry']) == (4, 2, 30)
+  finally:
+    server.shutdown()
+    server.server_close()
+
+
+def test_http2_option():
+  pytest.importorskip('h2')
+
+  oh = openhab.OpenHAB(BASE_URL, http2=True)
+  assert oh.session._transport._pool._http2  # noqa: SLF001
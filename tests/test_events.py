@@ -0,0 +1,145 @@
+import threading
+
+import pytest
+
+import openhab
+import openhab.events
+import openhab.exceptions
+from tests.fake_openhab import FakeOpenHAB
+
+# ruff: noqa: S101, ANN201, T201
+
+
+def test_iter_sse_events():
+  lines = [
+    'event: alive',
+    'data: {"type":"ALIVE","interval":10}',
+    '',
+    ': comment',
+    'event: message',
+    'data: {"topic":"openhab/items/foo/state",',
+    'data: "type":"ItemStateEvent","payload":"{}"}',
+    '',
+    'data: not json',
+    '',
+  ]
+
+  events = list(openhab.events.iter_sse_events(lines))
+
+  assert events == [
+    {'type': 'ALIVE', 'interval': 10},
+    {'topic': 'openhab/items/foo/state', 'type': 'ItemStateEvent', 'payload': '{}'},
+  ]
+
+
+def test_handle_events(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  registry = openhab.events.ItemRegistry(oh_fake)
+  registry.resync()
+  requests_after_resync = len(fake_openhab.requests)
+
+  registry.handle_event(fake_openhab.item_event('temperature', 'ItemStateChangedEvent', {'type': 'Quantity', 'value': '22.5 °C'}, 'statechanged'))
+  registry.handle_event(fake_openhab.item_event('dimmer', 'ItemStateEvent', {'type': 'Percent', 'value': 'UNDEF'}, 'state'))
+  registry.handle_event(fake_openhab.item_event('new_switch', 'ItemAddedEvent', {'name': 'new_switch', 'type': 'Switch'}, 'added'))
+  registry.handle_event(fake_openhab.item_event('the_contact', 'ItemRemovedEvent', {'name': 'the_contact', 'type': 'Contact'}, 'removed'))
+  registry.handle_event(
+    fake_openhab.item_event('temperature', 'ItemUpdatedEvent', [{'name': 'temperature', 'type': 'Number:Temperature', 'label': 'Temp'}, {}], 'updated'),
+  )
+
+  assert registry.get_state('temperature') == 22.5
+  assert registry['temperature'].label == 'Temp'
+  assert registry['temperature'].unit_of_measure == '°C'
+  assert registry.get_state('dimmer') is None
+  assert registry['new_switch'].raw_state == 'NULL'
+  assert 'the_contact' not in registry
+  assert len(fake_openhab.requests) == requests_after_resync
+
+
+def test_resync_on_reconnect(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  registry = openhab.events.ItemRegistry(oh_fake, reconnect_delay=0)
+  connects = []
+  done = threading.Event()
+
+  def on_connect():
+    connects.append(len(connects))
+
+    if len(connects) == 1:
+      fake_openhab.events = [fake_openhab.item_event('light_kitchen', 'ItemStateEvent', {'type': 'OnOff', 'value': 'OFF'}, 'state')]
+    else:
+      # the state changed while the event stream was down
+      fake_openhab.items['light_living']['state'] = 'ON'
+      registry.stop()
+      done.set()
+
+  fake_openhab.on_events_connect = on_connect
+  registry.run()
+
+  assert done.is_set()
+  assert len(connects) == 2
+  assert registry.get_state('light_living') == 'ON'
+
+
+def test_resync_keeps_shared_items_refreshing(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  mine = oh_fake.get_item('light_kitchen')
+  registry = openhab.events.ItemRegistry(oh_fake)
+  registry.resync()
+
+  assert registry['light_kitchen'] is mine
+
+  fake_openhab.items['light_kitchen']['state'] = 'OFF'
+
+  assert mine.state == 'OFF'
+
+
+def test_bad_events_are_skipped(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  registry = openhab.events.ItemRegistry(oh_fake, reconnect_delay=0)
+  connects = []
+  states = []
+
+  def on_connect():
+    connects.append(len(connects))
+
+    if len(connects) == 1:
+      fake_openhab.events = [
+        fake_openhab.item_event('the_datetime', 'ItemStateEvent', {'type': 'DateTime', 'value': 'garbage'}, 'state'),
+        {'topic': 'openhab/items/new_switch/added', 'type': 'ItemAddedEvent'},
+        fake_openhab.item_event('light_kitchen', 'ItemStateEvent', {'type': 'OnOff', 'value': 'OFF'}, 'state'),
+      ]
+    else:
+      # record the state before the resync of the reconnect
+      states.append(registry.get_state('light_kitchen'))
+      fake_openhab.events = []
+      registry.stop()
+
+  fake_openhab.on_events_connect = on_connect
+  thread = threading.Thread(target=registry.run)
+  thread.start()
+  thread.join(5)
+
+  # the events following the bad ones were still applied before the stream ended and was reconnected
+  assert not thread.is_alive()
+  assert len(connects) == 2
+  assert states == ['OFF']
+  assert 'new_switch' not in registry
+
+
+def test_failing_resync_reconnects(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB, monkeypatch: pytest.MonkeyPatch):
+  registry = openhab.events.ItemRegistry(oh_fake, reconnect_delay=0)
+  fetch_all_items = oh_fake.fetch_all_items
+  resyncs = []
+
+  def failing_fetch_all_items() -> dict:
+    resyncs.append(len(resyncs))
+    if len(resyncs) == 1:
+      raise openhab.exceptions.InvalidReturnException('unexpected response')
+
+    registry.stop()
+    return fetch_all_items()
+
+  monkeypatch.setattr(oh_fake, 'fetch_all_items', failing_fetch_all_items)
+  thread = threading.Thread(target=registry.run)
+  thread.start()
+  thread.join(5)
+
+  assert not thread.is_alive()
+  assert len(resyncs) == 2
+  assert registry.get_state('light_kitchen') == 'ON'
@@ -0,0 +1,71 @@
+import csv
+import datetime
+import gzip
+import json
+
+import httpx
+import pytest
+
+import openhab
+import openhab.export
+import openhab.persistence
+from tests.fake_openhab import BASE_URL, FakeOpenHAB
+
+# ruff: noqa: S101, ANN201, T201
+
+START = datetime.datetime(2023, 1, 1, tzinfo=datetime.timezone.utc)
+END = datetime.datetime(2024, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def test_export_csv(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB, tmp_path):
+  reports = []
+  report = openhab.export.export_persistence(oh_fake, 'temperature', tmp_path / 'out.csv', START, END, page_length=10, checkpoint_every=10, progress=lambda r: reports.append(r.rows))
+
+  with (tmp_path / 'out.csv').open(newline='', encoding='utf-8') as f:
+    rows = list(csv.DictReader(f))
+
+  assert [{'time': int(r['time']), 'state': r['state']} for r in rows] == fake_openhab.persistence['temperature']
+  assert report.rows == 25
+  assert report.bytes == (tmp_path / 'out.csv').stat().st_size
+  assert reports == [10, 20, 25]
+  assert not (tmp_path / 'out.csv.checkpoint').exists()
+
+
+@pytest.mark.parametrize('naive', [False, True])
+def test_export_resume(fake_openhab: FakeOpenHAB, tmp_path, naive: bool):
+  start, end = (START.astimezone().replace(tzinfo=None), END.astimezone().replace(tzinfo=None)) if naive else (START, END)
+  persistence_requests = 0
+
+  def failing_handler(request: httpx.Request) -> httpx.Response:
+    nonlocal persistence_requests
+    if request.url.path.startswith('/rest/persistence/'):
+      persistence_requests += 1
+      if persistence_requests == 4:
+        return httpx.Response(500)
+    return fake_openhab.handle(request)
+
+  oh = openhab.OpenHAB(BASE_URL)
+  oh.session = httpx.Client(transport=httpx.MockTransport(failing_handler))
+  path = tmp_path / 'out.jsonl.gz'
+
+  with pytest.raises(httpx.HTTPStatusError):
+    openhab.export.export_persistence(oh, 'temperature', path, start, end, page_length=5, checkpoint_every=5)
+
+  checkpoint = json.loads((tmp_path / 'out.jsonl.gz.checkpoint').read_text())
+  assert checkpoint['rows'] == 15
+
+  report = openhab.export.export_persistence(oh, 'temperature', path, start, end, page_length=5, checkpoint_every=5)
+
+  assert report.resumed
+  assert report.rows == 25
+  with gzip.open(path, 'rt', encoding='utf-8') as f:
+    assert [json.loads(line) for line in f] == fake_openhab.persistence['temperature']
+
+
+def test_cli(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB, tmp_path, monkeypatch: pytest.MonkeyPatch):
+  monkeypatch.setattr(openhab.client, 'OpenHAB', lambda *args, **kwargs: oh_fake)
+
+  assert openhab.export.main([BASE_URL, 'temperature', str(tmp_path / 'out.jsonl'), '--start', START.isoformat(), '--end', END.isoformat()]) == 0
+
+  with (tmp_path / 'out.jsonl').open(encoding='utf-8') as f:
+    assert [json.loads(line) for line in f] == fake_openhab.persistence['temperature']
@@ -0,0 +1,117 @@
+import math
+
+import httpx
+
+import openhab
+import openhab.items
+from tests.fake_openhab import BASE_URL, FakeOpenHAB
+
+# ruff: noqa: S101, ANN201, T201
+
+
+def _item_requests(fake_openhab: FakeOpenHAB, name: str) -> int:
+  return sum(1 for r in fake_openhab.requests if r.method == 'GET' and r.url.path == f'/rest/items/{name}')
+
+
+def test_state_fetched_on_every_read_by_default(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  item = oh_fake.get_item('light_kitchen')
+
+  assert item.state == 'ON'
+  assert item.state == 'ON'
+  assert _item_requests(fake_openhab, 'light_kitchen') == 3
+  assert oh_fake.state_cache_misses == 2
+  assert oh_fake.state_cache_hits == 0
+
+
+def test_state_ttl(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  oh_fake.state_ttl = 60
+  item = oh_fake.get_item('light_kitchen')
+  fake_openhab.items['light_kitchen']['state'] = 'OFF'
+
+  assert item.state == 'ON'
+  assert item.refresh() == 'OFF'
+  assert item.state == 'OFF'
+  assert oh_fake.state_cache_hits == 2
+  assert oh_fake.state_cache_misses == 0
+
+  item.toggle()
+  assert fake_openhab.items['light_kitchen']['state'] == 'ON'
+
+  # a command invalidates the cached state
+  assert item.state == 'ON'
+  assert oh_fake.state_cache_misses == 1
+
+
+def test_state_ttl_per_item(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  item = oh_fake.get_item('the_contact')
+  item.state_ttl = math.inf
+  fake_openhab.items['the_contact']['state'] = 'OPEN'
+
+  assert item.state == 'CLOSED'
+  assert not item.is_state_null()
+  assert _item_requests(fake_openhab, 'the_contact') == 1
+
+  item.update_state_null()
+  assert item.is_state_null()
+
+
+def test_fetch_all_items_lazy(oh_fake: openhab.OpenHAB):
+  items = oh_fake.fetch_all_items(lazy=True)
+
+  assert len(items) == 7
+  assert 'temperature' in items
+  assert 'unknown' not in items
+  assert items.get('unknown') is None
+  assert items.materialized == 0
+
+  assert items['temperature'].state == 21.5
+  assert items['temperature'] is items['temperature']
+  assert items.materialized == 1
+
+  assert set(items) == set(oh_fake.fetch_all_items())
+  assert items['Lights'].members['light_kitchen'].state == 'ON'
+
+
+def test_identity_map(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  items = oh_fake.fetch_all_items()
+  kitchen = items['light_kitchen']
+
+  assert items['Lights'].members['light_kitchen'] is kitchen
+  assert oh_fake.get_item('light_kitchen') is kitchen
+
+  fake_openhab.items['light_kitchen']['state'] = 'OFF'
+  oh_fake.get_item('Lights')
+
+  # refreshing the group updates the shared member instance in place
+  assert kitchen.cached_state == 'OFF'
+  assert oh_fake.fetch_all_items()['light_kitchen'] is kitchen
+
+
+def test_identity_map_disabled(fake_openhab: FakeOpenHAB):
+  oh = openhab.OpenHAB(BASE_URL, identity_map=False)
+  oh.session = httpx.Client(transport=fake_openhab.transport())
+  items = oh.fetch_all_items()
+
+  assert oh.identity_map is None
+  assert items['Lights'].members['light_kitchen'] is not items['light_kitchen']
+
+
+def test_get_items_projection(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  items = oh_fake.get_items(fields=['state'], type_=openhab.items.SwitchItem)
+
+  assert [(i.name, i.state) for i in items] == [('Lights', 'NULL'), ('light_kitchen', 'ON'), ('light_living', 'OFF')]
+  assert isinstance(items[0], openhab.items.PartialItem)
+  assert fake_openhab.requests[-1].url.params['fields'] == 'name,state'
+  assert fake_openhab.requests[-1].url.params['type'] == 'Switch'
+
+  partial = oh_fake.fetch_all_items(fields=['name', 'state'], tags=['Temperature'], recursive=False)
+  assert partial == {'temperature': {'name': 'temperature', 'state': '21.5 °C'}}
+  assert fake_openhab.requests[-1].url.params['recursive'] == 'false'
+
+
+def test_get_items(oh_fake: openhab.OpenHAB):
+  items = oh_fake.get_items(type_='Dimmer')
+
+  assert len(items) == 1
+  assert isinstance(items[0], openhab.items.DimmerItem)
+  assert items[0].cached_state == 40.0
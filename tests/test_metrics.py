@@ -0,0 +1,75 @@
+import httpx
+import pytest
+
+import openhab
+from openhab.metrics import Metrics, Sample, endpoint_template
+from tests.fake_openhab import BASE_URL, FakeOpenHAB
+
+# ruff: noqa: S101, ANN201
+
+
+@pytest.mark.parametrize(
+  ('path', 'template'),
+  [
+    ('/items/', '/items/'),
+    ('/items/light_kitchen', '/items/{name}'),
+    ('/items/light_kitchen/state', '/items/{name}/state'),
+    ('/items/light_kitchen/metadata/semantics', '/items/{name}/metadata/{namespace}'),
+    ('/persistence/items/temperature', '/persistence/items/{name}'),
+    ('/rules/abc/enable', '/rules/{uid}/enable'),
+  ],
+)
+def test_endpoint_template(path: str, template: str):
+  assert endpoint_template(path) == template
+
+
+def test_metrics(fake_openhab: FakeOpenHAB):
+  samples: list[Sample] = []
+  metrics = Metrics(hooks=[samples.append])
+  oh = openhab.OpenHAB(BASE_URL, metrics=metrics)
+  oh.session = httpx.Client(transport=fake_openhab.transport())
+
+  items = oh.fetch_all_items()
+  for _ in range(3):
+    oh.get_item('dimmer')
+  items['light_kitchen'].command('OFF')
+  with pytest.raises(httpx.HTTPStatusError):
+    oh.get_item('missing')
+
+  snapshot = metrics.snapshot()
+  requests = snapshot['requests']
+
+  assert requests['GET /items/']['status'] == {200: 1}
+  assert requests['GET /items/']['response_bytes'] > 0
+  assert requests['GET /items/{name}']['status'] == {200: 3, 404: 1}
+  assert requests['GET /items/{name}']['latency']['count'] == 4
+  latency = requests['GET /items/{name}']['latency']
+  assert 0 < latency['p50'] <= latency['p95'] <= latency['p99'] <= latency['max']
+  assert requests['POST /items/{name}']['request_bytes'] == 3
+
+  assert snapshot['decode']['GET /items/']['count'] == 1
+  assert snapshot['construct']['fetch_all_items']['count'] == 1
+  assert snapshot['construct']['get_item']['count'] == 3
+
+  assert [s for s in samples if s.kind == 'construct' and s.name == 'fetch_all_items'][0].count == len(fake_openhab.items)
+  assert sum(s.kind == 'request' for s in samples) == 6
+
+  metrics.reset()
+  assert metrics.snapshot() == {'requests': {}, 'decode': {}, 'construct': {}}
+
+
+def test_metrics_errors(fake_openhab: FakeOpenHAB):
+  def handler(request: httpx.Request) -> httpx.Response:
+    raise httpx.ConnectError('refused', request=request)
+
+  def failing_hook(sample: Sample) -> None:
+    raise RuntimeError
+
+  metrics = Metrics(hooks=[failing_hook])
+  oh = openhab.OpenHAB(BASE_URL, metrics=metrics)
+  oh.session = httpx.Client(transport=httpx.MockTransport(handler))
+
+  with pytest.raises(httpx.ConnectError):
+    oh.get_item('dimmer')
+
+  assert metrics.snapshot()['requests']['GET /items/{name}']['status'] == {'error': 1}
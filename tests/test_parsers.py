@@ -0,0 +1,232 @@
+import datetime
+import math
+import random
+import re
+import typing
+
+import dateutil.parser
+
+import openhab.command_types
+import openhab.items
+from tests.fake_openhab import BASE_URL
+
+# ruff: noqa: S101, ANN201, S311
+
+# the parsers as implemented before the fast path was added, as reference for the expected behaviour
+
+
+def _reference_decimal_parse(value: str) -> typing.Union[None, tuple[typing.Union[int, float], str]]:
+  if value in openhab.command_types.DecimalType.UNDEFINED_STATES:
+    return None
+
+  m = re.match(r'(-?[0-9.]+(?:[eE]-?[0-9]+)?)\s?(.*)?$', value)
+  if m:
+    value_value = m.group(1)
+    value_unit_of_measure = m.group(2)
+
+    try:
+      if '.' in value:
+        return_value: typing.Union[int, float] = float(value_value)
+      else:
+        return_value = int(value_value)
+    except ArithmeticError as exc:
+      raise ValueError(exc) from exc
+
+    return return_value, value_unit_of_measure
+
+  raise ValueError
+
+
+def _reference_number_parse(value: str) -> tuple[typing.Optional[float], str]:
+  if value in ('UNDEF', 'NULL'):
+    return None, ''
+
+  try:
+    m = re.match(r'(-?[0-9.]+(?:[eE]-?[0-9]+)?)\s?(.*)?$', value)
+
+    if m:
+      value = m.group(1)
+      unit_of_measure = m.group(2)
+
+      return float(value), unit_of_measure
+
+    return float(value), ''
+
+  except (ArithmeticError, ValueError):
+    pass
+
+  raise ValueError
+
+
+EDGE_CASES = [
+  '0',
+  '23',
+  '-23',
+  '007',
+  '23.5',
+  '-0.5',
+  '.5',
+  '5.',
+  '.',
+  '-.',
+  '-',
+  '--5',
+  '+5',
+  '',
+  ' ',
+  ' 5',
+  '5 ',
+  '5  °C',
+  '21.5 °C',
+  '-1.25 °C',
+  '1013.2 hPa',
+  '1 m.s',
+  '1.2.3',
+  '1.2.3 W',
+  '1e5',
+  '1E-3 m',
+  '1.5e3 W',
+  '1e',
+  '1e-',
+  '1_000',
+  '1,5',
+  '1-2',
+  '21.5°C',
+  '21.5\t°C',
+  '21.5 °C\n',
+  '21.5\n°C',
+  '21.5 a\nb',
+  '5\n',
+  '²',
+  '1²',
+  '١٢',
+  'inf',
+  'nan',
+  '-Infinity',
+  'NULL',
+  'UNDEF',
+  'null',
+  'ON',
+  '12345678901234567890',
+  '0.1 %',
+  '100 %',
+  '3 kWh/m²',
+]
+
+
+def _fuzz_cases(count: int) -> list[str]:
+  generator = random.Random(42)
+  alphabet = '0123456789.-+eE °C%\t\nab²'
+  return [''.join(generator.choice(alphabet) for _ in range(generator.randint(0, 8))) for _ in range(count)]
+
+
+def _outcome(function: typing.Callable[[str], typing.Any], value: str) -> typing.Any:
+  try:
+    result = function(value)
+  except ValueError:
+    return ValueError
+
+  # compare NaN by kind and ints and floats by type
+  if isinstance(result, tuple) and isinstance(result[0], float) and math.isnan(result[0]):
+    return 'nan', result[1]
+
+  return result if not isinstance(result, tuple) else (type(result[0]), *result)
+
+
+def test_decimal_type_parse_equivalence():
+  mismatches = [
+    value for value in EDGE_CASES + _fuzz_cases(5000) if _outcome(openhab.command_types.DecimalType.parse, value) != _outcome(_reference_decimal_parse, value)
+  ]
+
+  assert not mismatches
+
+
+def test_number_item_parse_equivalence():
+  item = openhab.items.NumberItem(openhab.OpenHAB(BASE_URL), {'name': 'number', 'type': 'Number', 'state': 'NULL'})
+  parse = item._parse_rest  # noqa: SLF001
+
+  mismatches = [value for value in EDGE_CASES + _fuzz_cases(5000) if _outcome(parse, value) != _outcome(_reference_number_parse, value)]
+
+  assert not mismatches
+
+
+def test_units_are_interned():
+  first = openhab.command_types.DecimalType.parse(''.join(['21.5 ', '°C']))
+  second = openhab.command_types.DecimalType.parse(''.join(['22 ', '°C']))
+
+  assert first is not None and second is not None
+  assert first[1] is second[1]
+
+
+DATETIME_CASES = [
+  '2024-01-02T03:04:05.678+0100',
+  '2024-01-02T03:04:05.678+01:00',
+  '2024-01-02T03:04:05.678-0530',
+  '2024-01-02T03:04:05.678+0000',
+  '2024-01-02T03:04:05.678-00:00',
+  '2024-01-02T03:04:05Z',
+  '2024-01-02T03:04:05.1+0100',
+  '2024-01-02T03:04:05.123456+0100',
+  '2024-01-02T03:04:05.123456789+0100',
+  '2024-01-02T03:04:05',
+  '2024-01-02T03:04',
+  '2024-01-02T03:04+0200',
+  '2024-02-29T23:59:59.999+1400',
+  '2023-02-29T00:00:00.000+0100',
+  '2024-13-01T00:00:00.000+0100',
+  '2024-01-02T24:00:00.000+0100',
+  '2024-01-02T03:04:60.000+0100',
+  '2024-01-02T03:04:05.678+2400',
+  '2024-01-02T03:04:05.678+01',
+  '2024-01-02 03:04:05',
+  '2024-01-02t03:04:05',
+  '2024-01-02T03:04:05,678+0100',
+  '2024-01-02',
+  '20240102T030405',
+  'Jan 2 2024 03:04',
+  'not a date',
+  '',
+]
+
+
+def _datetime_outcome(value: str) -> typing.Any:
+  try:
+    result = openhab.command_types.DateTimeType.parse(value)
+    assert result is not None
+    return result.replace(tzinfo=None), result.utcoffset()
+  except ValueError:
+    return ValueError
+
+
+def _reference_datetime_outcome(value: str) -> typing.Any:
+  try:
+    result = dateutil.parser.parse(value)
+    return result.replace(tzinfo=None), result.utcoffset()
+  except ValueError:
+    return ValueError
+
+
+def test_datetime_parse_equivalence():
+  generator = random.Random(42)
+  start = datetime.datetime(2000, 1, 1, tzinfo=datetime.timezone.utc)
+  generated = []
+
+  for _ in range(2000):
+    offset = datetime.timedelta(minutes=generator.randrange(-12 * 60, 14 * 60 + 1, 15))
+    timestamp = (start + datetime.timedelta(seconds=generator.uniform(0, 1e9))).astimezone(datetime.timezone(offset))
+    generated.append(timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')[: generator.choice((19, 21, 23, 26))] + timestamp.strftime('%z'))
+
+  mismatches = [value for value in DATETIME_CASES + generated if _datetime_outcome(value) != _reference_datetime_outcome(value)]
+
+  assert not mismatches
+
+
+def test_datetime_parse():
+  value = openhab.command_types.DateTimeType.parse('2024-01-02T03:04:05.678+0100')
+
+  assert value == datetime.datetime(2024, 1, 2, 2, 4, 5, 678000, tzinfo=datetime.timezone.utc)
+  assert value is openhab.command_types.DateTimeType.parse('2024-01-02T03:04:05.678+0100')
+  assert openhab.command_types.DateTimeType.parse('NULL') is None
+
+  # dateutil fills in missing fields of other formats from the current date, so these are not cached
+  assert openhab.command_types.parse_datetime('03:04') == datetime.datetime.combine(datetime.date.today(), datetime.time(3, 4))  # noqa: DTZ011
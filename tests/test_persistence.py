@@ -0,0 +1,247 @@
+import asyncio
+import datetime
+import random
+import threading
+import time
+
+import httpx
+import pytest
+
+import openhab
+from tests.fake_openhab import BASE_URL, FakeOpenHAB
+
+# ruff: noqa: S101, S311, ANN201, T201
+
+
+def _persistence_requests(fake_openhab: FakeOpenHAB) -> list[httpx.Request]:
+  return [r for r in fake_openhab.requests if r.url.path.startswith('/rest/persistence/')]
+
+
+@pytest.mark.parametrize('prefetch', [0, 1, 3, 10])
+def test_prefetch_preserves_order(fake_openhab: FakeOpenHAB, prefetch: int):
+  def jittery_handler(request: httpx.Request) -> httpx.Response:
+    time.sleep(random.uniform(0, 0.005))
+    return fake_openhab.handle(request)
+
+  oh = openhab.OpenHAB(BASE_URL)
+  oh.session = httpx.Client(transport=httpx.MockTransport(jittery_handler))
+
+  data = list(oh.get_item_persistence('temperature', page_length=4, prefetch=prefetch))
+
+  assert data == fake_openhab.persistence['temperature']
+
+
+def test_prefetch_stops_early(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  data = oh_fake.get_item_persistence('temperature', page_length=2, prefetch=2)
+
+  assert next(data) == fake_openhab.persistence['temperature'][0]
+  data.close()
+  time.sleep(0.05)
+
+  assert len(_persistence_requests(fake_openhab)) <= 4
+
+
+def test_async_prefetch(fake_openhab: FakeOpenHAB):
+  async def run():
+    async with openhab.AsyncOpenHAB(BASE_URL) as oh:
+      oh.session = httpx.AsyncClient(transport=fake_openhab.transport())
+      return [entry async for entry in oh.get_item_persistence('temperature', page_length=3, prefetch=2)]
+
+  assert asyncio.run(run()) == fake_openhab.persistence['temperature']
+
+
+def _utc(millis: int) -> datetime.datetime:
+  return datetime.datetime.fromtimestamp(millis / 1000, tz=datetime.timezone.utc)
+
+
+@pytest.mark.parametrize('shards', [1, 3, 4, 7])
+def test_sharded_matches_single_request(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB, shards: int):
+  points = fake_openhab.persistence['temperature']
+  # window boundaries fall on data points for shards=4 (24 minutes / 4)
+  start, end = _utc(points[0]['time']), _utc(points[-1]['time'])
+
+  data = list(oh_fake.persistence.get_sharded('temperature', start, end, shards=shards))
+
+  assert data == points
+  assert len(_persistence_requests(fake_openhab)) == shards
+
+
+@pytest.mark.parametrize('shards', [1, 4, 5])
+def test_sharded_boundary(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB, shards: int):
+  points = fake_openhab.persistence['temperature']
+  start, end = _utc(points[4]['time'] + 1), _utc(points[20]['time'] - 1)
+
+  data = list(oh_fake.persistence.get_sharded('temperature', start, end, shards=shards, boundary=True))
+
+  assert data == points[4:21]
+
+
+def test_sharded_uneven_windows(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  # 1 second split into 7 windows, so that the window edges do not fall on whole milliseconds; every
+  # millisecond holds a data point, so points lie on the edges
+  start = 1700000000000
+  fake_openhab.persistence['dimmer'] = [{'time': start + i, 'state': str(i % 100)} for i in range(1001)]
+
+  data = list(oh_fake.persistence.get_sharded('dimmer', _utc(start), _utc(start + 1000), shards=7))
+
+  assert data == fake_openhab.persistence['dimmer']
+
+
+def test_sharded_stops_early(fake_openhab: FakeOpenHAB):
+  points = fake_openhab.persistence['temperature']
+  start, end = _utc(points[0]['time']), _utc(points[-1]['time'])
+  release = threading.Event()
+
+  def slow_handler(request: httpx.Request) -> httpx.Response:
+    # all windows but the first one hang until released
+    if request.url.params.get('starttime') != start.isoformat():
+      release.wait(5)
+    return fake_openhab.handle(request)
+
+  oh = openhab.OpenHAB(BASE_URL)
+  oh.session = httpx.Client(transport=httpx.MockTransport(slow_handler))
+  data = oh.persistence.get_sharded('temperature', start, end, shards=4, max_workers=2)
+
+  assert next(data) == points[0]
+
+  started = time.perf_counter()
+  data.close()
+  assert time.perf_counter() - started < 1
+
+  release.set()
+
+
+def test_sharded_invalid_range(oh_fake: openhab.OpenHAB):
+  now = datetime.datetime.now(tz=datetime.timezone.utc)
+
+  with pytest.raises(ValueError, match='end_time'):
+    list(oh_fake.persistence.get_sharded('temperature', now, now))
+
+
+def test_columns_number(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  np = pytest.importorskip('numpy')
+  points = fake_openhab.persistence['temperature']
+
+  columns = oh_fake.persistence.get_columns('temperature', page_length=10)
+
+  assert len(columns) == len(points)
+  assert columns.time.dtype == np.int64
+  assert columns.time.tolist() == [p['time'] for p in points]
+  assert columns.values.dtype == np.float64
+  assert columns.values.tolist() == pytest.approx([20 + i / 10 for i in range(len(points))])
+  assert not columns.mask.any()
+  assert columns.unit == '°C'
+
+
+def test_columns_mask(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  np = pytest.importorskip('numpy')
+  fake_openhab.persistence['dimmer'] = [{'time': 1, 'state': '10'}, {'time': 2, 'state': 'UNDEF'}, {'time': 3, 'state': 'NULL'}, {'time': 4, 'state': '40'}]
+  fake_openhab.persistence['the_contact'] = [{'time': 1, 'state': 'OPEN'}, {'time': 2, 'state': 'NULL'}]
+  fake_openhab.persistence['the_datetime'] = [{'time': 1, 'state': '2024-01-02T03:04:05.678+0100'}, {'time': 2, 'state': 'UNDEF'}]
+
+  dimmer = oh_fake.persistence.get_columns('dimmer')
+  assert dimmer.mask.tolist() == [False, True, True, False]
+  assert dimmer.values[~dimmer.mask].tolist() == [10.0, 40.0]
+  assert np.isnan(dimmer.values[dimmer.mask]).all()
+
+  contact = oh_fake.persistence.get_columns(oh_fake.get_item('the_contact'))
+  assert contact.values.dtype == object
+  assert contact.values.tolist() == ['OPEN', None]
+  assert contact.mask.tolist() == [False, True]
+
+  the_datetime = oh_fake.persistence.get_columns('the_datetime')
+  assert the_datetime.values.dtype == np.dtype('datetime64[ms]')
+  assert the_datetime.values[0] == np.datetime64('2024-01-02T02:04:05.678')
+  assert np.isnat(the_datetime.values[1])
+
+
+@pytest.mark.parametrize(
+  ('align', 'time', 'dimmer'),
+  [
+    (None, [0, 10, 15, 20, 30], [None, None, 1.0, None, 2.0]),
+    ('ffill', [0, 10, 15, 20, 30], [None, None, 1.0, 1.0, 2.0]),
+    ('nearest', [0, 10, 15, 20, 30], [1.0, 1.0, 1.0, 1.0, 2.0]),
+    ('drop', [30], [2.0]),
+  ],
+)
+def test_get_persistence_many(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB, align: str, time: list, dimmer: list):
+  np = pytest.importorskip('numpy')
+  fake_openhab.persistence['temperature'] = [{'time': t, 'state': f'{t} °C'} for t in (0, 10, 20, 30)]
+  fake_openhab.persistence['dimmer'] = [{'time': 15, 'state': '1'}, {'time': 30, 'state': '2'}]
+
+  matrix = oh_fake.get_persistence_many(['temperature', 'dimmer'], align=align)
+
+  assert matrix.columns == ['temperature', 'dimmer']
+  assert matrix.units == ['°C', '']
+  assert matrix.time.tolist() == time
+  assert matrix.values.shape == (len(time), 2)
+  assert [None if np.isnan(v) else v for v in matrix.column('dimmer')] == dimmer
+  if align is not None:
+    assert not np.isnan(matrix.column('temperature')).any()
+
+
+def test_get_persistence_many_not_numeric(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  pytest.importorskip('numpy')
+  fake_openhab.persistence['the_contact'] = [{'time': 1, 'state': 'OPEN'}]
+
+  with pytest.raises(ValueError, match='not numeric'):
+    oh_fake.get_persistence_many(['temperature', 'the_contact'])
+
+
+def test_write(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  points = [(1700000000000 + i * 1000, 20 + i / 4) for i in range(50)]
+  points.append((datetime.datetime(2024, 1, 1, 12, tzinfo=datetime.timezone(datetime.timedelta(hours=1))), (21.5, '°C')))
+  points.append((1800000000000, 'not a number'))
+
+  report = oh_fake.persistence.write('temperature', points, service_id='rrd4j', max_workers=4)
+
+  assert report.written == 51
+  assert len(report.failed) == 1
+  assert report.failed[0][1] == 'not a number'
+  assert report.points_per_second > 0
+
+  written = {p['time']: p['state'] for p in fake_openhab.persistence['temperature']}
+  assert written[1700000000000] == '20'
+  assert written[1700000000000 + 49 * 1000] == '32.25'
+  assert written[1704106800000] == '21.5 °C'
+  assert all(r.url.params['serviceId'] == 'rrd4j' for r in _persistence_requests(fake_openhab) if r.method == 'PUT')
+
+
+def test_write_retry(fake_openhab: FakeOpenHAB):
+  failures = {1: 2, 2: 5}
+
+  def flaky_handler(request: httpx.Request) -> httpx.Response:
+    if request.method == 'PUT':
+      time_ = int(datetime.datetime.strptime(request.url.params['time'], '%Y-%m-%dT%H:%M:%S.%f%z').timestamp() * 1000)
+      if failures.get(time_, 0) > 0:
+        failures[time_] -= 1
+        return httpx.Response(503)
+    return fake_openhab.handle(request)
+
+  oh = openhab.OpenHAB(BASE_URL)
+  oh.session = httpx.Client(transport=httpx.MockTransport(flaky_handler))
+
+  report = oh.persistence.write('dimmer', [(0, 10), (1, 20), (2, 30)], retries=2, retry_delay=0)
+
+  assert report.written == 2
+  assert report.retries == 4
+  assert [f[0] for f in report.failed] == [2]
+  assert isinstance(report.failed[0][2], httpx.HTTPStatusError)
+  assert [p['time'] for p in fake_openhab.persistence['dimmer']] == [0, 1]
+
+
+def test_decoded(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  fake_openhab.add_item('the_color', 'Color', '10,20,30')
+  fake_openhab.persistence['the_color'] = [{'time': 1000, 'state': '1,2,3'}, {'time': 2000, 'state': 'UNDEF'}]
+  fake_openhab.persistence['the_datetime'] = [{'time': 1000, 'state': '2024-01-02T03:04:05.678+0100'}]
+  fake_openhab.persistence['dimmer'] = [{'time': 1000, 'state': '55'}]
+
+  temperature = list(oh_fake.get_item('temperature').persistence(decoded=True))
+  assert temperature[0] == {'time': datetime.datetime(2023, 11, 14, 22, 13, 20, tzinfo=datetime.timezone.utc), 'state': (20.0, '°C')}
+  assert temperature[-1]['state'] == pytest.approx((22.4, '°C'))
+
+  assert [p['state'] for p in oh_fake.get_item('the_color').persistence(decoded=True)] == [(1.0, 2.0, 3.0), None]
+  assert [p['state'] for p in oh_fake.get_item('dimmer').persistence(decoded=True)] == [55.0]
+
+  (the_datetime,) = oh_fake.get_item('the_datetime').persistence(decoded=True)
+  assert the_datetime['state'] == datetime.datetime(2024, 1, 2, 2, 4, 5, 678000, tzinfo=datetime.timezone.utc)
@@ -0,0 +1,164 @@
+import datetime
+
+import httpx
+import pytest
+
+import openhab
+import openhab.persistence
+from openhab.persistence_cache import LRUPersistenceCache, PersistenceCache, SQLitePersistenceCache
+from tests.fake_openhab import BASE_URL, FakeOpenHAB
+
+# ruff: noqa: S101, ANN201, T201
+
+
+def _persistence_requests(fake_openhab: FakeOpenHAB) -> list[httpx.Request]:
+  return [r for r in fake_openhab.requests if r.url.path.startswith('/rest/persistence/')]
+
+
+def _cached_oh(fake_openhab: FakeOpenHAB, cache: PersistenceCache) -> openhab.OpenHAB:
+  oh = openhab.OpenHAB(BASE_URL, persistence_cache=cache)
+  oh.session = httpx.Client(transport=fake_openhab.transport())
+  return oh
+
+
+def _utc(millis: int) -> datetime.datetime:
+  return openhab.persistence.from_millis(millis)
+
+
+@pytest.mark.parametrize(
+  ('covered', 'expected'),
+  [
+    ([], [(0, 100)]),
+    ([(0, 100)], []),
+    ([(-10, 20), (50, 60)], [(20, 50), (60, 100)]),
+    ([(10, 20), (20, 30), (90, 200)], [(0, 10), (30, 90)]),
+  ],
+)
+def test_gaps(covered: list, expected: list):
+  assert PersistenceCache.gaps(covered, 0, 100) == expected
+
+
+def test_delta_sync(fake_openhab: FakeOpenHAB):
+  oh = _cached_oh(fake_openhab, SQLitePersistenceCache())
+  points = fake_openhab.persistence['temperature']
+  start = _utc(points[0]['time'])
+
+  assert list(oh.get_item_persistence('temperature', start_time=start, end_time=_utc(points[10]['time']))) == points[:11]
+  assert len(_persistence_requests(fake_openhab)) == 1
+
+  # served from the cache
+  assert list(oh.get_item('temperature').persistence(start_time=_utc(points[2]['time']), end_time=_utc(points[8]['time']))) == points[2:9]
+  assert len(_persistence_requests(fake_openhab)) == 1
+
+  # only the tail is fetched
+  assert list(oh.get_item_persistence('temperature', start_time=start, end_time=_utc(points[-1]['time']))) == points
+  requests = _persistence_requests(fake_openhab)
+  assert len(requests) == 2
+  assert datetime.datetime.fromisoformat(requests[-1].url.params['starttime']) == _utc(points[10]['time'])
+
+  # boundary requests bypass the cache
+  list(oh.get_item_persistence('temperature', start_time=start, end_time=_utc(points[-1]['time']), boundary=True))
+  assert len(_persistence_requests(fake_openhab)) == 3
+
+
+def test_future_not_cached(fake_openhab: FakeOpenHAB):
+  oh = _cached_oh(fake_openhab, SQLitePersistenceCache())
+  now = datetime.datetime.now(tz=datetime.timezone.utc)
+  fake_openhab.persistence['dimmer'] = [{'time': openhab.persistence.to_millis(now) - 1000, 'state': '10'}]
+
+  assert len(list(oh.get_item_persistence('dimmer', end_time=now + datetime.timedelta(hours=1)))) == 1
+  assert len(list(oh.get_item_persistence('dimmer', end_time=now + datetime.timedelta(hours=1)))) == 1
+  assert len(_persistence_requests(fake_openhab)) == 2
+
+
+def test_naive_start_time(fake_openhab: FakeOpenHAB):
+  oh = _cached_oh(fake_openhab, SQLitePersistenceCache())
+  points = fake_openhab.persistence['temperature']
+  # naive datetimes are in local time, as without a cache
+  start = _utc(points[3]['time']).astimezone().replace(tzinfo=None)
+
+  assert list(oh.get_item_persistence('temperature', start_time=start)) == points[3:]
+  assert list(oh.get_item_persistence('temperature', start_time=start, cached=False)) == points[3:]
+
+
+def test_cache_file(fake_openhab: FakeOpenHAB, tmp_path):
+  points = fake_openhab.persistence['temperature']
+  start, end = _utc(points[0]['time']), _utc(points[-1]['time'])
+
+  cache = SQLitePersistenceCache(tmp_path / 'persistence.db')
+  list(_cached_oh(fake_openhab, cache).get_item_persistence('temperature', start_time=start, end_time=end))
+  cache.close()
+
+  cache = SQLitePersistenceCache(tmp_path / 'persistence.db')
+  assert list(_cached_oh(fake_openhab, cache).get_item_persistence('temperature', start_time=start, end_time=end)) == points
+  assert len(_persistence_requests(fake_openhab)) == 1
+
+  cache.clear(name='temperature')
+  assert cache.missing('', 'temperature', 0, 10) == [(0, 10)]
+
+
+def _memory_cached_oh(fake_openhab: FakeOpenHAB, cache: LRUPersistenceCache) -> openhab.OpenHAB:
+  oh = openhab.OpenHAB(BASE_URL, persistence_memory_cache=cache)
+  oh.session = httpx.Client(transport=fake_openhab.transport())
+  return oh
+
+
+def test_memory_cache_sub_range(fake_openhab: FakeOpenHAB):
+  cache = LRUPersistenceCache()
+  oh = _memory_cached_oh(fake_openhab, cache)
+  points = fake_openhab.persistence['temperature']
+
+  assert list(oh.get_item_persistence('temperature', start_time=_utc(points[2]['time']), end_time=_utc(points[20]['time']))) == points[2:21]
+  assert (cache.hits, cache.misses) == (0, 1)
+
+  # sub-ranges are served from the cached superset, with boundary values if they are within it
+  assert list(oh.get_item_persistence('temperature', start_time=_utc(points[5]['time']), end_time=_utc(points[9]['time']))) == points[5:10]
+  assert list(oh.get_item_persistence('temperature', start_time=_utc(points[5]['time'] + 1), end_time=_utc(points[9]['time'] - 1), boundary=True)) == points[5:10]
+  assert (cache.hits, cache.misses) == (2, 1)
+  assert len(_persistence_requests(fake_openhab)) == 1
+
+  # the boundary value before the cached range is unknown
+  assert list(oh.get_item_persistence('temperature', start_time=_utc(points[2]['time']), end_time=_utc(points[9]['time']), boundary=True)) == points[1:11]
+  assert (cache.hits, cache.misses) == (2, 2)
+
+  # ... but known now
+  assert list(oh.get_item_persistence('temperature', start_time=_utc(points[2]['time'] + 1), end_time=_utc(points[3]['time']), boundary=True)) == points[2:5]
+  assert (cache.hits, cache.misses) == (3, 2)
+  assert len(_persistence_requests(fake_openhab)) == 2
+
+
+def test_memory_cache_eviction(fake_openhab: FakeOpenHAB):
+  points = fake_openhab.persistence['temperature']
+  size = sum(LRUPersistenceCache.estimate_size(p) for p in points[:10])
+  cache = LRUPersistenceCache(max_bytes=int(size * 1.5))
+  oh = _memory_cached_oh(fake_openhab, cache)
+
+  first = (_utc(points[0]['time']), _utc(points[9]['time']))
+  second = (_utc(points[10]['time']), _utc(points[19]['time']))
+
+  list(oh.get_item_persistence('temperature', start_time=first[0], end_time=first[1]))
+  list(oh.get_item_persistence('temperature', start_time=second[0], end_time=second[1]))
+  assert cache.evictions == 1
+  assert cache.size <= cache.max_bytes
+
+  list(oh.get_item_persistence('temperature', start_time=second[0], end_time=second[1]))
+  list(oh.get_item_persistence('temperature', start_time=first[0], end_time=first[1]))
+  assert (cache.hits, cache.misses, cache.evictions) == (1, 3, 2)
+
+  # results exceeding the budget are not cached at all
+  list(oh.get_item_persistence('temperature', start_time=_utc(points[0]['time']), end_time=_utc(points[-1]['time'])))
+  assert cache.evictions == 2
+
+
+def test_memory_cache_future_not_cached(fake_openhab: FakeOpenHAB):
+  oh = _memory_cached_oh(fake_openhab, LRUPersistenceCache())
+  now = datetime.datetime.now(tz=datetime.timezone.utc)
+  fake_openhab.persistence['dimmer'] = [{'time': openhab.persistence.to_millis(now) - 1000, 'state': '10'}]
+  start, end = now - datetime.timedelta(hours=1), now + datetime.timedelta(hours=1)
+
+  assert len(list(oh.get_item_persistence('dimmer', start_time=start, end_time=end))) == 1
+
+  # a value persisted after the first query is returned by the second one
+  fake_openhab.persistence['dimmer'].append({'time': openhab.persistence.to_millis(now) + 10, 'state': '20'})
+  assert len(list(oh.get_item_persistence('dimmer', start_time=start, end_time=end))) == 2
+  assert len(_persistence_requests(fake_openhab)) == 2
@@ -0,0 +1,147 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import openhab
+import openhab.exceptions
+from openhab.retry import CircuitBreaker, RetryPolicy
+from tests.fake_openhab import BASE_URL, FakeOpenHAB
+
+# ruff: noqa: S101, ANN201, ANN202
+
+
+def _flaky(fake_openhab: FakeOpenHAB, failures: list) -> httpx.MockTransport:
+  """Transport failing with the given outcomes (a status code or an exception) before passing requests on."""
+
+  def handler(request: httpx.Request) -> httpx.Response:
+    if failures:
+      failure = failures.pop(0)
+      if isinstance(failure, Exception):
+        raise failure
+      return httpx.Response(failure, headers={'Retry-After': '0'})
+    return fake_openhab.handle(request)
+
+  return httpx.MockTransport(handler)
+
+
+def test_retry_get(fake_openhab: FakeOpenHAB):
+  oh = openhab.OpenHAB(BASE_URL, retry=RetryPolicy(backoff=0))
+  oh.session = httpx.Client(transport=_flaky(fake_openhab, [503, httpx.ConnectError('refused')]))
+
+  assert oh.get_item('dimmer').state == 40.0
+
+  oh.session = httpx.Client(transport=_flaky(fake_openhab, [503, 503, 503]))
+  with pytest.raises(httpx.HTTPStatusError):
+    oh.get_item('dimmer')
+
+  oh.session = httpx.Client(transport=_flaky(fake_openhab, [500]))
+  with pytest.raises(httpx.HTTPStatusError):
+    oh.get_item('dimmer')
+
+
+def test_retry_post(fake_openhab: FakeOpenHAB):
+  oh = openhab.OpenHAB(BASE_URL, retry=RetryPolicy(backoff=0))
+  oh.session = httpx.Client(transport=_flaky(fake_openhab, [503]))
+
+  # commands are not repeated unless POST is added to the policy
+  with pytest.raises(httpx.HTTPStatusError):
+    oh.req_post('/items/light_kitchen', data='OFF')
+  assert fake_openhab.items['light_kitchen']['state'] == 'ON'
+
+  oh.retry = RetryPolicy(backoff=0, methods=frozenset({'GET', 'PUT', 'POST'}))
+  oh.session = httpx.Client(transport=_flaky(fake_openhab, [503]))
+  oh.req_post('/items/light_kitchen', data='OFF')
+  assert fake_openhab.items['light_kitchen']['state'] == 'OFF'
+
+
+def test_retry_delay():
+  policy = RetryPolicy(backoff=1, max_backoff=3)
+
+  assert all(0 <= policy.delay(attempt) <= min(3, 2**attempt) for attempt in range(5) for _ in range(20))
+  assert policy.delay(0, httpx.Response(429, headers={'Retry-After': '2'})) >= 2
+  assert not policy.should_retry('GET', 2)
+  assert not policy.should_retry('GET', 0, httpx.Response(404))
+
+
+def test_circuit_breaker(fake_openhab: FakeOpenHAB):
+  breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60)
+  oh = openhab.OpenHAB(BASE_URL, circuit_breaker=breaker)
+  oh.session = httpx.Client(transport=_flaky(fake_openhab, [httpx.ConnectError('refused'), 503]))
+
+  for _ in range(2):
+    with pytest.raises((httpx.ConnectError, httpx.HTTPStatusError)):
+      oh.get_item('dimmer')
+  assert breaker.state == CircuitBreaker.OPEN
+
+  # requests fail fast without reaching openHAB
+  requests = len(fake_openhab.requests)
+  with pytest.raises(openhab.exceptions.CircuitOpenException):
+    oh.get_item('dimmer')
+  assert len(fake_openhab.requests) == requests
+
+  # after the reset timeout a single trial request is let through and closes the breaker
+  breaker.opened_at = time.monotonic() - 60
+  assert breaker.state == CircuitBreaker.HALF_OPEN
+  breaker.before_request()
+  with pytest.raises(openhab.exceptions.CircuitOpenException):
+    breaker.before_request()
+  breaker.record(False)
+  assert breaker.state == CircuitBreaker.OPEN
+
+  breaker.opened_at = time.monotonic() - 60
+  assert oh.get_item('dimmer').state == 40.0
+  assert breaker.state == CircuitBreaker.CLOSED
+  assert breaker.failures == 0
+
+
+def test_async_retry(fake_openhab: FakeOpenHAB):
+  async def run():
+    async with openhab.AsyncOpenHAB(BASE_URL, retry=RetryPolicy(backoff=0)) as oh:
+      failures = [503, httpx.ConnectError('refused')]
+
+      async def handler(request: httpx.Request) -> httpx.Response:
+        if failures:
+          failure = failures.pop(0)
+          if isinstance(failure, Exception):
+            raise failure
+          return httpx.Response(failure)
+        return fake_openhab.handle(request)
+
+      oh.session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+      item = await oh.get_item('dimmer')
+      return await item.async_refresh()
+
+  assert asyncio.run(run()) == 40.0
+
+
+def test_circuit_breaker_cancelled_trial(fake_openhab: FakeOpenHAB):
+  async def run():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60)
+    breaker.record(False)
+    breaker.opened_at = time.monotonic() - 60
+    started = asyncio.Event()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+      if not started.is_set():
+        started.set()
+        await asyncio.sleep(60)
+      return fake_openhab.handle(request)
+
+    async with openhab.AsyncOpenHAB(BASE_URL, circuit_breaker=breaker) as oh:
+      oh.session = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+      # the trial request is cancelled, which must not keep the breaker from letting another trial through
+      trial = asyncio.ensure_future(oh.get_item('dimmer'))
+      await started.wait()
+      trial.cancel()
+      with pytest.raises(asyncio.CancelledError):
+        await trial
+
+      item = await oh.get_item('dimmer')
+      return item, breaker.state
+
+  item, state = asyncio.run(run())
+  assert item.name == 'dimmer'
+  assert state == CircuitBreaker.CLOSED
@@ -0,0 +1,102 @@
+import datetime
+import math
+import random
+
+import pytest
+
+import openhab
+from openhab.timeseries import aggregate, lttb, resample
+from tests.fake_openhab import FakeOpenHAB
+
+# ruff: noqa: S101, S311, ANN201, T201
+
+np = pytest.importorskip('numpy')
+
+
+def _reference(data: list, step_ms: int) -> list:
+  buckets: dict[int, list[float]] = {}
+  for entry in data:
+    if entry['state'] not in ('UNDEF', 'NULL'):
+      buckets.setdefault(entry['time'] // step_ms * step_ms, []).append(float(entry['state'].split()[0]))
+
+  return [(t, min(v), max(v), sum(v) / len(v), v[-1], len(v)) for t, v in sorted(buckets.items())]
+
+
+@pytest.mark.parametrize('chunk_size', [1, 7, 1000])
+def test_aggregate(chunk_size: int):
+  random.seed(chunk_size)
+  data = []
+  t = 0
+  for _ in range(500):
+    t += random.randint(1, 3000)
+    data.append({'time': t, 'state': random.choice(['UNDEF', f'{random.uniform(-10, 30):.2f} °C'])})
+
+  result = [(b.time, b.min, b.max, b.avg, b.last, b.count) for b in aggregate(iter(data), datetime.timedelta(seconds=10), chunk_size=chunk_size)]
+  expected = _reference(data, 10000)
+
+  assert [r[0] for r in result] == [e[0] for e in expected]
+  assert [r[5] for r in result] == [e[5] for e in expected]
+  for r, e in zip(result, expected):
+    assert r[1:5] == pytest.approx(e[1:5])
+
+
+def test_aggregate_empty():
+  assert list(aggregate([], datetime.timedelta(minutes=1))) == []
+  assert list(aggregate([{'time': 1, 'state': 'NULL'}], datetime.timedelta(minutes=1))) == []
+
+
+def test_lttb():
+  time = np.arange(10000, dtype=np.int64) * 1000
+  values = np.sin(np.arange(10000) / 500) * 10
+  values[5000] = 100  # a spike must survive the downsampling
+  values[7000] = np.nan
+
+  t, v = lttb(time, values, 200)
+
+  assert len(t) == len(v) == 200
+  assert t[0] == 0
+  assert t[-1] == time[-1]
+  assert (np.diff(t) > 0).all()
+  assert 100 in v
+  assert not np.isnan(v).any()
+
+
+def test_lttb_small():
+  t, v = lttb(np.array([1, 2, 3]), np.array([1.0, math.nan, 3.0]), 10)
+
+  assert t.tolist() == [1, 3]
+  assert v.tolist() == [1.0, 3.0]
+
+
+def _ms(millis: int) -> datetime.datetime:
+  return datetime.datetime.fromtimestamp(millis / 1000, tz=datetime.timezone.utc)
+
+
+DATA = [{'time': 0, 'state': '0'}, {'time': 10000, 'state': '10'}, {'time': 15000, 'state': 'UNDEF'}, {'time': 20000, 'state': '20'}, {'time': 60000, 'state': '60'}]
+
+
+@pytest.mark.parametrize(
+  ('method', 'max_gap', 'expected'),
+  [
+    ('hold', None, [0, 0, 10, None, 20, 20, 20, 20, 20, 20, 20, 20, 60, 60]),
+    ('hold', datetime.timedelta(seconds=12), [0, 0, 10, None, 20, 20, 20, None, None, None, None, None, 60, 60]),
+    ('linear', None, [0, 5, 10, None, 20, 25, 30, 35, 40, 45, 50, 55, 60, None]),
+    ('linear', datetime.timedelta(seconds=10), [0, 5, 10, None, 20, None, None, None, None, None, None, None, 60, None]),
+  ],
+)
+def test_resample(method: str, max_gap: datetime.timedelta, expected: list):
+  grid, values = resample(DATA, datetime.timedelta(seconds=5), _ms(0), _ms(65000), method=method, max_gap=max_gap)
+
+  assert grid.tolist() == list(range(0, 65001, 5000))
+  assert [None if np.isnan(v) else v for v in values] == expected
+
+
+def test_resample_boundary_seed(oh_fake: openhab.OpenHAB, fake_openhab: FakeOpenHAB):
+  points = fake_openhab.persistence['temperature']
+  start, end = _ms(points[3]['time'] + 30000), _ms(points[6]['time'])
+
+  grid, values = resample(oh_fake.get_item_persistence('temperature', start_time=start, end_time=end, boundary=True), datetime.timedelta(seconds=30), start, end)
+
+  assert len(grid) == 6
+  assert values.tolist() == pytest.approx([20.3, 20.4, 20.4, 20.5, 20.5, 20.6])
+  assert len([r for r in fake_openhab.requests if r.url.path.startswith('/rest/persistence/')]) == 1
@@ -0,0 +1,92 @@
+import asyncio
+import datetime
+
+import httpx
+import pytest
+
+import openhab
+from openhab.tracing import RecordingTracer
+from tests.fake_openhab import BASE_URL, FakeOpenHAB
+
+# ruff: noqa: S101, ANN201, ANN202
+
+
+@pytest.fixture
+def traced_oh(fake_openhab: FakeOpenHAB) -> tuple[openhab.OpenHAB, RecordingTracer]:
+  tracer = RecordingTracer()
+  oh = openhab.OpenHAB(BASE_URL, tracer=tracer)
+  oh.session = httpx.Client(transport=fake_openhab.transport())
+  return oh, tracer
+
+
+def test_spans(traced_oh: tuple[openhab.OpenHAB, RecordingTracer]):
+  oh, tracer = traced_oh
+
+  item = oh.get_item('light_kitchen')
+  item.command('OFF')
+  item.is_state_null()
+  oh.rules.get()
+
+  assert [span.name for span in tracer.spans] == ['get_item', 'command', 'is_state_null', 'get_rules']
+  assert all(span.end is not None for span in tracer.spans)
+
+  get_item = tracer.find('get_item')[0]
+  assert get_item.attributes == {'openhab.item': 'light_kitchen'}
+  assert [(span.name, span.attributes['http.route'], span.attributes['http.status_code']) for span in get_item.http_requests] == [
+    ('HTTP GET', '/items/{name}', 200)
+  ]
+
+  assert len(tracer.find('command')[0].http_requests) == 1
+  assert len(tracer.find('is_state_null')[0].http_requests) <= 1
+  assert [span.name for span in tracer.find('is_state_null')[0].children] == ['refresh']
+
+
+def test_spans_errors(traced_oh: tuple[openhab.OpenHAB, RecordingTracer]):
+  oh, tracer = traced_oh
+
+  with pytest.raises(httpx.HTTPStatusError):
+    oh.get_item('missing')
+
+  span = tracer.find('get_item')[0]
+  assert isinstance(span.error, httpx.HTTPStatusError)
+  assert span.http_requests[0].attributes['http.status_code'] == 404
+
+
+def test_spans_persistence(traced_oh: tuple[openhab.OpenHAB, RecordingTracer]):
+  oh, tracer = traced_oh
+  start = datetime.datetime(2023, 11, 14, tzinfo=datetime.timezone.utc)
+
+  data = oh.get_item_persistence('temperature', start_time=start, end_time=start + datetime.timedelta(days=1), page_length=10)
+  next(data)
+  # the span of a generator is not the current span while the caller processes the values
+  oh.get_item('dimmer')
+  rest = list(data)
+
+  assert len(rest) == 24
+  assert [span.name for span in tracer.spans] == ['get_item_persistence', 'get_item']
+  persistence = tracer.find('get_item_persistence')[0]
+  assert persistence.end is not None
+  assert len(persistence.http_requests) == 4
+
+  # requests sent from worker threads are children of the operation's span
+  tracer.clear()
+  oh.send_commands({'light_kitchen': 'OFF', 'light_living': 'ON'})
+  assert [span.name for span in tracer.spans] == ['send_commands']
+  # items not known yet are fetched before sending the command
+  assert sorted(span.name for span in tracer.spans[0].children) == ['command', 'command', 'get_item', 'get_item']
+  assert len(tracer.spans[0].http_requests) == 4
+
+
+def test_async_spans(fake_openhab: FakeOpenHAB):
+  tracer = RecordingTracer()
+
+  async def run():
+    async with openhab.AsyncOpenHAB(BASE_URL, tracer=tracer) as oh:
+      oh.session = httpx.AsyncClient(transport=fake_openhab.transport())
+      items = await asyncio.gather(oh.get_item('dimmer'), oh.get_item('light_kitchen'))
+      await items[0].async_command(50)
+
+  asyncio.run(run())
+
+  assert [span.name for span in tracer.spans] == ['get_item', 'get_item', 'async_command']
+  assert all(len(span.http_requests) == 1 for span in tracer.spans)